@@ -0,0 +1,218 @@
+import argparse
+import calendar
+import csv
+import sys
+from datetime import date
+
+import numpy as np
+
+import metrics
+from payroll import calculate_kra_paye_batch
+from records import PayrollMonths
+from schedules import ScheduleError, schedule_for
+
+# Year-end payroll (the figures on a KRA P9 form): PAYE, SHA and NSSF for every
+# employee and month of a year, with per-employee totals. Salaries come in as an
+# employees x 12 matrix, so bonuses and mid-year raises are just different
+# numbers in some months. Each month is taxed under the schedule in force on its
+# pay date, and a month's deductions match tax.calculate_kra_paye exactly.
+# Input is read and processed in chunks of employees, so a 100k-employee year
+# never has to be in memory at once.
+#
+#   python annual_payroll.py salaries.csv --year 2024 -o p9_totals.csv --months p9_months.csv
+#
+# CSV columns: employee_id, then either salary_01 .. salary_12 or one
+# monthly_gross_salary for the whole year; optionally raise_salary and
+# raise_month (1-12, the first month paid at the new salary) and
+# bonus_01 .. bonus_12.
+
+MONTHS = 12
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+SUMMARY_COLUMNS = ["employee_id", "gross_pay", "paye_tax", "sha", "nssf", "total_statutory_deductions", "net_pay"]
+MONTH_COLUMNS = ["employee_id", "month"] + SUMMARY_COLUMNS[1:]
+
+
+def pay_dates(year):
+    # The last day of each month, the usual pay date
+    return [date(year, month, calendar.monthrange(year, month)[1]) for month in range(1, MONTHS + 1)]
+
+
+def schedule_periods(year):
+    # (pay_date, first month index, end month index) for each run of months under one schedule
+    periods = []
+    for month, pay_date in enumerate(pay_dates(year)):
+        schedule = schedule_for(pay_date)
+        if periods and periods[-1][0] is schedule:
+            periods[-1][3] = month + 1
+        else:
+            periods.append([schedule, pay_date, month, month + 1])
+    return [(pay_date, start, end) for _, pay_date, start, end in periods]
+
+
+def salary_matrix(monthly_gross_salary, raise_salary=None, raise_month=None, bonuses=None):
+    """Employees x 12 gross pay from a salary each, optional raises and bonuses.
+
+    `raise_salary` and `raise_month` (1-12, the first month at the new salary;
+    0 or NaN for no raise) are arrays with one entry per employee. `bonuses` is
+    an employees x 12 array added on top.
+    """
+    base = np.asarray(monthly_gross_salary, dtype=np.float64).reshape(-1, 1)
+    gross = np.repeat(base, MONTHS, axis=1)
+    if raise_salary is not None:
+        raise_salary = np.asarray(raise_salary, dtype=np.float64).reshape(-1, 1)
+        raise_month = np.nan_to_num(np.asarray(raise_month, dtype=np.float64), nan=0.0).reshape(-1, 1)
+        raised = (raise_month >= 1) & (np.arange(1, MONTHS + 1) >= raise_month)
+        gross = np.where(raised, raise_salary, gross)
+    if bonuses is not None:
+        gross = gross + np.asarray(bonuses, dtype=np.float64)
+    return gross
+
+
+@metrics.span("payroll")
+def calculate_annual_payroll(gross_pay, year):
+    """PAYE, SHA and NSSF for an employees x 12 matrix of monthly gross pay.
+
+    Returns a records.PayrollMonths of employees x 12 arrays (month detail);
+    its summary() gives each employee's year totals.
+    """
+    gross = np.asarray(gross_pay, dtype=np.float64)
+    if gross.ndim != 2 or gross.shape[1] != MONTHS:
+        raise ValueError(f"Expected an employees x {MONTHS} salary matrix, got shape {gross.shape}")
+
+    paye = np.empty_like(gross)
+    sha = np.empty_like(gross)
+    nssf = np.empty_like(gross)
+    # Usually one period; two when a new schedule takes effect during the year
+    for pay_date, start, end in schedule_periods(year):
+        deductions = calculate_kra_paye_batch(gross[:, start:end], pay_date)
+        paye[:, start:end] = deductions.paye_tax
+        sha[:, start:end] = deductions.sha
+        nssf[:, start:end] = deductions.nssf
+
+    total = paye + sha + nssf
+    return PayrollMonths(gross, paye, sha, nssf, total, gross - total)
+
+
+def _row_matrix(row):
+    # (salaries, bonuses) for one CSV row, 12 numbers each
+    if row.get("salary_01") not in (None, ""):
+        salaries = [float(row[f"salary_{m:02d}"]) for m in range(1, MONTHS + 1)]
+    else:
+        salaries = [float(row["monthly_gross_salary"])] * MONTHS
+        if row.get("raise_salary") not in (None, ""):
+            raise_month = int(row["raise_month"])
+            if not 1 <= raise_month <= MONTHS:
+                raise ValueError(f"raise_month must be 1-{MONTHS}, got {raise_month}")
+            salaries[raise_month - 1:] = [float(row["raise_salary"])] * (MONTHS - raise_month + 1)
+    bonuses = [float(row.get(f"bonus_{m:02d}") or 0) for m in range(1, MONTHS + 1)]
+    return salaries, bonuses
+
+
+def read_salary_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE, errors=None):
+    """Yields (employee_ids, gross_pay) per chunk of a salary CSV.
+
+    gross_pay is a chunk x 12 matrix, bonuses included. Rows that can't be
+    read are reported on stderr and skipped; `errors`, a list, collects their
+    line numbers.
+    """
+    reader = csv.DictReader(file)
+    ids = []
+    gross = np.empty((chunk_size, MONTHS), dtype=np.float64)
+    for row in reader:
+        try:
+            salaries, bonuses = _row_matrix(row)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Skipping line {reader.line_num}: {e}", file=sys.stderr)
+            if errors is not None:
+                errors.append(reader.line_num)
+            continue
+        gross[len(ids)] = salaries
+        gross[len(ids)] += bonuses
+        ids.append(row.get("employee_id") or str(reader.line_num))
+        if len(ids) == chunk_size:
+            yield ids, gross
+            ids = []
+            gross = np.empty((chunk_size, MONTHS), dtype=np.float64)
+    if ids:
+        yield ids, gross[:len(ids)]
+
+
+def stream_annual_payroll(chunks, year):
+    # (employee_ids, PayrollMonths) for each (employee_ids, gross_pay) chunk
+    for ids, gross in chunks:
+        yield ids, calculate_annual_payroll(gross, year)
+
+
+def _amounts(column):
+    # A column of KES amounts as "1234.50" strings
+    return list(map("{:.2f}".format, column.ravel().tolist()))
+
+
+def summary_rows(ids, months):
+    return zip(ids, *(_amounts(column) for column in months.summary()))
+
+
+def month_rows(ids, months, year):
+    # One row per employee and month, employee by employee
+    labels = [f"{year}-{month:02d}" for month in range(1, MONTHS + 1)]
+    return zip((employee_id for employee_id in ids for _ in labels), labels * len(ids), *(_amounts(column) for column in months))
+
+
+def run_annual_payroll(chunks, year, summary_out, months_out=None):
+    """Writes year totals (and, with `months_out`, month detail) as CSV, chunk by chunk.
+
+    Returns the totals over every employee, as a dict of field -> amount, plus "employees".
+    """
+    schedule_periods(year)  # raises ScheduleError before anything is written if the year isn't covered
+    summary_writer = csv.writer(summary_out)
+    summary_writer.writerow(SUMMARY_COLUMNS)
+    months_writer = None
+    if months_out is not None:
+        months_writer = csv.writer(months_out)
+        months_writer.writerow(MONTH_COLUMNS)
+
+    totals = dict.fromkeys(PayrollMonths._fields, 0.0)
+    employees = 0
+    for ids, months in stream_annual_payroll(chunks, year):
+        summary_writer.writerows(summary_rows(ids, months))
+        if months_writer is not None:
+            months_writer.writerows(month_rows(ids, months, year))
+        for field, column in zip(PayrollMonths._fields, months):
+            totals[field] += float(column.sum())
+        employees += months.size
+    totals["employees"] = employees
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Year-end PAYE, SHA and NSSF totals for every employee (P9)")
+    parser.add_argument("input", nargs="?", default="-", help="salary CSV ('-' or omitted for stdin)")
+    parser.add_argument("--year", type=int, default=date.today().year)
+    parser.add_argument("--output", "-o", default="-", help="per-employee totals CSV ('-' for stdout)")
+    parser.add_argument("--months", help="also write month-by-month detail to this CSV")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, 'r', newline='', encoding='utf-8')
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', newline='', encoding='utf-8')
+    months_out = open(args.months, 'w', newline='', encoding='utf-8') if args.months else None
+    errors = []
+    try:
+        totals = run_annual_payroll(read_salary_chunks(source, args.chunk_size, errors), args.year, out, months_out)
+    except ScheduleError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        for file in (source, out, months_out):
+            if file is not None and file not in (sys.stdin, sys.stdout):
+                file.close()
+    print(f"{totals['employees']} employees for {args.year} ({len(errors)} rows skipped): "
+          f"gross KES {totals['gross_pay']:,.2f}, PAYE KES {totals['paye_tax']:,.2f}, "
+          f"SHA KES {totals['sha']:,.2f}, NSSF KES {totals['nssf']:,.2f}.", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import metrics
+from investment import get_rate_snapshot, suggest_investments
+from records import as_dict
+from tax import calculate_net_income
+
+# Non-interactive batch runs: stream employee profiles in (CSV or JSON Lines,
+# from a file or stdin), compute each one's breakdown and suggestions against
+# a single shared rate fetch, and stream one JSON result per line out. Profiles
+# are processed in chunks with a bounded number in flight, so memory stays flat
+# however large the input is.
+#
+#   python main.py batch payroll.csv --workers 8 > results.jsonl
+#   python batch.py - --format jsonl < profiles.jsonl
+#
+# CSV columns: id (optional), name, monthly_gross_salary, target_amount,
+# timeframe_months, plus either a fixed_monthly_expenses column holding a JSON
+# object or one expense_<category> column per expense.
+# JSON Lines: one profile per line, shaped like user_data.json.
+
+DEFAULT_CHUNK_SIZE = 1000
+
+EXPENSE_PREFIX = "expense_"
+
+
+def profile_from_csv_row(row):
+    # Raises ValueError for a row that can't be a profile
+    if None in row:
+        # csv.DictReader puts the fields past the end of the header under None
+        raise ValueError(f"{len(row[None])} more field(s) than the header has columns")
+    expenses = {}
+    if row.get("fixed_monthly_expenses"):
+        parsed = json.loads(row["fixed_monthly_expenses"])
+        if not isinstance(parsed, dict):
+            raise ValueError("fixed_monthly_expenses must be a JSON object of category -> amount")
+        expenses = {k: float(v) for k, v in parsed.items()}
+    for column, value in row.items():
+        if column.startswith(EXPENSE_PREFIX) and value not in (None, ""):
+            expenses[column[len(EXPENSE_PREFIX):]] = float(value)
+
+    profile = {
+        "name": row.get("name", ""),
+        "monthly_gross_salary": float(row.get("monthly_gross_salary") or 0),
+        "fixed_monthly_expenses": expenses,
+        "savings_goals": {
+            "target_amount": float(row.get("target_amount") or 0),
+            "timeframe_months": int(float(row.get("timeframe_months") or 1))
+        }
+    }
+    if row.get("id"):
+        profile["id"] = row["id"]
+    return profile
+
+
+def read_profiles(file, fmt):
+    # Yields (line_number, profile, error); a bad row becomes an error result instead of stopping the run
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            try:
+                yield reader.line_num, profile_from_csv_row(row), None
+            except (ValueError, TypeError) as e:
+                yield reader.line_num, None, f"Invalid row: {e}"
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line), None
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+
+
+def profile_breakdown(profile):
+    breakdown = calculate_net_income(float(profile.get("monthly_gross_salary", 0)), profile.get("fixed_monthly_expenses", {}))
+    # A NaN or infinite salary or expense carries through to here
+    if not math.isfinite(breakdown.remaining_for_savings_investment):
+        raise ValueError("monthly_gross_salary and fixed_monthly_expenses must be finite numbers")
+    return breakdown
+
+
+def process_profile(profile, rates, financial_breakdown=None):
+    # `financial_breakdown` is profile_breakdown(profile), if the caller has already worked it out
+    if financial_breakdown is None:
+        with metrics.span("tax"):
+            financial_breakdown = profile_breakdown(profile)
+    savings_goals = profile.get("savings_goals", {})
+
+    investment_suggestions = suggest_investments(
+        remaining_funds=financial_breakdown.remaining_for_savings_investment,
+        savings_goal_amount=savings_goals.get("target_amount", 0),
+        savings_goal_timeframe_months=savings_goals.get("timeframe_months", 1),
+        rates=rates
+    )
+    return {
+        "id": profile.get("id"),
+        "name": profile.get("name", ""),
+        "financial_breakdown": financial_breakdown._asdict(),
+        "investment_suggestions": [as_dict(s) for s in investment_suggestions]
+    }
+
+
+def process_chunk(chunk, rates=None):
+    # Returns (serialised results, error count), so workers send back one string per profile
+    rates = rates if rates is not None else _worker_rates
+    lines = []
+    errors = 0
+    # Every breakdown in the chunk first, timed as one tax span, then the suggestions
+    entries = []
+    with metrics.span("tax"):
+        for line_number, profile, error in chunk:
+            breakdown = None
+            if error is None:
+                try:
+                    breakdown = profile_breakdown(profile)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+            entries.append((line_number, profile, breakdown, error))
+
+    for line_number, profile, breakdown, error in entries:
+        if error is None:
+            try:
+                result = process_profile(profile, rates, breakdown)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        if error is not None:
+            result = {"line": line_number, "error": error}
+            errors += 1
+        lines.append(json.dumps(result))
+    return lines, errors
+
+
+# Rates shared by every chunk a worker process handles, set once per worker
+_worker_rates = None
+
+
+def _init_worker(rates):
+    global _worker_rates
+    _worker_rates = rates
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(profiles, out, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, rates=None):
+    """Process (line_number, profile, error) tuples and write JSON Lines to `out`.
+
+    Output keeps input order. With several workers at most two chunks per
+    worker are queued at once. Returns (profiles processed, errors).
+    """
+    rates = rates if rates is not None else get_rate_snapshot()
+    count = errors = 0
+
+    def emit(chunk_result):
+        nonlocal count, errors
+        lines, chunk_errors = chunk_result
+        out.write("\n".join(lines))
+        out.write("\n")
+        count += len(lines)
+        errors += chunk_errors
+
+    if workers <= 1:
+        for chunk in chunked(profiles, chunk_size):
+            emit(process_chunk(chunk, rates))
+        return count, errors
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rates,)) as pool:
+        pending = deque()
+        for chunk in chunked(profiles, chunk_size):
+            if len(pending) >= workers * 2:
+                emit(pending.popleft().result())
+            pending.append(pool.submit(process_chunk, chunk))
+        while pending:
+            emit(pending.popleft().result())
+    return count, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Smart Money Guide over many profiles, JSON Lines out")
+    parser.add_argument("input", nargs="?", default="-", help="CSV or JSON Lines file ('-' or omitted for stdin)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--output", "-o", default="-", help="JSON Lines output file ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes; 0 uses every core")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    workers = args.workers or os.cpu_count() or 1
+
+    source = sys.stdin if args.input == "-" else open(args.input, 'r', newline='', encoding='utf-8')
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    try:
+        # The fetch layer reports on stderr, including a background refresh this may start
+        rates = get_rate_snapshot()
+        count, errors = run_batch(read_profiles(source, fmt), out, workers, args.chunk_size, rates)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"Processed {count} profiles ({errors} errors).", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from mmf_parser import parse_mmf_rates
+
+# Compares the targeted rates-table parser against the original full-page
+# BeautifulSoup walk, on every saved money.ke fixture: best-of wall time per
+# parse and peak memory (tracemalloc) for a single parse.
+#
+#   python benchmarks/bench_parse.py [--repeat 7] [--number 50]
+
+
+def legacy_parse(content):
+    # The pre-mmf_parser scrape: full html.parser tree, every <tr> on the page,
+    # rate kept as a string and converted later by suggest_investments.
+    from bs4 import BeautifulSoup
+
+    mmf_rates = []
+    soup = BeautifulSoup(content, "html.parser")
+    for row in soup.find_all("tr"):
+        columns = row.find_all("td")
+        if len(columns) >= 3:
+            mmf_rates.append({"name": columns[0].text.strip(), "rate": columns[2].text.strip()})
+    for mmf in mmf_rates:
+        try:
+            float(mmf['rate'].replace('%', '').strip()) / 100
+        except ValueError:
+            continue
+    return mmf_rates
+
+
+def time_parse(parse, content, repeat, number):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            parse(content)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def peak_memory(parse, content):
+    tracemalloc.start()
+    try:
+        parse(content)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MMF rates table parser")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--fixtures", default=os.path.join(ROOT, "fixtures", "money_ke_mmf_rates*.html"))
+    args = parser.parse_args(argv)
+
+    parsers = [("mmf_parser", parse_mmf_rates)]
+    try:
+        import bs4  # noqa: F401
+        parsers.insert(0, ("bs4 html.parser (legacy)", legacy_parse))
+    except ImportError:
+        print("beautifulsoup4 is not installed; only timing mmf_parser.")
+
+    print(f"{'fixture':<34} {'parser':<26} {'rows':>5} {'time/parse':>12} {'peak mem':>10}")
+    for path in sorted(glob.glob(args.fixtures)):
+        with open(path, 'rb') as f:
+            content = f.read()
+        for label, parse in parsers:
+            rows = len(parse(content))
+            seconds = time_parse(parse, content, args.repeat, args.number)
+            peak = peak_memory(parse, content)
+            print(f"{os.path.basename(path):<34} {label:<26} {rows:>5} {seconds * 1000:>9.3f} ms {peak / 1024:>7.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import io
+
+import datasets
+
+# Hot paths timed by benchmarks/run.py. Each case is a setup function that
+# builds its inputs and returns the zero-argument callable to time (or a
+# (callable, cleanup) pair); `items` is how many rows one call processes, for
+# the throughput column. Nothing here touches the network: rates come from
+# the saved money.ke fixtures, served by stub_server.py where a fetch is timed.
+
+CASES = []
+
+
+def case(name, items=1):
+    def register(setup):
+        CASES.append((name, setup, items))
+        return setup
+    return register
+
+
+# --- tax ---
+
+for _label in ("1", "10k"):
+    _n = datasets.SIZES[_label]
+
+    @case(f"tax.calculate_kra_paye[{_label}]", items=_n)
+    def _kra_paye(n=_n):
+        from tax import calculate_kra_paye
+        gross = datasets.salaries(n).tolist()
+        return lambda: [calculate_kra_paye(g) for g in gross]
+
+    @case(f"tax.calculate_net_income[{_label}]", items=_n)
+    def _net_income(n=_n):
+        from tax import calculate_net_income
+        gross = datasets.salaries(n).tolist()
+        expenses = [{"Rent": e} for e in datasets.expenses(n).tolist()]
+        return lambda: [calculate_net_income(g, x) for g, x in zip(gross, expenses)]
+
+for _label, _n in datasets.SIZES.items():
+
+    @case(f"payroll.calculate_net_income_batch[{_label}]", items=_n)
+    def _net_income_batch(n=_n):
+        from payroll import calculate_net_income_batch
+        gross = datasets.salaries(n)
+        expenses = datasets.expenses(n)
+        return lambda: calculate_net_income_batch(gross, expenses)
+
+    @case(f"solvers.gross_for_net_batch[{_label}]", items=_n)
+    def _gross_up(n=_n):
+        from solvers import gross_for_net_batch
+        targets = datasets.salaries(n) * 0.75
+        return lambda: gross_for_net_batch(targets)
+
+
+@case("solvers.gross_for_net[1]")
+def _gross_up_scalar():
+    from solvers import gross_for_net
+    return lambda: gross_for_net(123_456.0)
+
+
+@case("whatif.salary_curve+evaluate[10k salaries]", items=10_000)
+def _whatif_curve():
+    from whatif import salary_curve
+    gross = datasets.salaries(10_000)
+    # What a GUI rerun does: build the curve for the slider range, evaluate it
+    return lambda: salary_curve(0.0, float(gross.max()), 40_000.0).evaluate(gross)
+
+
+@case("annual_payroll.calculate_annual_payroll[10k x 12 months, schedule change]", items=10_000)
+def _annual_payroll():
+    from annual_payroll import calculate_annual_payroll, salary_matrix
+    base = datasets.salaries(10_000)
+    # A raise from July, and 2024 spans the February NSSF change
+    gross = salary_matrix(base, base * 1.1, [7] * len(base))
+    return lambda: calculate_annual_payroll(gross, 2024)
+
+
+# --- projections ---
+
+@case("investment.calculate_mmf_return[10k]", items=10_000)
+def _mmf_return():
+    from investment import calculate_mmf_return
+    deposits = datasets.expenses(10_000).tolist()
+    return lambda: [calculate_mmf_return(d, 0.1225, 24) for d in deposits]
+
+
+@case("projection.project_schedules[40 funds x 120 months]", items=40)
+def _project_schedules():
+    from projection import project_schedules
+    rates = [fund.rate / 100 for fund in datasets.rate_snapshot().rates][:40]
+    return lambda: project_schedules(rates, 20_000, 120)
+
+
+@case("simulation.simulate_goal[100k paths x 120 months]", items=100_000)
+def _simulate_goal():
+    from simulation import simulate_goal
+    return lambda: simulate_goal(20_000, 120, 4_000_000, 0.12, seed=0)
+
+
+# --- rates: parsing and (stubbed) fetching ---
+
+for _fixture in ("money_ke_mmf_rates.html", "money_ke_mmf_rates_messy.html"):
+
+    @case(f"mmf_parser.parse_mmf_rates[{_fixture}]")
+    def _parse(fixture=_fixture):
+        from mmf_parser import parse_mmf_rates
+        content = datasets.fixture(fixture)
+        return lambda: parse_mmf_rates(content)
+
+
+@case("investment.scrape_mmf_rates[stub, 200]")
+def _scrape_full():
+    from fetch import Fetcher
+    from investment import scrape_mmf_rates
+    from stub_server import StubServer
+    stub = StubServer().start()
+    fetcher = Fetcher()
+    return (lambda: scrape_mmf_rates(url=stub.url, fetcher=fetcher)), stub.stop
+
+
+@case("investment.scrape_mmf_rates[stub, 304]")
+def _scrape_not_modified():
+    from fetch import Fetcher
+    from investment import scrape_mmf_rates
+    from stub_server import StubServer
+    stub = StubServer().start()
+    fetcher = Fetcher()
+    _, validators = scrape_mmf_rates(url=stub.url, fetcher=fetcher)
+    return (lambda: scrape_mmf_rates(validators, url=stub.url, fetcher=fetcher)), stub.stop
+
+
+@case("rate_sources.fetch_quotes[stub, 4 sources]")
+def _fetch_quotes():
+    import rate_sources
+    from stub_server import StubServer
+    pages = {
+        "mmf": ("money_ke_mmf_rates.html", rate_sources.parse_mmf_quotes),
+        "tbill": ("money_ke_tbills.html", rate_sources.parse_tbill_quotes),
+        "bond": ("money_ke_bonds.html", rate_sources.parse_bond_quotes),
+        "bank_deposit": ("money_ke_fixed_deposits.html", rate_sources.parse_deposit_quotes),
+    }
+    stubs = [StubServer(f"{datasets.FIXTURES_DIR}/{fixture}").start() for fixture, _ in pages.values()]
+    sources = [rate_sources.RateSource(name, stub.url, parse) for (name, (_, parse)), stub in zip(pages.items(), stubs)]
+
+    def cleanup():
+        for stub in stubs:
+            stub.stop()
+    return (lambda: rate_sources.fetch_quotes(sources)), cleanup
+
+
+def _published_table():
+    # A rate table published the way rate_refresher.py does it, in a scratch directory
+    import shutil
+    import tempfile
+    from rate_refresher import publish
+    scratch = tempfile.mkdtemp()
+    path = f"{scratch}/mmf_rates.bin"
+    publish(path, datasets.rate_snapshot(), 900, 1)
+    return path, lambda: shutil.rmtree(scratch)
+
+
+@case("rate_refresher.SharedRateTable.get_snapshot[unchanged]")
+def _shared_table_read():
+    from rate_refresher import SharedRateTable
+    path, cleanup = _published_table()
+    table = SharedRateTable(path)
+    table.get_snapshot()
+    return table.get_snapshot, cleanup
+
+
+@case("rate_refresher.SharedRateTable.get_snapshot[new version]")
+def _shared_table_load():
+    from rate_refresher import SharedRateTable
+    path, cleanup = _published_table()
+    # A fresh reader every call: stat, map and decode the whole table
+    return (lambda: SharedRateTable(path).get_snapshot()), cleanup
+
+
+# --- recommendations ---
+
+@case("investment.suggest_investments[1]")
+def _suggest():
+    from investment import suggest_investments
+    rates = datasets.rate_snapshot()
+    return lambda: suggest_investments(60_000, 500_000, 12, rates=rates)
+
+
+@case("investment.suggest_investments[10k]", items=10_000)
+def _suggest_many():
+    from investment import suggest_investments
+    rates = datasets.rate_snapshot()
+    remaining = datasets.expenses(10_000).tolist()
+    return lambda: [suggest_investments(r, 500_000, 12, rates=rates) for r in remaining]
+
+
+@case("recalc.financial_plan[one expense edit]")
+def _recalc_expense_edit():
+    from recalc import financial_plan
+    plan = financial_plan()
+    plan.update(gross_salary=150_000.0, fixed_expenses={"Rent": 30_000.0}, savings_goal_amount=500_000.0,
+                savings_goal_timeframe_months=12, rates=datasets.rate_snapshot())
+    plan.get("suggestions")
+    rents = iter(range(10**9))
+
+    def edit():
+        plan.set("fixed_expenses", {"Rent": float(next(rents))})
+        return plan.get("suggestions")
+    return edit
+
+
+@case("batch.run_batch[10k profiles]", items=10_000)
+def _run_batch():
+    from batch import run_batch
+    rates = datasets.rate_snapshot()
+    profiles = [(i, p, None) for i, p in enumerate(datasets.profiles(10_000))]
+    return lambda: run_batch(profiles, io.StringIO(), workers=1, rates=rates)
+
+
+# --- reports ---
+
+def _report_inputs():
+    from report_export import build_report
+    user_data = datasets.profiles(1)[0]
+    user_data["savings_goals"]["timeframe_months"] = 36
+    financial_breakdown, investment_suggestions = build_report(user_data, datasets.rate_snapshot())
+    return financial_breakdown, investment_suggestions, user_data
+
+
+@case("report_export.write_xlsx[in-memory, as gui.generate_excel_report]")
+def _xlsx_report():
+    from report_export import write_xlsx
+    inputs = _report_inputs()
+    return lambda: write_xlsx(io.BytesIO(), *inputs)
+
+
+@case("report_export.write_csv[1 report]")
+def _csv_report():
+    from report_export import write_csv
+    inputs = _report_inputs()
+    return lambda: write_csv(io.StringIO(), *inputs)
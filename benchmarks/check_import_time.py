@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start import budget for the headless core. Runs `python -X importtime`
+# in a fresh interpreter for each module, takes the best of a few runs, and
+# exits non-zero when a module takes longer than its budget or pulls in one
+# of the heavy UI / network / numeric stacks at import time.
+#
+#   python benchmarks/check_import_time.py [--runs 5] [--scale 1.0]
+
+# Module -> budget in milliseconds (cumulative import time, interpreter start-up excluded)
+BUDGETS_MS = {
+    "tax": 15,
+    "investment": 30,
+    "recommendations": 5,
+    "main": 45,
+}
+
+# Must only be imported when actually used (a fetch, a batch run, the GUI)
+HEAVY_MODULES = ("streamlit", "pandas", "numpy", "requests", "urllib3", "bs4", "xlsxwriter")
+
+
+def import_time_ms(module):
+    # Cumulative import time of `module` as reported by -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No -X importtime entry for {module}:\n{result.stderr[-2000:]}")
+
+
+def heavy_imports(module):
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}} & {set(HEAVY_MODULES)!r})))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when the core's cold-start import time regresses")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module; the best run counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. 2 on slow CI machines")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<18} {'best':>9} {'budget':>9}  heavy imports")
+    for module, budget in BUDGETS_MS.items():
+        best = min(import_time_ms(module) for _ in range(args.runs))
+        heavy = heavy_imports(module)
+        limit = budget * args.scale
+        status = "ok" if best <= limit and not heavy else "FAIL"
+        print(f"{module:<18} {best:>6.1f} ms {limit:>6.1f} ms  {', '.join(heavy) or '-'}  {status}")
+        if best > limit:
+            failures.append(f"{module} took {best:.1f} ms to import (budget {limit:.1f} ms)")
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)} at import time")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Synthetic inputs for the benchmark suite. Everything is generated from a
+# fixed seed, so every run (and the recorded baseline) sees the same data.
+
+SIZES = {"1": 1, "10k": 10_000, "1m": 1_000_000}
+
+FIXTURES_DIR = os.path.join(ROOT, "fixtures")
+EXPENSE_CATEGORIES = ("Rent", "Utilities", "Food", "Transport", "School Fees", "Insurance")
+
+
+def salaries(n, seed=0):
+    # Monthly gross salaries in KES: log-normal around ~80k, spanning every PAYE band
+    rng = np.random.default_rng(seed)
+    return np.round(rng.lognormal(mean=11.3, sigma=0.8, size=n), 2)
+
+
+def expenses(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.round(rng.uniform(5_000, 60_000, size=n), 2)
+
+
+def profiles(n, seed=0):
+    # Profiles shaped like user_data.json
+    rng = np.random.default_rng(seed)
+    gross = salaries(n, seed)
+    result = []
+    for i in range(n):
+        categories = rng.choice(EXPENSE_CATEGORIES, size=rng.integers(1, 5), replace=False)
+        result.append({
+            "id": f"E{i:07d}",
+            "name": f"Employee {i}",
+            "monthly_gross_salary": float(gross[i]),
+            "fixed_monthly_expenses": {str(c): float(round(rng.uniform(2_000, 30_000), 2)) for c in categories},
+            "savings_goals": {
+                "target_amount": float(rng.choice([100_000, 250_000, 500_000, 1_000_000])),
+                "timeframe_months": int(rng.choice([6, 12, 24, 36]))
+            }
+        })
+    return result
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def rate_snapshot():
+    # The saved money.ke page as a fresh RateSnapshot, so nothing touches the network
+    from mmf_parser import parse_mmf_rates
+    from rate_provider import RateSnapshot
+    return RateSnapshot(parse_mmf_rates(fixture("money_ke_mmf_rates.html")), time.time(), False)
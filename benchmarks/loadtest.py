@@ -0,0 +1,147 @@
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import datasets
+from run import percentile
+
+# Load test for service.py. Starts stub_server.py as the stand-in for money.ke,
+# starts the service against it in a subprocess, then drives it from
+# `--concurrency` client threads (one keep-alive connection each) for
+# `--duration` seconds and reports requests per second, profiles per second and
+# p50 / p95 / p99 latency.
+#
+#   python benchmarks/loadtest.py --workers 4 --concurrency 16
+#   python benchmarks/loadtest.py --scenario batch --batch-size 1000 --workers 4
+#
+# Scenarios: profile (POST /v1/profile, one employee per request), batch
+# (POST /v1/batch, --batch-size employees per request) and net-income
+# (POST /v1/net-income). Stub hits are reported too: every worker answers from
+# the one shared rate cache, so they stay at one or two however long the run.
+
+SCENARIOS = {
+    "profile": "/v1/profile",
+    "batch": "/v1/batch",
+    "net-income": "/v1/net-income",
+}
+
+
+def request_bodies(scenario, batch_size, count=256):
+    # Pre-encoded bodies cycled through by the clients, and profiles per request
+    profiles = datasets.profiles(max(count, batch_size))
+    if scenario == "batch":
+        bodies = [json.dumps({"profiles": profiles[:batch_size]}).encode("utf-8")]
+        return bodies, batch_size
+    if scenario == "net-income":
+        profiles = [{k: p[k] for k in ("monthly_gross_salary", "fixed_monthly_expenses")} for p in profiles]
+    return [json.dumps(p).encode("utf-8") for p in profiles[:count]], 1
+
+
+def wait_until_ready(host, port, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"service.py exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request("GET", "/healthz")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"service.py did not answer on port {port} within {timeout}s")
+
+
+def client(host, port, path, bodies, stop_at, latencies, failures):
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    headers = {"Content-Type": "application/json"}
+    i = 0
+    while time.perf_counter() < stop_at:
+        body = bodies[i % len(bodies)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            connection.request("POST", path, body, headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+        elapsed = time.perf_counter() - started
+        if ok:
+            latencies.append(elapsed)
+        else:
+            failures.append(elapsed)
+    connection.close()
+
+
+def run_load(host, port, path, bodies, concurrency, duration, warmup=1.0):
+    # Warm-up pass first (not counted), then the measured run
+    for seconds, record in ((warmup, False), (duration, True)):
+        latencies, failures = [], []
+        stop_at = time.perf_counter() + seconds
+        threads = [threading.Thread(target=client, args=(host, port, path, bodies, stop_at, latencies, failures))
+                   for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    return latencies, failures, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test service.py against a local stand-in for money.ke")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="profile")
+    parser.add_argument("--batch-size", type=int, default=1000, help="profiles per request in the batch scenario")
+    parser.add_argument("--workers", type=int, default=1, help="service worker processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to measure")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    from stub_server import StubServer
+
+    host = "127.0.0.1"
+    path = SCENARIOS[args.scenario]
+    bodies, profiles_per_request = request_bodies(args.scenario, args.batch_size)
+
+    with StubServer() as stub, tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, SMG_MMF_URL=stub.url, SMG_RATE_HISTORY_DIR=os.path.join(scratch, "rate_history"))
+        service = subprocess.Popen(
+            [sys.executable, os.path.join(datasets.ROOT, "service.py"), "--host", host, "--port", str(args.port),
+             "--workers", str(args.workers)],
+            env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(host, args.port, service)
+            latencies, failures, elapsed = run_load(host, args.port, path, bodies, args.concurrency, args.duration)
+        finally:
+            service.terminate()
+            service.wait(timeout=10)
+
+    latencies.sort()
+    requests = len(latencies)
+    print(f"{args.scenario}: {args.workers} worker(s), {args.concurrency} clients, {elapsed:.1f}s"
+          + (f", {profiles_per_request} profiles per request" if profiles_per_request > 1 else ""))
+    print(f"  requests     {requests} ok, {len(failures)} failed")
+    if not requests:
+        return 1
+    print(f"  throughput   {requests / elapsed:,.1f} req/s, {requests * profiles_per_request / elapsed:,.0f} profiles/s")
+    print(f"  latency      p50 {percentile(latencies, 50) * 1000:.2f} ms, p95 {percentile(latencies, 95) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"  stub hits    {stub.hits}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
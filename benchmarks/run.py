@@ -0,0 +1,167 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+from cases import CASES
+
+# Benchmark runner for the hot paths in cases.py. For every case it reports
+# latency percentiles over repeated calls, throughput (rows per second at the
+# median latency) and peak traced memory of one call, and can save the results
+# as a baseline or compare against one, failing on regressions.
+#
+#   python benchmarks/run.py                            # run everything
+#   python benchmarks/run.py -k payroll --min-time 2    # only matching cases
+#   python benchmarks/run.py --save benchmarks/baseline.json
+#   python benchmarks/run.py -k whatif --save benchmarks/baseline.json   # record one new case
+#   python benchmarks/run.py --compare benchmarks/baseline.json --threshold 1.5
+#
+# --save with -k updates the matching cases in an existing baseline and keeps
+# the rest. --compare fails on cases missing from the baseline as well as on
+# regressions, so a new case can't go unchecked.
+
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+def measure(fn, min_time, min_rounds, max_rounds):
+    # Per-call wall times in seconds, after one warm-up call
+    fn()
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_rounds and (len(times) < min_rounds or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def peak_memory(fn):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_case(setup, items, args):
+    # The code under test reports progress (scrapes, fetch errors) on stdout and stderr; keep it out of the table
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        prepared = setup()
+        fn, cleanup = prepared if isinstance(prepared, tuple) else (prepared, None)
+        try:
+            times = sorted(measure(fn, args.min_time, args.min_rounds, args.max_rounds))
+            peak = peak_memory(fn) if not args.no_memory else None
+        finally:
+            if cleanup is not None:
+                cleanup()
+    p50 = percentile(times, 50)
+    return {
+        "rounds": len(times),
+        "p50_ms": p50 * 1000,
+        "p90_ms": percentile(times, 90) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+        "throughput_per_s": items / p50 if p50 > 0 else None,
+        "peak_kib": peak / 1024 if peak is not None else None,
+    }
+
+
+def compare(results, baseline, threshold):
+    # (regressions, missing): cases whose median latency or peak memory grew by
+    # more than `threshold` times, and cases the baseline has no entry for
+    regressions = []
+    missing = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            missing.append(name)
+            continue
+        for key in ("p50_ms", "peak_kib"):
+            if result.get(key) is not None and base.get(key):
+                ratio = result[key] / base[key]
+                if ratio > threshold:
+                    regressions.append(f"{name}: {key} {base[key]:.3f} -> {result[key]:.3f} ({ratio:.2f}x)")
+    return regressions, missing
+
+
+def format_count(value):
+    if value is None:
+        return "-"
+    for unit, size in (("M", 1e6), ("k", 1e3)):
+        if value >= size:
+            return f"{value / size:.1f}{unit}"
+    return f"{value:.1f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Smart Money Guide benchmark suite")
+    parser.add_argument("-k", dest="filter", help="only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to keep timing each case")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=10_000)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", nargs="?", const=DEFAULT_BASELINE, help="compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slowdown factor counted as a regression")
+    args = parser.parse_args(argv)
+
+    cases = [(name, setup, items) for name, setup, items in CASES if not args.filter or args.filter in name]
+    baseline = {}
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'case':<62} {'p50':>10} {'p90':>10} {'p99':>10} {'rows/s':>8} {'peak':>10} {'vs base':>8}")
+    for name, setup, items in cases:
+        result = results[name] = run_case(setup, items, args)
+        base = baseline.get(name)
+        change = f"{result['p50_ms'] / base['p50_ms']:.2f}x" if base else ("new" if args.compare else "")
+        peak = f"{result['peak_kib']:.0f} KiB" if result["peak_kib"] is not None else "-"
+        print(f"{name:<62} {result['p50_ms']:>7.3f} ms {result['p90_ms']:>7.3f} ms {result['p99_ms']:>7.3f} ms "
+              f"{format_count(result['throughput_per_s']):>8} {peak:>10} {change:>8}")
+
+    if args.save:
+        saved = results
+        if args.filter and os.path.exists(args.save):
+            with open(args.save, 'r') as f:
+                saved = dict(json.load(f)["results"], **results)
+        with open(args.save, 'w') as f:
+            json.dump({
+                "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+                "results": saved,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        regressions, missing = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        for name in missing:
+            print(f"NO BASELINE: {name} (record it with -k and --save)")
+        if regressions or missing:
+            return 1
+        print(f"No regressions beyond {args.threshold}x against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
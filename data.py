@@ -1,19 +1,40 @@
 import json
-import os
+import sqlite3
+import threading
+
+# Profiles live in a SQLite store (profile_store.py) keyed by user. A legacy
+# single-profile user_data.json is imported into it the first time it's opened.
+LEGACY_DATA_FILE = "user_data.json"
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            from profile_store import ProfileStore
+            _store = ProfileStore()
+            _store.migrate_json_file(LEGACY_DATA_FILE)
+    return _store
 
 def collect_user_data():
-    
-    user_data = load_user_data()
+    from profile_store import user_id_for
+
+    print("Smart Money Guide")
+
+    name = input("Enter your name: ").strip()
+
+    # The store holds everyone's profiles, so only this user's is offered
+    user_data = load_user_data(user_id_for({"name": name})) if name else None
 
     if user_data:
         print("\nExisting data found. Would you like to use it or start fresh?")
         choice = input("Enter 'load' to use existing data or 'new' to enter new data: ").lower().strip()
         if choice == 'load':
             return user_data
-        
-    print("Smart Money Guide")
 
-    name = input("Enter your name: ").strip()
     salary = get_numeric_input("Enter your monthly gross salary (KES): ")
 
     expenses = {}
@@ -47,22 +68,18 @@ def collect_user_data():
     save_user_data(new_data) # Saves the newly entered data
     return new_data
 
-def load_user_data(filename="user_data.json"):
-    
-    if not os.path.exists(filename):
-        print(f"No existing user data found at {filename}.")
-        return None
+def load_user_data(user_id):
+    # One user's profile (see profile_store.user_id_for), or None
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        print(f"User data loaded successfully from {filename}")
-        return data
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from {filename}: {e}. File might be corrupted.")
-        return None
-    except IOError as e:
+        data = get_profile_store().get(user_id)
+    except (sqlite3.Error, json.JSONDecodeError) as e:
         print(f"Error loading data: {e}")
         return None
+    if data is None:
+        print("No existing user data found.")
+        return None
+    print(f"User data loaded successfully for {data.get('name', user_id)}")
+    return data
 
 def get_numeric_input(prompt, min_value=0):
    
@@ -76,13 +93,12 @@ def get_numeric_input(prompt, min_value=0):
         except ValueError:
             print("Invalid input. Please enter a number.")
 
-def save_user_data(data, filename="user_data.json"):
+def save_user_data(data, user_id=None):
     
     try:
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
-        print(f"User data saved successfully to {filename}")
-    except IOError as e:
+        get_profile_store().save(data, user_id)
+        print(f"User data saved successfully for {data.get('name', user_id)}")
+    except (sqlite3.Error, ValueError) as e:
         print(f"Error saving data: {e}")
 
 # def get_risk_tolerance():
@@ -0,0 +1,218 @@
+import random
+import threading
+import time
+from collections import namedtuple
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CONNECT_TIMEOUT = 3.05  # seconds to establish the TCP/TLS connection
+DEFAULT_READ_TIMEOUT = 5.0      # seconds between bytes from the server
+DEFAULT_RETRIES = 2             # extra attempts after the first one
+DEFAULT_BACKOFF = 0.25          # base delay before the first retry, doubles every retry
+DEFAULT_MAX_BACKOFF = 2.0
+DEFAULT_DEADLINE = 12.0         # hard cap on the whole fetch, retries included
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN_SECONDS = 60.0
+
+POOL_CONNECTIONS = 4   # distinct hosts kept in the pool
+POOL_MAXSIZE = 10      # keep-alive connections per host
+
+# `content` is None when the server answered 304 Not Modified. `etag` and
+# `last_modified` are the validators to send with the next request.
+FetchResult = namedtuple("FetchResult", ["content", "etag", "last_modified", "not_modified"])
+
+_shared_session = None
+_session_lock = threading.Lock()
+
+
+def get_shared_session():
+    # One pooled, keep-alive session per process, so repeated fetches (and every
+    # Streamlit session in the same server) reuse the TCP/TLS connection.
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _shared_session = session
+        return _shared_session
+
+
+class FetchError(Exception):
+    pass
+
+
+class CircuitOpenError(FetchError):
+    pass
+
+
+class CircuitBreaker:
+    """Fails fast after `failure_threshold` consecutive failed fetches.
+
+    While open, requests are refused until `cooldown_seconds` have passed. The
+    first request after that is let through as a trial: success closes the
+    breaker again, failure re-opens it for another cool-down.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown_seconds=DEFAULT_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self._state = self.HALF_OPEN
+                return True  # this caller makes the trial request
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class Fetcher:
+    """HTTP GET with connect/read timeouts, a retry budget, jittered backoff and a circuit breaker.
+
+    The whole call, retries and body download included, never takes longer than
+    `deadline` seconds. Requests go through the shared pooled session unless one
+    is passed in.
+    """
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 deadline=DEFAULT_DEADLINE, breaker=None, session=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.session = session
+
+    def get(self, url):
+        # Returns the response body as bytes, or raises FetchError
+        return self.get_conditional(url).content
+
+    def get_conditional(self, url, etag=None, last_modified=None):
+        # Sends If-None-Match / If-Modified-Since when validators are given and
+        # returns a FetchResult; raises FetchError
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit open for {url}; not retrying until the cool-down has passed.")
+
+        started = time.monotonic()
+        last_error = None
+        for attempt in range(self.retries + 1):
+            remaining = self.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            try:
+                result = self._get_once(url, headers, started)
+                self.breaker.record_success()
+                return result
+            except _PermanentError as e:
+                # 4xx: retrying won't help, but the upstream did answer, so it counts as healthy
+                self.breaker.record_success()
+                raise FetchError(str(e)) from None
+            except (requests.exceptions.RequestException, _RetryableError) as e:
+                last_error = e
+
+            if attempt < self.retries:
+                delay = self._backoff_delay(attempt)
+                if time.monotonic() - started + delay >= self.deadline:
+                    break
+                time.sleep(delay)
+
+        self.breaker.record_failure()
+        raise FetchError(f"Could not fetch {url}: {last_error or 'deadline exceeded'}")
+
+    def _get_once(self, url, headers, started):
+        remaining = self.deadline - (time.monotonic() - started)
+        timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+        session = self.session or get_shared_session()
+        with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if response.status_code == 304:
+                response.content  # drain the (empty) body so the connection goes back to the pool
+                # A 304 may omit the validators; the ones we sent are still current
+                return FetchResult(None, etag or headers.get("If-None-Match"),
+                                   last_modified or headers.get("If-Modified-Since"), True)
+            if response.status_code >= 500:
+                raise _RetryableError(f"{response.status_code} Server Error for url: {url}")
+            if response.status_code >= 400:
+                raise _PermanentError(f"{response.status_code} Client Error for url: {url}")
+
+            # The read timeout only bounds the gap between chunks, so a server that
+            # trickles bytes is cut off by the overall deadline instead. read1 returns
+            # whatever has arrived, so the deadline is checked after every read rather
+            # than once per filled 16 KiB chunk.
+            chunks = []
+            for chunk in _iter_available(response, 16 * 1024):
+                chunks.append(chunk)
+                if time.monotonic() - started > self.deadline:
+                    raise _RetryableError(f"Deadline of {self.deadline}s exceeded reading {url}")
+            return FetchResult(b"".join(chunks), etag, last_modified, False)
+
+    def _backoff_delay(self, attempt):
+        # "Full jitter": anywhere between 0 and the exponential cap
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+
+def _iter_available(response, chunk_size):
+    # Body chunks as they arrive, decoded. Falls back to iter_content on urllib3 < 2 (no read1).
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        yield from response.iter_content(chunk_size=chunk_size)
+        return
+    try:
+        while True:
+            chunk = read1(chunk_size, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.exceptions.ReadTimeout(e) from None
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        raise requests.exceptions.ConnectionError(e) from None
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class _PermanentError(Exception):
+    pass
@@ -1,7 +1,9 @@
 import streamlit as st
 import os
 import sys
+import time
 import pandas as pd
+from functools import singledispatch
 from io import BytesIO
 
 script_dir = os.path.dirname(__file__)
@@ -10,13 +12,25 @@ if script_dir not in sys.path:
 
 # Importing existing modules
 try:
-    # from data import save_user_data, load_user_data
-    from tax import calculate_net_income
-    from investment import suggest_investments, get_mmf_rates # get_mmf_rates is called by suggest_investments
+    import metrics
+    from data import get_profile_store
+    from profile_store import ProfileConflictError, user_id_for
+    from recalc import financial_plan
+    from investment import get_rate_snapshot, get_quote_snapshot, get_rate_history
+    from projection import project_schedules
+    from solvers import gross_for_net
+    from whatif import salary_curve
+    from simulation import DEFAULT_VOLATILITY, history_volatility, simulate_goal
+    from report_export import write_xlsx
+    from recommendations import ASSET_CLASS_LABELS
+    from records import ErrorNotice, FundSuggestion, Header, Highlight, InfoNotice, QuoteSuggestion, WarningNotice
 except ImportError as e:
     st.error(f"Error importing a module. Please ensure all files are in the same directory as this app. Details: {e}")
     st.stop() # Stop the app if modules can't be imported
 
+# Everything from here to the end of the script is one "render" span
+_rerun_started = time.perf_counter()
+
 # --- Streamlit Page Configuration ---
 st.set_page_config(
     page_title="The Smart Money Guide",
@@ -46,9 +60,25 @@ if 'financial_breakdown' not in st.session_state:
     st.session_state.financial_breakdown = None
 if 'investment_suggestions' not in st.session_state:
     st.session_state.investment_suggestions = []
+if 'excel_report_requested' not in st.session_state:
+    st.session_state.excel_report_requested = False
+if 'plan' not in st.session_state:
+    st.session_state.plan = financial_plan()
 
 USERNAME_INPUT_KEY = "user_name_input_sidebar" # Define the constant for the key
 
+# Rates are shared by every session on this server and re-read from the rate
+# provider at most this often
+RATES_CACHE_TTL_SECONDS = 5 * 60
+
+# Period of the rate trend shown under each suggested fund
+TREND_DAYS = 90
+
+RANKING_LABELS = {
+    "rate": "Highest rate",
+    "net_rate": "Highest rate net of fees",
+}
+
 # Initialize the specific widget keys if they're not already set by a previous run/load
 if USERNAME_INPUT_KEY not in st.session_state:
     st.session_state[USERNAME_INPUT_KEY] = st.session_state.user_data.get("name", "")
@@ -60,20 +90,82 @@ if 'savings_goal_amount_input' not in st.session_state:
 if 'savings_goal_timeframe_input' not in st.session_state:
     st.session_state.savings_goal_timeframe_input = st.session_state.user_data.get("savings_goals", {}).get("timeframe_months", 12)
 
+# --- Instrumentation (once per server process) ---
+
+@st.cache_resource(show_spinner=False)
+def start_instrumentation():
+    # Sampled, queued logging to app.log, plus /metrics on SMG_METRICS_PORT when it is set
+    logger = metrics.configure_logging()
+    port = os.environ.get("SMG_METRICS_PORT")
+    if port:
+        metrics.start_http_server(int(port))
+    return logger
+
+log = start_instrumentation()
+
+# --- Cached computations (shared across sessions, keyed on their inputs) ---
+
+@st.cache_data(ttl=RATES_CACHE_TTL_SECONDS, show_spinner=False)
+def load_rate_snapshot():
+    return get_rate_snapshot()
+
+@st.cache_data(ttl=RATES_CACHE_TTL_SECONDS, show_spinner=False)
+def load_quote_snapshot():
+    # T-bill, bond and fixed-deposit quotes, only fetched once someone asks to compare them
+    return get_quote_snapshot()
+
+@st.cache_data(ttl=RATES_CACHE_TTL_SECONDS, show_spinner=False)
+def load_rate_trends(days=TREND_DAYS):
+    # fund name -> (first, latest, change, volatility) from the recorded rate history
+    try:
+        return get_rate_history().trends(days)
+    except Exception:
+        return {}
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_simulation(monthly_deposit, months, goal_amount, annual_rate, volatility):
+    # Fixed seed, so the same inputs always show the same figures
+    return simulate_goal(monthly_deposit, months, goal_amount, annual_rate, volatility=volatility, seed=0)
+
+def update_plan_st(user_data):
+    # Feeds the inputs to this session's recalculation graph (recalc.py), which
+    # only recomputes what they affect, and stores the results for display
+    savings_goals = user_data["savings_goals"]
+    rates = load_rate_snapshot()
+    quotes = load_quote_snapshot() if st.session_state.get("compare_assets_input") else None
+    plan = st.session_state.plan
+    plan.update(
+        gross_salary=user_data["monthly_gross_salary"],
+        fixed_expenses=user_data["fixed_monthly_expenses"],
+        savings_goal_amount=savings_goals.get("target_amount", 0),
+        savings_goal_timeframe_months=savings_goals.get("timeframe_months", 1),
+        ranking_key=st.session_state.get("ranking_key_input", "rate"),
+        rates=rates,
+        other_quotes=quotes.rates if quotes else None
+    )
+    financial_breakdown = plan.get("breakdown")
+    investment_suggestions = plan.get("suggestions")
+    if investment_suggestions is not st.session_state.investment_suggestions:
+        st.session_state.excel_report_requested = False  # new figures need a new report
+    st.session_state.user_data = user_data
+    st.session_state.financial_breakdown = financial_breakdown
+    st.session_state.investment_suggestions = investment_suggestions
+
 # --- Helper Functions for Streamlit UI ---
 
-def get_inputs_from_ui():
+def get_inputs_from_ui(report_errors=True):
+    error = st.error if report_errors else (lambda message: None)
     user_name = st.session_state.get(USERNAME_INPUT_KEY, "").strip()
 
     if not user_name:
-        st.error("Please enter your name.")
+        error("Please enter your name.")
         return None
 
     try:
         salary = float(st.session_state.salary_input)
         if salary < 0: raise ValueError("Salary cannot be negative.")
     except (ValueError, KeyError):
-        st.error("Please enter a valid number for Monthly Gross Salary.")
+        error("Please enter a valid number for Monthly Gross Salary.")
         return None
 
     expenses = {}
@@ -83,28 +175,28 @@ def get_inputs_from_ui():
         category = st.session_state[category_key].strip()
         
         if not category:
-            st.error(f"Expense category for row {i+1} cannot be empty.")
+            error(f"Expense category for row {i+1} cannot be empty.")
             return None
         try:
             amount = float(st.session_state[amount_key])
             if amount < 0: raise ValueError("Expense amount cannot be negative.")
             expenses[category] = amount
         except (ValueError, KeyError):
-            st.error(f"Please enter a valid number for expense '{category}' (row {i+1}).")
+            error(f"Please enter a valid number for expense '{category}' (row {i+1}).")
             return None
 
     try:
         savings_goal_amount = float(st.session_state.savings_goal_amount_input)
         if savings_goal_amount < 0: raise ValueError("Savings goal cannot be negative.")
     except (ValueError, KeyError):
-        st.error("Please enter a valid number for Target Investment Goal.") # Changed from Savings to Investment
+        error("Please enter a valid number for Target Investment Goal.") # Changed from Savings to Investment
         return None
     
     try:
         savings_goal_timeframe_months = int(st.session_state.savings_goal_timeframe_input)
         if savings_goal_timeframe_months < 1: raise ValueError("Timeframe must be at least 1 month.")
     except (ValueError, KeyError):
-        st.error("Please enter a valid whole number (months) for Timeframe.")
+        error("Please enter a valid whole number (months) for Timeframe.")
         return None
 
     return {
@@ -127,16 +219,19 @@ def set_inputs_to_ui(data):
     # Clear and re-populate expense rows in session state
     st.session_state.expense_rows = []
     fixed_expenses_loaded = data.get("fixed_monthly_expenses", {})
-    for category, amount in fixed_expenses_loaded.items():
-        st.session_state.expense_rows.append({"category": category, "amount": amount})
+    for i, (category, amount) in enumerate(fixed_expenses_loaded.items()):
+        st.session_state.expense_rows.append({"category": category, "amount": float(amount)})
+        # The row widgets are keyed, so their state has to be set too
+        st.session_state[f"expense_category_{i}"] = category
+        st.session_state[f"expense_amount_{i}"] = float(amount)
     
     # Ensure at least one blank row if no expenses are loaded
     if not st.session_state.expense_rows:
         st.session_state.expense_rows.append({"category": "", "amount": 0.0})
 
     savings_goals = data.get("savings_goals", {})
-    st.session_state.savings_goal_amount_input = savings_goals.get("target_amount", 0.0)
-    st.session_state.savings_goal_timeframe_input = savings_goals.get("timeframe_months", 12)
+    st.session_state.savings_goal_amount_input = float(savings_goals.get("target_amount", 0.0))
+    st.session_state.savings_goal_timeframe_input = int(savings_goals.get("timeframe_months", 12))
     st.session_state.risk_tolerance_radio = data.get("risk_tolerance", "low") # Populate risk tolerance
 
 def add_expense_row_st():
@@ -148,129 +243,180 @@ def remove_expense_row_st(index):
     else:
         st.warning("Cannot remove the last expense row.")
 
-def calculate_and_suggest_st():
-   
-    st.session_state.user_data = get_inputs_from_ui()
-    if not st.session_state.user_data: # If input validation failed
+def save_profile_st():
+    user_data = get_inputs_from_ui()
+    if not user_data:
         return
-
-    gross_salary = st.session_state.user_data["monthly_gross_salary"]
-    fixed_expenses = st.session_state.user_data["fixed_monthly_expenses"]
-    savings_goals = st.session_state.user_data["savings_goals"]
-
+    user_id = user_id_for(user_data)
+    # The version this session loaded, or 0 (not saved yet) for any other
+    # profile, so a save never replaces one this session hasn't loaded
+    loaded = st.session_state.get("loaded_profile")
+    expected_version = loaded[1] if loaded and loaded[0] == user_id else 0
     try:
-        financial_breakdown = calculate_net_income(gross_salary, fixed_expenses)
-        st.session_state.financial_breakdown = financial_breakdown # Store in session state
+        version = get_profile_store().save(user_data, user_id, expected_version)
+    except ProfileConflictError:
+        if expected_version:
+            st.error("This profile was changed in another session. Load it again before saving.")
+        else:
+            st.error(f"A profile for {user_data['name']} is already saved. Load it before saving over it.")
+        return
     except Exception as e:
-        st.error(f"An error occurred during financial calculation: {e}")
-        st.session_state.financial_breakdown = None
+        st.error(f"Could not save your profile: {e}")
         return
+    st.session_state.loaded_profile = (user_id, version)
+    st.success(f"Profile saved for {user_data['name']}.")
 
+def load_profile_st():
+    user_name = st.session_state.get(USERNAME_INPUT_KEY, "").strip()
+    if not user_name:
+        st.error("Enter your name to load a saved profile.")
+        return
+    user_id = user_id_for({"name": user_name})
     try:
-       
-        investment_suggestions = suggest_investments(
-        remaining_funds=financial_breakdown['remaining_for_savings_investment'],
-        savings_goal_amount=savings_goals.get("target_amount", 0),
-        savings_goal_timeframe_months=savings_goals.get("timeframe_months", 1)
-        )
+        data, version = get_profile_store().get_with_version(user_id)
+    except Exception as e:
+        st.error(f"Could not load your profile: {e}")
+        return
+    if data is None:
+        st.warning(f"No saved profile found for {user_name}.")
+        return
+    set_inputs_to_ui(data)
+    st.session_state.user_data = data
+    st.session_state.loaded_profile = (user_id, version)
+    st.success(f"Loaded the saved profile for {data.get('name', user_name)}.")
+
+@metrics.span("calculate")
+def calculate_and_suggest_st():
+   
+    user_data = get_inputs_from_ui()
+    if not user_data: # If input validation failed
+        return
 
-        st.session_state.investment_suggestions = investment_suggestions # Store in session state
+    try:
+        update_plan_st(user_data)
     except Exception as e:
-        st.error(f"An error occurred while getting investment suggestions: {e}")
+        log.exception("Calculation failed")
+        st.error(f"An error occurred while calculating your breakdown and suggestions: {e}")
+        st.session_state.financial_breakdown = None
         st.session_state.investment_suggestions = []
         return
-    
+
+    # From now on every edit updates the figures straight away (see refresh_plan_st)
+    st.session_state.live_updates = True
     st.success("Calculations complete! See your breakdown below.")
 
-def suggest_best_mmf(top_mmfs):
-    if not top_mmfs:
-        return {"type": "error", "message": "No MMF data available to make a recommendation."}
-    best = top_mmfs[0]
-    return {
-        "type": "highlight",
-        "message": (
-            f"✅ **Top Recommendation:** {best['name']} "
-            f"with an annual rate of **{best['rate'] * 100:.2f}%**.\n\n"
-            f"You'll earn approximately **KES {best['interest_earned']:,.2f}** "
-            f"in interest over your savings period, bringing your total to "
-            f"**KES {best['projected_return']:,.2f}**."
-        ),
-        # "url": best.get("url", "#")
-    }
+def refresh_plan_st():
+    # After the first calculation, keep the figures in step with the inputs on
+    # every rerun. Incomplete inputs are skipped quietly; the button reports them.
+    user_data = get_inputs_from_ui(report_errors=False)
+    if not user_data:
+        return
+    try:
+        with metrics.span("recalculate"):
+            update_plan_st(user_data)
+    except Exception:
+        log.exception("Live recalculation failed")
+
+# One renderer per suggestion record (records.py); `rate_trends` and `timeframe` are for funds
+@singledispatch
+def render_suggestion(suggestion, rate_trends, timeframe):
+    if isinstance(suggestion, str): # Handle old string-based suggestions if any
+        if suggestion.startswith("--- DISCLAIMER ---"):
+            st.warning(suggestion)
+        else:
+            st.markdown(suggestion)
+
+@render_suggestion.register
+def _(suggestion: Header, rate_trends, timeframe):
+    st.subheader(suggestion.message)
+
+@render_suggestion.register
+def _(suggestion: InfoNotice, rate_trends, timeframe):
+    st.info(suggestion.message)
+
+@render_suggestion.register
+def _(suggestion: WarningNotice, rate_trends, timeframe):
+    st.warning(suggestion.message)
+
+@render_suggestion.register
+def _(suggestion: ErrorNotice, rate_trends, timeframe):
+    st.error(suggestion.message)
+
+@render_suggestion.register
+def _(suggestion: FundSuggestion, rate_trends, timeframe):
+    st.markdown(f"### 💼 {suggestion.name}")
+    st.write(f"**Annual Rate:** {suggestion.rate:.2f}%")
+    trend = rate_trends.get(suggestion.name)
+    if trend:
+        st.caption(f"{TREND_DAYS}-day trend: {trend[2]:+.2f} pp (from {trend[0]:.2f}%)")
+    st.write(f"**Total Deposits (Over {timeframe} months):** KES {suggestion.total_deposits:,.2f}")
+    st.write(f"**Interest Earned:** KES {suggestion.interest_earned:,.2f}")
+    st.success(f"**Total Projected Return:** KES {suggestion.projected_return:,.2f}")
+
+@render_suggestion.register
+def _(suggestion: QuoteSuggestion, rate_trends, timeframe):
+    label = ASSET_CLASS_LABELS.get(suggestion.asset_class, suggestion.asset_class)
+    term = f", {suggestion.term_months}-month term" if suggestion.term_months else ""
+    st.markdown(f"**{suggestion.name}** ({label}{term})")
+    st.write(f"**Annual Rate:** {suggestion.rate:.2f}% · **Projected Return:** KES {suggestion.projected_return:,.2f}")
+
+@render_suggestion.register
+def _(suggestion: Highlight, rate_trends, timeframe):
+    st.success(suggestion.message)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def build_salary_curve_tables(low, high, total_fixed_expenses):
+    # (amounts, rates) DataFrames indexed by gross salary, from the exact what-if curve
+    curve = salary_curve(low, high, total_fixed_expenses)
+    sample = curve.sample()
+    index = pd.Index(sample.gross_salary, name="Gross salary (KES)")
+    amounts = pd.DataFrame({
+        "Net salary": sample.net_salary_after_tax,
+        "Statutory deductions": sample.total_statutory_deductions,
+        "Remaining after expenses": sample.remaining_for_savings_investment,
+    }, index=index)
+    rates = pd.DataFrame({
+        "Marginal rate (%)": sample.marginal_rate * 100,
+        "Effective rate (%)": sample.effective_rate * 100,
+    }, index=index)
+    return amounts, rates
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def build_projection_table(investment_suggestions, user_data):
+    # Month-by-month balance of every suggested MMF, one column per fund
+    mmfs = [s for s in investment_suggestions if isinstance(s, FundSuggestion)]
+    savings_goals = user_data.get("savings_goals", {}) if user_data else {}
+    months = int(savings_goals.get("timeframe_months", 0) or 0)
+    if not mmfs or months < 1:
+        return None
+
+    monthly_deposit = savings_goals.get("target_amount", 0) / months
+    schedule = project_schedules([m.rate / 100 for m in mmfs], monthly_deposit, months)
+
+    table = pd.DataFrame({"Month": schedule["month"], "Total Deposits (KES)": schedule["total_deposits"]})
+    for i, mmf in enumerate(mmfs):
+        table[f"{mmf.name} (KES)"] = schedule["balance"][i]
+    return table.set_index("Month")
 
 def generate_excel_report(financial_breakdown, investment_suggestions, user_data):
     if not financial_breakdown:
         return None
 
-    # Prepare data for financial breakdown
-    breakdown_data = {
-        "Category": [
-            "Gross Salary",
-            "PAYE Tax",
-            "SHA Deduction", 
-            "NSSF Deduction",
-            "Total Statutory Deductions",
-            "Net Salary (After Tax & Deductions)",
-            "Total Fixed Expenses",
-            "Remaining for Savings & Investment"
-        ],
-        "Amount (KES)": [
-            financial_breakdown['gross_salary'],
-            financial_breakdown['paye_tax'],
-            financial_breakdown.get("sha_deduction", 0),
-            financial_breakdown['nssf_deduction'],
-            financial_breakdown['total_statutory_deductions'],
-            financial_breakdown['net_salary_after_tax'],
-            financial_breakdown['total_fixed_expenses'],
-            financial_breakdown['remaining_for_savings_investment']
-        ]
-    }
-
-    # Add detailed fixed expenses
-    for category, amount in user_data.get("fixed_monthly_expenses", {}).items():
-        breakdown_data["Category"].insert(6, f"  - {category} (Fixed Expense)")
-        breakdown_data["Amount (KES)"].insert(6, amount)
-
-    df_breakdown = pd.DataFrame(breakdown_data)
-
-    # Prepare data for investment suggestions
-    suggestion_texts = []
-
-    for suggestion in investment_suggestions:
-        if suggestion["type"] == "header":
-            suggestion_texts.append(f"== {suggestion['message']} ==")
-        elif suggestion["type"] == "info":
-            suggestion_texts.append(f"[INFO] {suggestion['message']}")
-        elif suggestion["type"] == "warning":
-            suggestion_texts.append(f"[WARNING] {suggestion['message']}")
-        elif suggestion["type"] == "error":
-            suggestion_texts.append(f"[ERROR] {suggestion['message']}")
-        elif suggestion["type"] == "mmf":
-            suggestion_texts.append(
-                f"{suggestion['name']} - Rate: {suggestion['rate']*100:.2f}%, "
-                f"Projected Return: KES {suggestion['projected_return']:,.2f}"
-            )
-        elif suggestion["type"] == "highlight":
-            suggestion_texts.append(f"💡 {suggestion['message']}")
-
-    # ✅ Move this outside the loop to always define it
-    df_suggestions = pd.DataFrame({"Investment Suggestions": suggestion_texts})
-
     # Create an in-memory Excel file
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        start_row_breakdown = 0
-        if user_data.get("name"):
-            df_name = pd.DataFrame([{"Report for": f"Report for: {user_data['name']}"}])
-            df_name.to_excel(writer, sheet_name='Financial Breakdown', index=False, header=False, startrow=0)
-            start_row_breakdown = 2
-
-        df_breakdown.to_excel(writer, sheet_name='Financial Breakdown', index=False, startrow=start_row_breakdown)
-        df_suggestions.to_excel(writer, sheet_name='Investment Suggestions', index=False)
-
+    write_xlsx(output, financial_breakdown, investment_suggestions, user_data)
     output.seek(0)
     return output
 
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_excel_report(financial_breakdown, investment_suggestions, user_data):
+    # Built only once the user asks for it, then reused for identical inputs
+    output = generate_excel_report(financial_breakdown, investment_suggestions, user_data)
+    return output.getvalue() if output else None
+
+def request_excel_report_st():
+    st.session_state.excel_report_requested = True
+
 
 # Streamlit UI Layout 
 
@@ -324,15 +470,30 @@ with st.sidebar:
         key="savings_goal_timeframe_input",
         format="%d"
     )
+    st.selectbox(
+        "Rank funds by:",
+        options=list(RANKING_LABELS),
+        format_func=RANKING_LABELS.get,
+        key="ranking_key_input"
+    )
+    st.checkbox("Also compare T-bills, bonds and fixed deposits", key="compare_assets_input")
 
     st.markdown("---")
     st.button("Calculate & Get Suggestions", on_click=calculate_and_suggest_st, type="primary")
+    cols = st.columns(2)
+    with cols[0]:
+        st.button("Save Profile", on_click=save_profile_st)
+    with cols[1]:
+        st.button("Load Saved Profile", on_click=load_profile_st)
 
     st.title("Link to the mmf website")
     st.sidebar.markdown("https://money.ke/mmf-rates/")
 
 
 # Main Area
+if st.session_state.get("live_updates"):
+    refresh_plan_st()
+
 st.header("Your Financial Breakdown & Investment Suggestions")
 
 if 'user_data' in st.session_state and st.session_state.user_data.get("name"):
@@ -341,13 +502,13 @@ if 'user_data' in st.session_state and st.session_state.user_data.get("name"):
 if 'financial_breakdown' in st.session_state and st.session_state.financial_breakdown:
     financial_breakdown = st.session_state.financial_breakdown
     st.subheader("Monthly Financial Breakdown")
-    st.write(f"**Gross Salary:** KES {financial_breakdown['gross_salary']:,.2f}")
-    st.write(f"**PAYE Tax:** KES {financial_breakdown['paye_tax']:,.2f}")
-    st.write(f"**SHA Deduction:** KES {financial_breakdown.get('sha_deduction', 0):,.2f}") # Use .get for safety
-    st.write(f"**NSSF Deduction:** KES {financial_breakdown['nssf_deduction']:,.2f}")
-    st.write(f"**Total Statutory Deductions:** KES {financial_breakdown['total_statutory_deductions']:,.2f}")
+    st.write(f"**Gross Salary:** KES {financial_breakdown.gross_salary:,.2f}")
+    st.write(f"**PAYE Tax:** KES {financial_breakdown.paye_tax:,.2f}")
+    st.write(f"**SHA Deduction:** KES {financial_breakdown.sha_deduction:,.2f}")
+    st.write(f"**NSSF Deduction:** KES {financial_breakdown.nssf_deduction:,.2f}")
+    st.write(f"**Total Statutory Deductions:** KES {financial_breakdown.total_statutory_deductions:,.2f}")
     st.write(f"---")
-    st.write(f"**Net Salary (After Tax & Deductions):** KES {financial_breakdown['net_salary_after_tax']:,.2f}")
+    st.write(f"**Net Salary (After Tax & Deductions):** KES {financial_breakdown.net_salary_after_tax:,.2f}")
     
     st.subheader("Fixed Expenses")
     fixed_expenses_display = ""
@@ -355,21 +516,55 @@ if 'financial_breakdown' in st.session_state and st.session_state.financial_brea
     for category, amount in st.session_state.user_data.get("fixed_monthly_expenses", {}).items():
         fixed_expenses_display += f"- {category}: KES {amount:,.2f}\n"
     st.markdown(fixed_expenses_display)
-    st.write(f"**Total Fixed Expenses:** KES {financial_breakdown['total_fixed_expenses']:,.2f}")
+    st.write(f"**Total Fixed Expenses:** KES {financial_breakdown.total_fixed_expenses:,.2f}")
 
     st.markdown("---")
-    st.success(f"**Remaining for Savings & Investment:** KES {financial_breakdown['remaining_for_savings_investment']:,.2f}")
+    st.success(f"**Remaining for Savings & Investment:** KES {financial_breakdown.remaining_for_savings_investment:,.2f}")
+
+    with st.expander("Salary negotiation: what gross salary pays a given net?"):
+        target_net = st.slider(
+            "Target net salary (KES):",
+            min_value=0,
+            max_value=max(1_000_000, int(financial_breakdown.net_salary_after_tax * 2)),
+            value=int(financial_breakdown.net_salary_after_tax),
+            step=1000,
+            key="target_net_input"
+        )
+        required_gross = gross_for_net(target_net)
+        st.metric("Gross salary needed", f"KES {required_gross:,.2f}",
+                  delta=f"{required_gross - financial_breakdown.gross_salary:+,.2f} vs now", delta_color="off")
+
+    with st.expander("What-if: net pay across a range of gross salaries"):
+        current_gross = int(financial_breakdown.gross_salary)
+        low, high = st.slider(
+            "Gross salary range (KES):",
+            min_value=0,
+            max_value=max(1_000_000, current_gross * 3 + 1000),
+            value=(current_gross // 2, current_gross * 3 // 2 + 1000),
+            step=1000,
+            key="whatif_range_input"
+        )
+        amounts, rates = build_salary_curve_tables(low, high, financial_breakdown.total_fixed_expenses)
+        st.line_chart(amounts)
+        st.line_chart(rates)
+        now = salary_curve(current_gross, current_gross).evaluate([financial_breakdown.gross_salary])
+        cols = st.columns(2)
+        cols[0].metric("Marginal rate at your salary", f"{now.marginal_rate[0]:.1%}")
+        cols[1].metric("Effective rate at your salary", f"{now.effective_rate[0]:.1%}")
 
     #  Download Excel Report Button 
-    excel_data = generate_excel_report(
-        st.session_state.financial_breakdown,
-        st.session_state.investment_suggestions,
-        st.session_state.user_data
-    )
-    
+    st.markdown("### 📥 Download Your Full Report as Excel")
+    excel_data = None
+    if st.session_state.excel_report_requested:
+        excel_data = cached_excel_report(
+            st.session_state.financial_breakdown,
+            st.session_state.investment_suggestions,
+            st.session_state.user_data
+        )
+    else:
+        st.button("📄 Prepare Excel Report", on_click=request_excel_report_st, key="prepare_excel_report")
 
     if excel_data:
-        st.markdown("### 📥 Download Your Full Report as Excel")
         st.download_button(
             label="📊 Download Excel Report",
             data=excel_data,
@@ -380,30 +575,33 @@ if 'financial_breakdown' in st.session_state and st.session_state.financial_brea
 
 if 'investment_suggestions' in st.session_state and st.session_state.investment_suggestions:
     st.subheader("Investment Suggestions")
-    # Iterate through suggestions and display based on their 'type'
+    rate_trends = load_rate_trends()
+    timeframe = st.session_state.user_data.get("savings_goals", {}).get("timeframe_months", 12)
     for suggestion in st.session_state.investment_suggestions:
-        if isinstance(suggestion, str): # Handle old string-based suggestions if any
-            if suggestion.startswith("--- DISCLAIMER ---"):
-                st.warning(suggestion)
-            else:
-                st.markdown(suggestion)
-        elif isinstance(suggestion, dict): # Handle dictionary-based suggestions
-            if suggestion.get("type") == "header":
-                st.subheader(suggestion["message"])
-            elif suggestion.get("type") == "info":
-                st.info(suggestion["message"])
-            elif suggestion.get("type") == "warning":
-                st.warning(suggestion["message"])
-            elif suggestion.get("type") == "error":
-                st.error(suggestion["message"])
-            elif suggestion.get("type") == "mmf":
-                st.markdown(f"### 💼 {suggestion['name']}")
-                st.write(f"**Annual Rate:** {suggestion['rate']:.2f}%")
-                timeframe = st.session_state.user_data.get("savings_goals", {}).get("timeframe_months", 12)
-                st.write(f"**Total Deposits (Over {timeframe} months):** KES {suggestion['total_deposits']:,.2f}")
-                st.write(f"**Interest Earned:** KES {suggestion['interest_earned']:,.2f}")
-                st.success(f"**Total Projected Return:** KES {suggestion['projected_return']:,.2f}")
-                # if suggestion.get("url"):
-                #     st.markdown(f"[👉 Visit Website]({suggestion['url']})", unsafe_allow_html=True)
-            elif suggestion.get("type") == "highlight":
-                st.success(suggestion["message"])
\ No newline at end of file
+        render_suggestion(suggestion, rate_trends, timeframe)
+
+    projection_table = build_projection_table(st.session_state.investment_suggestions, st.session_state.user_data)
+    if projection_table is not None:
+        st.subheader("Projected Growth")
+        st.line_chart(projection_table)
+        with st.expander("Month-by-month table"):
+            st.dataframe(projection_table.style.format("{:,.2f}"))
+
+    top_mmf = next((s for s in st.session_state.investment_suggestions if isinstance(s, FundSuggestion)), None)
+    savings_goals = st.session_state.user_data.get("savings_goals", {})
+    goal_amount = savings_goals.get("target_amount", 0)
+    goal_months = int(savings_goals.get("timeframe_months", 0) or 0)
+    if top_mmf and goal_amount > 0 and goal_months >= 1:
+        if st.checkbox(f"Simulate drifting rates for {top_mmf.name}", key="simulate_input"):
+            trend = rate_trends.get(top_mmf.name)
+            volatility = history_volatility(trend[3]) if trend and trend[3] else DEFAULT_VOLATILITY
+            simulation = cached_simulation(goal_amount / goal_months, goal_months, goal_amount, top_mmf.rate / 100, volatility)
+            st.write(f"Across {simulation['n_paths']:,} simulated rate paths "
+                     f"(volatility {volatility * 100:.2f} pp a year, drifting back towards today's rate):")
+            cols = st.columns(4)
+            cols[0].metric("Chance of reaching your goal", f"{simulation['probability']:.0%}")
+            cols[1].metric("Pessimistic (P10)", f"KES {simulation['p10']:,.0f}")
+            cols[2].metric("Median (P50)", f"KES {simulation['p50']:,.0f}")
+            cols[3].metric("Optimistic (P90)", f"KES {simulation['p90']:,.0f}")
+
+metrics.observe_phase("render", time.perf_counter() - _rerun_started)
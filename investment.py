@@ -1,38 +1,167 @@
+import os
+import sys
+import threading
+from datetime import datetime
+import metrics
+from mmf_parser import MMFRate, parse_mmf_rates
+from rate_provider import RateProvider, RateSnapshot
+from ranking import LiveRanking, top_k
+from recommendations import suggest_best_mmf
+from records import ErrorNotice, FundSuggestion, Header, InfoNotice, QuoteSuggestion, WarningNotice
+from solvers import required_monthly_deposit
 
-import requests
-from bs4 import BeautifulSoup
+# SMG_MMF_URL lets tests and local runs point at stub_server.py instead of the real site
+MMF_RATES_URL = os.environ.get("SMG_MMF_URL", "https://money.ke/mmf-rates/")
+
+# Timeouts, retries and the circuit breaker bound how long a scrape can block a caller.
+# Created on first use so that importing this module doesn't pull in requests.
+_mmf_fetcher = None
+_mmf_fetcher_lock = threading.Lock()
+
+def get_mmf_fetcher():
+    global _mmf_fetcher
+    with _mmf_fetcher_lock:
+        if _mmf_fetcher is None:
+            from fetch import Fetcher
+            _mmf_fetcher = Fetcher()
+        return _mmf_fetcher
+
+def _forget_fetchers():
+    # A forked process (service.py workers) must not reuse the parent's pooled connections
+    global _mmf_fetcher, _mmf_fetcher_lock, _quote_sources, _quote_sources_lock
+    _mmf_fetcher = None
+    _mmf_fetcher_lock = threading.Lock()
+    _quote_sources = None
+    _quote_sources_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_fetchers)
+
+def scrape_mmf_rates(validators=None, url=MMF_RATES_URL, fetcher=None):
+    # Returns (rates, validators); rates is None when money.ke answers 304 Not Modified.
+    # Raises on network or parse errors so the rate provider can keep its last good rates
+    # Progress goes to stderr, never into a caller's output (batch.py writes JSON Lines to stdout)
+    fetcher = fetcher or get_mmf_fetcher()
+    validators = validators or {}
+    print(f"Attempting to scrape MMF rates from {url}...", file=sys.stderr)
+    try:
+        with metrics.span("fetch"):
+            result = fetcher.get_conditional(url, validators.get("etag"), validators.get("last_modified"))
+    except Exception:
+        metrics.inc("smg_rate_fetches_total", source="mmf", result="error")
+        raise
+    new_validators = {"etag": result.etag, "last_modified": result.last_modified}
+    if result.not_modified:
+        metrics.inc("smg_rate_fetches_total", source="mmf", result="not_modified")
+        return None, new_validators
+
+    with metrics.span("parse"):
+        mmf_rates = parse_mmf_rates(result.content)
+    metrics.inc("smg_rate_fetches_total", source="mmf", result="ok")
+    return mmf_rates, new_validators
+
+# Every newly fetched rate table is also appended to the rate history (rate_history.py)
+_rate_history = None
+_rate_history_lock = threading.Lock()
+
+def get_rate_history():
+    global _rate_history
+    with _rate_history_lock:
+        if _rate_history is None:
+            from rate_history import RateHistory
+            _rate_history = RateHistory()
+        return _rate_history
+
+def record_rate_history(rates, fetched_at):
+    get_rate_history().append(rates, fetched_at)
+
+# Shared by every caller in this process (CLI run, Streamlit sessions)
+rate_provider = RateProvider(scrape_mmf_rates, MMFRate, on_refresh=record_rate_history)
+
+# With SMG_SHARED_RATES set, rates come from the table rate_refresher.py publishes
+# there, and this process never fetches them itself
+SHARED_RATES_PATH = os.environ.get("SMG_SHARED_RATES")
+
+_shared_rate_table = None
+_shared_rate_table_lock = threading.Lock()
+
+def get_shared_rate_table():
+    global _shared_rate_table
+    with _shared_rate_table_lock:
+        if _shared_rate_table is None:
+            from rate_refresher import SharedRateTable
+            _shared_rate_table = SharedRateTable(SHARED_RATES_PATH)
+        return _shared_rate_table
 
 def get_mmf_rates():
-    
-    mmf_rates = []
-    url = "https://money.ke/mmf-rates/" 
+    # List of MMFRate(name, rate) with the rate in percent; empty if rates are unavailable
+    return get_rate_snapshot().rates
+
+# Ranking by rate, kept up to date incrementally as refreshed rate tables come in
+live_ranking = LiveRanking("rate")
+
+def get_rate_snapshot():
+    # Like get_mmf_rates, but also says when the rates were fetched and whether they are stale
+    try:
+        snapshot = get_shared_rate_table().get_snapshot() if SHARED_RATES_PATH else rate_provider.get_snapshot()
+    except Exception as e:
+        print(f"An unexpected error occurred during MMF scraping: {e}", file=sys.stderr)
+        snapshot = None
+
+    if not snapshot or not snapshot.rates:
+        return RateSnapshot([], 0.0, True)
+    return snapshot
+
+# T-bill, bond and fixed-deposit quotes (rate_sources.py), fetched concurrently
+# and cached like the MMF rates. Created on first use: most callers only need MMFs.
+QUOTES_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quote_rates_cache.json")
 
+_quote_provider = None
+_quote_provider_lock = threading.Lock()
+
+# Built once, so each source's circuit breaker counts failures across refreshes
+_quote_sources = None
+_quote_sources_lock = threading.Lock()
+
+def get_quote_sources():
+    global _quote_sources
+    with _quote_sources_lock:
+        if _quote_sources is None:
+            from rate_sources import default_sources
+            _quote_sources = default_sources(include_mmf=False)
+        return _quote_sources
+
+def fetch_other_quotes(validators=None):
+    # RateProvider fetch function. Sources that fail are reported and skipped;
+    # it only raises when every source failed, so the last good quotes are kept.
+    from rate_sources import fetch_quotes
+    table = fetch_quotes(get_quote_sources())
+    for source, error in table.errors.items():
+        print(f"Could not fetch {source} rates: {error}", file=sys.stderr)
+    if not table.quotes:
+        raise RuntimeError("No rate source returned any quotes.")
+    return table.quotes, {}
+
+def get_quote_provider():
+    global _quote_provider
+    with _quote_provider_lock:
+        if _quote_provider is None:
+            from rate_sources import RateQuote
+            _quote_provider = RateProvider(fetch_other_quotes, RateQuote, snapshot_path=QUOTES_SNAPSHOT_PATH,
+                                           label="T-bill, bond and deposit rates")
+        return _quote_provider
+
+def get_quote_snapshot():
+    # RateSnapshot of RateQuotes for the non-MMF asset classes; empty if none are available
     try:
-        response = requests.get(url) 
-        response.raise_for_status() 
-
-        soup = BeautifulSoup(response.content, "html.parser")
-        rows = soup.find_all("tr")
-
-        for row in rows:
-            columns = row.find_all("td")
-            if len(columns) >= 3:
-                name = columns[0].text.strip()  
-                rate = columns[2].text.strip()  
-                mmf_rates.append({"name": name, "rate": rate})
-
-      
-        print(f"Attempting to scrape MMF rates from {url}...")
-        
-
-    except requests.exceptions.RequestException as e:
-        print(f"Network or request error retrieving MMF rates: {e}")
-        mmf_rates = [{"name": "Error", "rate": f"Could not fetch MMF rates: {e}"}]
+        snapshot = get_quote_provider().get_snapshot()
     except Exception as e:
-        print(f"An unexpected error occurred during MMF scraping: {e}")
-        mmf_rates = [{"name": "Error", "rate": f"Could not fetch MMF rates: {e}"}]
-    
-    return mmf_rates
+        print(f"An unexpected error occurred while fetching T-bill, bond and deposit rates: {e}", file=sys.stderr)
+        snapshot = None
+
+    if not snapshot or not snapshot.rates:
+        return RateSnapshot([], 0.0, True)
+    return snapshot
 
 def calculate_mmf_return(monthly_deposit, annual_rate, months):
     r = annual_rate / 12  # Monthly rate
@@ -55,74 +184,126 @@ def calculate_mmf_return(monthly_deposit, annual_rate, months):
     }
 
 
-def suggest_investments(remaining_funds, savings_goal_amount=0, savings_goal_timeframe_months=1):
-    results = []
+def rank_mmfs(mmfs, k=5, ranking_key="rate"):
+    # Best k funds without projecting any of them first
+    if ranking_key == "rate":
+        return live_ranking.update_and_top(mmfs, k)
+    return top_k(mmfs, k, ranking_key)
 
-    if remaining_funds <= 0:
-        return [{"type": "warning", "message": "No funds available for investment after expenses."}]
-
-    # Calculate user's monthly deposit capacity
-    monthly_deposit = savings_goal_amount / savings_goal_timeframe_months if savings_goal_timeframe_months > 0 else 0
-
-    # Progress on savings goal
-    if savings_goal_amount > 0 and savings_goal_timeframe_months > 0:
-        if remaining_funds >= monthly_deposit:
-            results.append({
-                "type": "info",
-                "message": f"To reach your goal of KES {savings_goal_amount:,.2f} in {savings_goal_timeframe_months} months, you're on track by saving KES {monthly_deposit:,.2f} per month."
-            })
-        else:
-            gap = monthly_deposit - remaining_funds
-            results.append({
-                "type": "warning",
-                "message": f"You need to invest KES {monthly_deposit:,.2f} per month, but you're short by KES {gap:,.2f}."
-            })
-
-    # MMF Investment Suggestions
-    mmfs = get_mmf_rates()
-    top_mmfs = []
+def rank_across_assets(mmfs, other_quotes, monthly_deposit, months, k=5, ranking_key="rate"):
+    # MMFs and other RateQuotes ranked together. Every option is projected the
+    # same way as an MMF (monthly deposits compounding at the quoted rate), so
+    # the figures for T-bills, bonds and fixed deposits are indicative. Options
+    # locked in for longer than `months` are left out: the money wouldn't be
+    # available when the goal falls due.
+    from rate_sources import RateQuote
+    candidates = [RateQuote("mmf", m.name, m.rate, "money.ke", m.fee, m.min_deposit) for m in mmfs]
+    candidates.extend(q for q in other_quotes if q.term_months is None or q.term_months <= months)
+
+    ranked = []
+    for quote in top_k(candidates, k, ranking_key):
+        returns = calculate_mmf_return(monthly_deposit=monthly_deposit, annual_rate=quote.rate / 100, months=months)
+        ranked.append(QuoteSuggestion(
+            quote.asset_class,
+            quote.name,
+            quote.rate,  # percent, like FundSuggestion
+            quote.term_months,
+            returns["total_deposits"],
+            returns["interest_earned"],
+            returns["future_value"]
+        ))
+    return ranked
+
+def goal_monthly_deposit(savings_goal_amount, savings_goal_timeframe_months):
+    # The user's monthly deposit capacity towards the goal
+    return savings_goal_amount / savings_goal_timeframe_months if savings_goal_timeframe_months > 0 else 0
 
-    for mmf in mmfs:
+def goal_progress(remaining_funds, savings_goal_amount, savings_goal_timeframe_months, monthly_deposit):
+    # Whether the money left each month covers the goal's monthly deposit
+    if not (savings_goal_amount > 0 and savings_goal_timeframe_months > 0):
+        return []
+    if remaining_funds >= monthly_deposit:
+        return [InfoNotice(
+            f"To reach your goal of KES {savings_goal_amount:,.2f} in {savings_goal_timeframe_months} months, you're on track by saving KES {monthly_deposit:,.2f} per month."
+        )]
+    gap = monthly_deposit - remaining_funds
+    return [WarningNotice(
+        f"You need to invest KES {monthly_deposit:,.2f} per month, but you're short by KES {gap:,.2f}."
+    )]
+
+@metrics.span("projection")
+def project_mmfs(ranked_mmfs, monthly_deposit, savings_goal_amount, savings_goal_timeframe_months):
+    # FundSuggestions for the funds we'll show (already ranked by rank_mmfs)
+    top_mmfs = []
+    for mmf in ranked_mmfs:
         try:
-            # Convert rate string like "12.25%" to float
-            rate_value = float(mmf['rate'].replace('%', '').strip()) / 100
+            rate_value = mmf.rate / 100
             returns = calculate_mmf_return(
                 monthly_deposit=monthly_deposit,
                 annual_rate=rate_value,
                 months=savings_goal_timeframe_months
             )
-            top_mmfs.append({
-                "name": mmf['name'],
-                "rate": rate_value,
-                "total_deposits": returns["total_deposits"],
-                "interest_earned": returns["interest_earned"],
-                "projected_return": returns["future_value"],
-                # "url": mmf.get("url", "#")
-            })
+            top_mmfs.append(FundSuggestion(
+                mmf.name,
+                mmf.rate,
+                returns["total_deposits"],
+                returns["interest_earned"],
+                returns["future_value"],
+                # Required deposit: less than target / months, interest covers the rest
+                required_monthly_deposit(savings_goal_amount, rate_value, savings_goal_timeframe_months)
+                if savings_goal_amount > 0 and savings_goal_timeframe_months >= 1 else None,
+            ))
         except Exception:
             continue
+    return top_mmfs
+
+def assemble_suggestions(progress, snapshot, top_mmfs, cross_asset=None):
+    # The suggestion list shown to the user, from the pieces computed above
+    results = list(progress)
+
+    if snapshot.stale and snapshot.fetched_at:
+        fetched = datetime.fromtimestamp(snapshot.fetched_at).strftime("%Y-%m-%d %H:%M")
+        results.append(WarningNotice(
+            f"Live MMF rates are unavailable right now; showing the last known rates from {fetched}."
+        ))
 
-    top_mmfs = sorted(top_mmfs, key=lambda x: x["rate"], reverse=True)[:5]
     # Recommend the best MMF
-    from gui import suggest_best_mmf
     best_mmf_suggestion = suggest_best_mmf(top_mmfs)
     results.append(best_mmf_suggestion)
 
 
     if top_mmfs:
-        results.append({"type": "header", "message": "Top 5 MMFs based on current rates:"})
-        for mmf in top_mmfs:
-            results.append({
-                "type": "mmf",
-                "name": mmf["name"],
-                "rate": mmf["rate"] * 100,  # Convert back to percentage
-                "total_deposits": mmf["total_deposits"],
-                "interest_earned": mmf["interest_earned"],
-                "projected_return": mmf["projected_return"],
-                # "url": mmf["url"]
-            })
+        results.append(Header(f"Top {len(top_mmfs)} MMFs based on current rates:"))
+        results.extend(top_mmfs)
     else:
-        results.append({"type": "error", "message": "Could not fetch reliable MMF rates at this time."})
+        results.append(ErrorNotice("Could not fetch reliable MMF rates at this time."))
+
+    if cross_asset is not None:
+        results.append(Header(f"Top {len(cross_asset)} options across MMFs, T-bills, bonds and fixed deposits "
+                              "that mature within your timeframe:"))
+        results.extend(cross_asset)
 
     return results
 
+@metrics.span("recommend")
+def suggest_investments(remaining_funds, savings_goal_amount=0, savings_goal_timeframe_months=1, ranking_key="rate", top_n=5, rates=None, other_quotes=None):
+    # `rates` is a RateSnapshot to use instead of asking the rate provider, for
+    # callers that share one fetch across many calls. `other_quotes` (RateQuotes
+    # for T-bills, bonds, fixed deposits) adds a ranking across asset classes.
+    # recalc.financial_plan runs the same steps, recomputing only what changed.
+    # Returns a list of suggestion records (records.py).
+    if remaining_funds <= 0:
+        return [WarningNotice("No funds available for investment after expenses.")]
+
+    monthly_deposit = goal_monthly_deposit(savings_goal_amount, savings_goal_timeframe_months)
+    progress = goal_progress(remaining_funds, savings_goal_amount, savings_goal_timeframe_months, monthly_deposit)
+
+    # Rank on the parsed rates first and only project the funds we'll show
+    snapshot = rates if rates is not None else get_rate_snapshot()
+    top_mmfs = project_mmfs(rank_mmfs(snapshot.rates, top_n, ranking_key), monthly_deposit, savings_goal_amount, savings_goal_timeframe_months)
+
+    cross_asset = None
+    if other_quotes:
+        cross_asset = rank_across_assets(snapshot.rates, other_quotes, monthly_deposit, savings_goal_timeframe_months, top_n, ranking_key)
+
+    return assemble_suggestions(progress, snapshot, top_mmfs, cross_asset)
@@ -1,9 +1,9 @@
 import sys
+import metrics
 from data import collect_user_data
-from tax import calculate_net_income
-from investment import suggest_investments
-from investment import get_mmf_rates
-from investment import calculate_mmf_return
+from investment import get_rate_snapshot
+from recalc import financial_plan
+from recommendations import format_suggestion_text
 
 
 def main():
@@ -22,39 +22,67 @@ def main():
     #risk_tolerance = user_financial_data.get("risk_tolerance", "low")
 
     # Financial Calculations and Deductions
-    financial_breakdown = calculate_net_income(gross_salary, fixed_expenses)
+    plan = financial_plan()
+    plan.update(
+        gross_salary=gross_salary,
+        fixed_expenses=fixed_expenses,
+        savings_goal_amount=savings_goals.get("target_amount", 0),
+        savings_goal_timeframe_months=savings_goals.get("timeframe_months", 1),
+        rates=get_rate_snapshot()
+    )
+    financial_breakdown = plan.get("breakdown")
 
     print("\n--- Your Monthly Financial Breakdown ---")
-    print(f"Gross Salary: KES {financial_breakdown['gross_salary']:,.2f}")
-    print(f"PAYE Tax: KES {financial_breakdown['paye_tax']:,.2f}")
-    print(f"Sha Deduction: KES {financial_breakdown['sha_deduction']:,.2f}")
-    print(f"NSSF Deduction: KES {financial_breakdown['nssf_deduction']:,.2f}")
-    print(f"Total Statutory Deductions: KES {financial_breakdown['total_statutory_deductions']:,.2f}")
-    print(f"Net Salary (After Tax & Deductions): KES {financial_breakdown['net_salary_after_tax']:,.2f}")
+    print(f"Gross Salary: KES {financial_breakdown.gross_salary:,.2f}")
+    print(f"PAYE Tax: KES {financial_breakdown.paye_tax:,.2f}")
+    print(f"Sha Deduction: KES {financial_breakdown.sha_deduction:,.2f}")
+    print(f"NSSF Deduction: KES {financial_breakdown.nssf_deduction:,.2f}")
+    print(f"Total Statutory Deductions: KES {financial_breakdown.total_statutory_deductions:,.2f}")
+    print(f"Net Salary (After Tax & Deductions): KES {financial_breakdown.net_salary_after_tax:,.2f}")
     
     print("\nFixed Expenses:")
     for category, amount in fixed_expenses.items():
         print(f"  {category}: KES {amount:,.2f}")
-    print(f"Total Fixed Expenses: KES {financial_breakdown['total_fixed_expenses']:,.2f}")
+    print(f"Total Fixed Expenses: KES {financial_breakdown.total_fixed_expenses:,.2f}")
 
-    remaining_funds = financial_breakdown['remaining_for_savings_investment']
+    remaining_funds = financial_breakdown.remaining_for_savings_investment
     print(f"\nRemaining for Savings & Investment: KES {remaining_funds:,.2f}")
 
     # Part 3: Investment Recommendations
-    investment_suggestions = suggest_investments(
-        remaining_funds = remaining_funds, 
-        savings_goal_amount=savings_goals.get("target_amount", 0),
-        savings_goal_timeframe_months=savings_goals.get("timeframe_months", 1)
-    )
+    investment_suggestions = plan.get("suggestions")
 
-    rates = get_mmf_rates()
+    rates = plan.get("rates").rates
+    if not rates:
+        print("Could not fetch MMF rates at this time.")
     for fund in rates:
-        print(f"{fund['name']}: {fund['rate']}")
+        print(f"{fund.name}: {fund.rate:.2f}%")
 
     for suggestion in investment_suggestions:
-        print(suggestion)
+        print(format_suggestion_text(suggestion))
 
     print("\nThank you for using The Smart Money Guide!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # Non-interactive: python main.py batch profiles.csv --workers 8 > results.jsonl
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "payroll":
+        # Year-end totals: python main.py payroll salaries.csv --year 2024 -o p9_totals.csv
+        from annual_payroll import main as payroll_main
+        sys.exit(payroll_main(sys.argv[2:]))
+
+    import argparse
+    parser = argparse.ArgumentParser(description="The Smart Money Guide")
+    parser.add_argument("--profile", nargs="?", const="smart_money_guide.prof", metavar="PATH",
+                        help="capture a cProfile of this run (default file: smart_money_guide.prof)")
+    parser.add_argument("--metrics", action="store_true", help="print per-phase timings in Prometheus format on exit")
+    args = parser.parse_args()
+
+    if args.profile:
+        with metrics.profiled(args.profile):
+            main()
+    else:
+        main()
+    if args.metrics:
+        print(metrics.render_prometheus(), file=sys.stderr, end="")
\ No newline at end of file
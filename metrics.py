@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# In-process instrumentation: timing spans around each phase (fetch, parse,
+# tax, projection, recommend, render), counters and histograms, exported in
+# the Prometheus text format. Recording is a perf_counter call and a short
+# locked update, so it stays on in production; SMG_METRICS=0 turns it off.
+#
+#   with metrics.span("tax"):
+#       breakdown = calculate_net_income(...)
+#   metrics.inc("smg_rate_fetches_total", result="ok")
+#   print(metrics.render_prometheus())
+#
+# Logging is opt-in (configure_logging): records go through a queue to a
+# background thread that writes app.log, and records below WARNING are sampled.
+
+ENABLED = os.environ.get("SMG_METRICS", "1") != "0"
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.log")
+
+PHASE_METRIC = "smg_phase_seconds"
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    PHASE_METRIC: "Time spent in each phase of a run",
+    "smg_rate_fetches_total": "Rate table fetches by result",
+    "smg_recalc_nodes_total": "Recalculation graph nodes recomputed",
+    "smg_http_request_seconds": "HTTP request latency by endpoint",
+    "smg_http_requests_total": "HTTP requests by endpoint and status",
+    "smg_batch_profiles_total": "Profiles received in batch requests",
+    "smg_rate_table_publishes_total": "Shared rate tables published by the refresher",
+    "smg_rate_table_loads_total": "New shared rate table versions loaded by a reader",
+}
+
+_lock = threading.Lock()
+_counters = {}    # name -> {labels: value}
+_histograms = {}  # name -> {labels: [bucket counts..., +Inf count, sum]}
+
+_logger = None
+_span_log = None  # the logger, when it is enabled for DEBUG; spans then log their durations
+_log_listener = None
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = _labels_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    _observe(name, _labels_key(labels), value)
+
+
+def _observe(name, key, value):
+    _record(_histogram(name, key), value)
+
+
+def _histogram(name, key):
+    # The bucket list of one series, created on first use. Callers on hot paths
+    # keep the list; reset() zeroes it in place so it stays valid.
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        counts = series.get(key)
+        if counts is None:
+            counts = series[key] = [0] * (len(DEFAULT_BUCKETS) + 2)
+        return counts
+
+
+def _record(counts, value):
+    index = bisect_left(DEFAULT_BUCKETS, value)
+    with _lock:
+        counts[index] += 1
+        counts[-1] += value
+
+
+class span:
+    """Times a block (or, as a decorator, every call) into smg_phase_seconds{phase=...}."""
+
+    __slots__ = ("phase", "_key", "_started")
+
+    def __init__(self, phase):
+        self.phase = phase
+        self._key = (("phase", phase),)
+        self._started = 0.0
+
+    def __enter__(self):
+        if ENABLED:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if ENABLED:
+            elapsed = time.perf_counter() - self._started
+            _observe(PHASE_METRIC, self._key, elapsed)
+            if _span_log is not None:
+                _span_log.debug("%s took %.2f ms", self.phase, elapsed * 1000)
+        return False
+
+    def __call__(self, fn):
+        import functools
+        phase = self.phase
+        counts = _histogram(PHASE_METRIC, self._key)
+        perf_counter = time.perf_counter
+
+        # Inlined rather than `with span(...)`: this wraps functions called in tight loops
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - started
+                _record(counts, elapsed)
+                if _span_log is not None:
+                    _span_log.debug("%s took %.2f ms", phase, elapsed * 1000)
+        return wrapper
+
+
+def observe_phase(phase, seconds):
+    # For phases that can't be wrapped in a `with` block, e.g. a whole Streamlit rerun
+    observe(PHASE_METRIC, seconds, phase=phase)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        for series in _histograms.values():
+            for counts in series.values():
+                counts[:] = [0] * len(counts)
+
+
+def snapshot():
+    # Plain copies of every series: {"counters": {name: {labels: value}}, "histograms": {...}}
+    with _lock:
+        return {
+            "counters": {name: dict(series) for name, series in _counters.items()},
+            "histograms": {name: {key: list(counts) for key, counts in series.items()} for name, series in _histograms.items()},
+        }
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Every counter and histogram in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = []
+    for name in sorted(data["counters"]):
+        if name in HELP:
+            lines.append(f"# HELP {name} {HELP[name]}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in sorted(data["counters"][name].items()):
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+    for name in sorted(data["histograms"]):
+        if name in HELP:
+            lines.append(f"# HELP {name} {HELP[name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, counts in sorted(data["histograms"][name].items()):
+            cumulative = 0
+            for bound, count in zip(DEFAULT_BUCKETS, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', repr(bound))])} {cumulative}")
+            cumulative += counts[-2]
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key)} {_format_value(counts[-1])}")
+            lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serves render_prometheus() at http://host:port/metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def configure_logging(path=None, level=None, sample_rate=None):
+    """Non-blocking, sampled logging to `path` (SMG_LOG_FILE, default app.log) for the "smg" logger.
+
+    Callers only put records on a queue; a listener thread does the file
+    writes. Records below WARNING are kept with probability `sample_rate`
+    (SMG_LOG_SAMPLE, default 0.01); warnings and errors are always kept.
+    Returns the logger. Calling it again is a no-op.
+    """
+    global _logger, _span_log, _log_listener
+    import logging
+    import logging.handlers
+    import queue
+    import random
+
+    with _lock:
+        if _logger is not None:
+            return _logger
+        path = path or os.environ.get("SMG_LOG_FILE", DEFAULT_LOG_PATH)
+        level = level or os.environ.get("SMG_LOG_LEVEL", "INFO")
+        if sample_rate is None:
+            sample_rate = float(os.environ.get("SMG_LOG_SAMPLE", "0.01"))
+
+        def sampled(record):
+            return record.levelno >= logging.WARNING or random.random() < sample_rate
+
+        records = queue.SimpleQueue()
+        file_handler = logging.FileHandler(path, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        listener = logging.handlers.QueueListener(records, file_handler)
+        listener.start()
+
+        queue_handler = logging.handlers.QueueHandler(records)
+        queue_handler.addFilter(sampled)
+        logger = logging.getLogger("smg")
+        logger.setLevel(level)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+        _logger = logger
+        _span_log = logger if logger.isEnabledFor(logging.DEBUG) else None
+        _log_listener = listener
+        return logger
+
+
+def stop_logging():
+    # Flushes queued records; only needed before a short-lived process exits
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+class profiled:
+    """cProfile capture of one run: dumps pstats to `path` and prints the top entries."""
+
+    def __init__(self, path, top=25, stream=None):
+        self.path = path
+        self.top = top
+        self.stream = stream
+        self._profile = None
+
+    def __enter__(self):
+        import cProfile
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return self._profile
+
+    def __exit__(self, exc_type, exc, tb):
+        import pstats
+        import sys
+        self._profile.disable()
+        self._profile.dump_stats(self.path)
+        stream = self.stream or sys.stderr
+        print(f"Profile written to {self.path}", file=stream)
+        pstats.Stats(self._profile, stream=stream).sort_stats("cumulative").print_stats(self.top)
+        return False
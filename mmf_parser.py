@@ -0,0 +1,130 @@
+import math
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# One row of the money.ke rates table. `rate` is the annual yield and `fee` the
+# management fee, both in percent (17.89 for "17.89%"). `min_deposit` is in KES.
+# Fee and minimum deposit are None when the source doesn't publish them.
+MMFRate = namedtuple("MMFRate", ["name", "rate", "fee", "min_deposit"], defaults=(None, None))
+
+NAME_COLUMN = 0
+FEE_COLUMN = 1
+RATE_COLUMN = 2
+
+MAX_PLAUSIBLE_RATE = 100.0  # anything at or above this is a parse error, not a yield
+
+FEED_CHUNK_SIZE = 8 * 1024
+
+
+def parse_mmf_rates(html):
+    """Extract the MMF rates table from a money.ke page as a list of MMFRate.
+
+    Everything before the first <table> is skipped and tokenizing stops as soon
+    as the rates table closes, so nav, ads, posts and footer are never looked
+    at. Rows whose rate is not a plausible percentage are dropped.
+    """
+    return parse_rate_table(html, _mmf_row)
+
+
+def parse_rate_table(html, parse_row):
+    # Same streaming scan as parse_mmf_rates, for other money.ke rate tables:
+    # `parse_row(cells)` turns a row's cell texts into a record, or None to drop it
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+
+    start = html.find("<table")
+    if start == -1:
+        start = html.find("<TABLE")
+    if start == -1:
+        return []
+
+    parser = _RatesTableParser(parse_row)
+    for pos in range(start, len(html), FEED_CHUNK_SIZE):
+        parser.feed(html[pos:pos + FEED_CHUNK_SIZE])
+        if parser.done:
+            break
+    return parser.rates
+
+
+def parse_rate(text):
+    # "17.89%" -> 17.89; returns None for anything that isn't a plausible yield
+    cleaned = text.replace("%", "").replace(",", "").strip()
+    try:
+        rate = float(cleaned)
+    except ValueError:
+        return None
+    if not math.isfinite(rate) or rate < 0 or rate >= MAX_PLAUSIBLE_RATE:
+        return None
+    return rate
+
+
+class _RatesTableParser(HTMLParser):
+    """Collects the data rows of the first top-level <table> that has any.
+
+    Tables without rate rows (layout tables, say) are skipped over. Rows of
+    nested tables are ignored.
+    """
+
+    def __init__(self, parse_row):
+        super().__init__()
+        self.parse_row = parse_row
+        self.rates = []
+        self.done = False
+        self._table_depth = 0
+        self._cells = None
+        self._cell_text = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self._table_depth += 1
+        elif self._table_depth == 1:
+            if tag == "tr":
+                if self._cells is not None:  # previous row left its </tr> out
+                    self._close_cell()
+                    self._add_row(self._cells)
+                self._cells = []
+            elif tag == "td" and self._cells is not None:
+                self._close_cell()
+                self._cell_text = []
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == "table":
+            self._table_depth -= 1
+            if self._table_depth == 0 and self.rates:
+                self.done = True
+        elif self._table_depth == 1:
+            if tag == "td":
+                self._close_cell()
+            elif tag == "tr" and self._cells is not None:
+                self._close_cell()
+                self._add_row(self._cells)
+                self._cells = None
+
+    def handle_data(self, data):
+        if self._cell_text is not None and self._table_depth == 1:
+            self._cell_text.append(data)
+
+    def _close_cell(self):
+        if self._cell_text is not None:
+            # Collapse runs of whitespace (line breaks in the markup included) to single spaces
+            self._cells.append(" ".join("".join(self._cell_text).split()))
+            self._cell_text = None
+
+    def _add_row(self, cells):
+        record = self.parse_row(cells)
+        if record is not None:
+            self.rates.append(record)
+
+
+def _mmf_row(cells):
+    if len(cells) <= RATE_COLUMN:
+        return None  # header rows use <th>, spacer rows have too few cells
+    name = cells[NAME_COLUMN]
+    rate = parse_rate(cells[RATE_COLUMN])
+    if name and rate is not None:
+        return MMFRate(name, rate, parse_rate(cells[FEE_COLUMN]))
+    return None
@@ -0,0 +1,105 @@
+import math
+from bisect import bisect_left
+
+from schedules import schedule_for
+
+# Net salary (gross minus PAYE, SHA and NSSF) as an explicit piecewise-linear
+# function of gross salary. Between two consecutive breakpoints (a PAYE band
+# limit, an SHA band limit, the NSSF upper earnings limit, or the salary where
+# PAYE first exceeds the personal relief) every deduction is linear, so net is
+# slope * gross + intercept. That lets salaries be solved for exactly instead
+# of searched for.
+
+
+class NetSegments:
+    """The net-salary function of one CompiledSchedule, segment by segment.
+
+    Segment k covers gross salaries in (lower[k], upper[k]] (the first one also
+    includes 0), matching how the schedule puts a salary equal to a band limit
+    into the lower band. Inside it net = slope[k] * gross + intercept[k].
+    Net is continuous except at SHA band limits, where it drops by the step in
+    the SHA amount, so it is not monotonic.
+    """
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        breakpoints = set(schedule.paye_upper) | set(schedule.sha_upper) | {schedule.nssf_upper_earnings_limit}
+        relief_point = _relief_point(schedule)
+        if relief_point is not None:
+            breakpoints.add(relief_point)
+        self.breakpoints = sorted(b for b in breakpoints if b > 0)
+        self.lower = [0.0] + self.breakpoints
+        self.upper = self.breakpoints + [math.inf]
+
+        self.slope = []
+        self.intercept = []
+        for lo, hi in zip(self.lower, self.upper):
+            slope, intercept = _linear_piece(schedule, lo + 1.0 if hi == math.inf else (lo + hi) / 2)
+            self.slope.append(slope)
+            self.intercept.append(intercept)
+
+        # Highest net reachable at or below each segment's upper end; the first
+        # segment where this reaches a target holds the smallest gross for it
+        self.net_at_upper = [s * hi + c if hi != math.inf else math.inf
+                             for s, c, hi in zip(self.slope, self.intercept, self.upper)]
+        self.best_so_far = []
+        best = -math.inf
+        for value in self.net_at_upper:
+            best = max(best, value)
+            self.best_so_far.append(best)
+        self.net_at_zero = self.intercept[0]
+        self._arrays = None
+
+    def segment_index(self, gross_salary):
+        return bisect_left(self.upper, gross_salary)
+
+    def net(self, gross_salary):
+        # Net from the segment formula; equals tax.calculate_net_income's net up to rounding
+        k = self.segment_index(gross_salary)
+        return self.slope[k] * gross_salary + self.intercept[k]
+
+    def arrays(self):
+        # NumPy copies for the batch solvers, built on first use
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = {name: np.array(getattr(self, name), dtype=np.float64)
+                            for name in ("lower", "upper", "slope", "intercept", "net_at_upper", "best_so_far")}
+        return self._arrays
+
+
+def _relief_point(schedule):
+    # Gross salary at which PAYE before relief equals the personal relief, i.e. where PAYE starts
+    for i, rate in enumerate(schedule.paye_rates):
+        upper = schedule.paye_upper[i] if i < len(schedule.paye_upper) else math.inf
+        tax_at_upper = schedule.paye_cumulative[i] + (upper - schedule.paye_lower[i]) * rate
+        if tax_at_upper >= schedule.personal_relief and rate > 0:
+            return schedule.paye_lower[i] + (schedule.personal_relief - schedule.paye_cumulative[i]) / rate
+    return None
+
+
+def _linear_piece(schedule, probe):
+    # (slope, intercept) of net salary on the segment containing `probe`
+    i = bisect_left(schedule.paye_upper, probe)
+    rate = schedule.paye_rates[i]
+    paye_intercept = schedule.paye_cumulative[i] - schedule.paye_lower[i] * rate - schedule.personal_relief
+    if rate * probe + paye_intercept <= 0:
+        rate, paye_intercept = 0.0, 0.0  # still covered by the personal relief
+
+    if probe * schedule.nssf_rate < schedule.nssf_cap:
+        nssf_slope, nssf_intercept = schedule.nssf_rate, 0.0
+    else:
+        nssf_slope, nssf_intercept = 0.0, schedule.nssf_cap
+
+    return 1.0 - rate - nssf_slope, -paye_intercept - schedule.sha(probe) - nssf_intercept
+
+
+_segments = {}
+
+
+def net_segments(as_of=None):
+    # NetSegments for the schedule in force on `as_of`, built once per schedule
+    schedule = schedule_for(as_of)
+    segments = _segments.get(schedule)
+    if segments is None:
+        segments = _segments[schedule] = NetSegments(schedule)
+    return segments
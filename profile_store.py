@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Many-user profile store on SQLite. Each profile is one row keyed by user ID,
+# so a save or a load touches only that row however many users are stored.
+# Every save also appends the previous version to a history table. The database
+# runs in WAL mode: readers never block the writer, and writes are short
+# transactions, so concurrent Streamlit sessions (threads) and CLI runs
+# (processes) can share one file safely.
+
+DEFAULT_DB_PATH = os.environ.get(
+    "SMG_PROFILE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id    TEXT PRIMARY KEY,
+    name       TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    version    INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile_history (
+    user_id  TEXT NOT NULL,
+    version  INTEGER NOT NULL,
+    data     TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    PRIMARY KEY (user_id, version)
+);
+CREATE INDEX IF NOT EXISTS profiles_updated_at ON profiles (updated_at);
+"""
+
+
+class ProfileConflictError(Exception):
+    """The profile was saved by someone else since it was loaded."""
+
+
+def user_id_for(profile):
+    # An explicit "id" wins; otherwise the name, case- and whitespace-insensitive
+    user_id = profile.get("id") or " ".join(str(profile.get("name", "")).split()).casefold()
+    if not user_id:
+        raise ValueError("A profile needs an id or a name to be stored.")
+    return str(user_id)
+
+
+class ProfileStore:
+    """Profiles (dicts shaped like user_data.json) keyed by user ID.
+
+    Every thread gets its own connection. `save` can be given the version the
+    caller loaded (`expected_version`) and then refuses to overwrite a newer
+    save instead of silently clobbering it.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly in _transaction
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get(self, user_id):
+        row = self._connection().execute("SELECT data FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_with_version(self, user_id):
+        # (profile, version), or (None, 0) for an unknown user
+        row = self._connection().execute("SELECT data, version FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, 0)
+
+    def save(self, profile, user_id=None, expected_version=None):
+        """Insert or replace one profile atomically and return its new version."""
+        with self._transaction() as conn:
+            return self._write(conn, user_id or user_id_for(profile), profile, time.time(), expected_version)
+
+    def _write(self, conn, user_id, profile, now, expected_version=None):
+        # Moves the current version (if any) to the history table and stores the new one
+        row = conn.execute("SELECT data, version, updated_at FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+        current = row[1] if row else 0
+        if expected_version is not None and expected_version != current:
+            raise ProfileConflictError(
+                f"Profile {user_id!r} is at version {current}, not {expected_version}; reload it before saving."
+            )
+        if row:
+            # saved_at is when the replaced version was saved, not when it was replaced
+            conn.execute("INSERT INTO profile_history VALUES (?, ?, ?, ?)", (user_id, current, row[0], row[2]))
+        conn.execute(
+            "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+            (user_id, profile.get("name", ""), json.dumps(profile), current + 1, now)
+        )
+        return current + 1
+
+    def delete(self, user_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM profile_history WHERE user_id = ?", (user_id,))
+            return conn.execute("DELETE FROM profiles WHERE user_id = ?", (user_id,)).rowcount > 0
+
+    def history(self, user_id, limit=None):
+        # Earlier versions, newest first, as (version, saved_at, profile); saved_at is when that version was saved
+        query = "SELECT version, saved_at, data FROM profile_history WHERE user_id = ? ORDER BY version DESC"
+        params = (user_id,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        return [(version, saved_at, json.loads(data)) for version, saved_at, data in self._connection().execute(query, params)]
+
+    def user_ids(self):
+        return [row[0] for row in self._connection().execute("SELECT user_id FROM profiles ORDER BY user_id")]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def __contains__(self, user_id):
+        return self._connection().execute("SELECT 1 FROM profiles WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def import_profiles(self, profiles, batch_size=1000):
+        """Save many profiles, `batch_size` per transaction. Returns how many were saved."""
+        count = 0
+        batch = []
+        for profile in profiles:
+            batch.append(profile)
+            if len(batch) >= batch_size:
+                count += self._import_batch(batch)
+                batch = []
+        if batch:
+            count += self._import_batch(batch)
+        return count
+
+    def _import_batch(self, profiles):
+        now = time.time()
+        with self._transaction() as conn:
+            for profile in profiles:
+                self._write(conn, user_id_for(profile), profile, now)
+        return len(profiles)
+
+    def import_jsonl(self, file):
+        return self.import_profiles(json.loads(line) for line in file if line.strip())
+
+    def export_jsonl(self, file):
+        # Streams every current profile to `file`, one JSON object per line; returns the count
+        count = 0
+        for (data,) in self._connection().execute("SELECT data FROM profiles ORDER BY user_id"):
+            file.write(data)
+            file.write("\n")
+            count += 1
+        return count
+
+    def migrate_json_file(self, filename):
+        """Import a legacy single-profile user_data.json, if the store doesn't have it yet."""
+        if not os.path.exists(filename):
+            return False
+        try:
+            with open(filename, 'r') as f:
+                profile = json.load(f)
+            user_id = user_id_for(profile)
+        except (json.JSONDecodeError, ValueError, IOError) as e:
+            print(f"Could not migrate {filename}: {e}")
+            return False
+        if user_id in self:
+            return False
+        self.save(profile, user_id)
+        return True
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so a read-then-write inside
+    # the transaction can't race another writer
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Bulk import or export the profile store as JSON Lines")
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("file", nargs="?", default="-", help="JSON Lines file ('-' for stdin / stdout)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database (default: %(default)s)")
+    args = parser.parse_args()
+
+    store = ProfileStore(args.db)
+    if args.action == "import":
+        source = sys.stdin if args.file == "-" else open(args.file, 'r', encoding='utf-8')
+        with source:
+            count = store.import_jsonl(source)
+        print(f"Imported {count} profiles into {args.db}", file=sys.stderr)
+    else:
+        target = sys.stdout if args.file == "-" else open(args.file, 'w', encoding='utf-8')
+        with target:
+            count = store.export_jsonl(target)
+        print(f"Exported {count} profiles from {args.db}", file=sys.stderr)
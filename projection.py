@@ -0,0 +1,63 @@
+import numpy as np
+
+# Month-by-month MMF projections for many funds at once. Works like
+# investment.calculate_mmf_return (deposit at the end of each month, interest
+# compounded monthly at annual_rate / 12) but keeps the whole schedule, as a
+# funds x months matrix, instead of only the final figures.
+
+
+def deposit_schedule(monthly_deposit, months, deposit_changes=None):
+    """Deposit made in each month, as an array of length `months`.
+
+    `deposit_changes` is an iterable of (month, new_deposit) pairs, months
+    counted from 1: the new amount is deposited from that month onwards.
+    """
+    deposits = np.full(months, float(monthly_deposit))
+    for month, amount in sorted(deposit_changes or []):
+        if not 1 <= month <= months:
+            raise ValueError(f"Deposit change at month {month} is outside the 1-{months} month horizon.")
+        deposits[month - 1:] = amount
+    return deposits
+
+
+def project_schedules(annual_rates, monthly_deposit, months, deposit_changes=None):
+    """Balance, deposit and interest schedules for every fund.
+
+    `annual_rates` are fractions (0.1225 for 12.25%), one per fund. Returns a
+    dict of arrays:
+      month            - 1..months
+      deposit          - amount deposited each month (months,)
+      total_deposits   - cumulative deposits at the end of each month (months,)
+      balance          - fund balance at the end of each month (funds, months)
+      interest_earned  - cumulative interest, balance - total_deposits (funds, months)
+      monthly_interest - interest credited in each month (funds, months)
+
+    Raises ValueError when `months` is less than 1.
+    """
+    months = int(months)
+    if months < 1:
+        raise ValueError("The savings period must be at least one month.")
+    rates = np.atleast_1d(np.asarray(annual_rates, dtype=np.float64)) / 12
+    deposits = deposit_schedule(monthly_deposit, months, deposit_changes)
+
+    # growth[:, t] = (1 + r) ** (t + 1). The balance recurrence
+    # B_t = B_{t-1} * (1 + r) + d_t unrolls to growth_t * sum_{k<=t} d_k / growth_k,
+    # which is a cumulative product and a cumulative sum instead of a month loop.
+    growth = np.cumprod(np.broadcast_to(1 + rates[:, None], (rates.size, months)), axis=1)
+    balance = growth * np.cumsum(deposits / growth, axis=1)
+
+    total_deposits = np.cumsum(deposits)
+    interest_earned = balance - total_deposits
+
+    monthly_interest = np.empty_like(balance)
+    monthly_interest[:, 0] = 0.0  # the first deposit lands at the end of month 1
+    monthly_interest[:, 1:] = balance[:, :-1] * rates[:, None]
+
+    return {
+        "month": np.arange(1, months + 1),
+        "deposit": deposits,
+        "total_deposits": total_deposits,
+        "balance": balance,
+        "interest_earned": interest_earned,
+        "monthly_interest": monthly_interest
+    }
@@ -0,0 +1,111 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+# Ranking of MMFs by a score where higher is better. Lets suggest_investments
+# pick its top funds before projecting anything, so only k funds are projected
+# instead of every scraped one.
+
+
+def _rate(fund):
+    return fund.rate
+
+
+def _net_rate(fund):
+    # Yield net of the management fee; a fund with an unknown fee is ranked on its rate
+    return fund.rate - (fund.fee or 0.0)
+
+
+RANKING_KEYS = {
+    "rate": _rate,
+    "net_rate": _net_rate,
+}
+
+
+def get_ranking_key(key):
+    # `key` is a name from RANKING_KEYS or any callable fund -> score
+    if callable(key):
+        return key
+    try:
+        return RANKING_KEYS[key]
+    except KeyError:
+        raise ValueError(f"Unknown ranking key {key!r}; expected one of {', '.join(RANKING_KEYS)}") from None
+
+
+def top_k(funds, k=5, key="rate"):
+    # Best k funds, best first, in O(n log k). Ties keep the scraped order.
+    return heapq.nlargest(k, funds, key=get_ranking_key(key))
+
+
+class LiveRanking:
+    """A ranking kept up to date across rate refreshes.
+
+    `update` diffs a new rate table against the current one and only moves the
+    funds whose score or place in the table changed (or that appeared /
+    disappeared), instead of re-sorting everything. The result is always the
+    same as top_k on that table: ties keep the table's order.
+    """
+
+    def __init__(self, key="rate"):
+        self.score = get_ranking_key(key)
+        self._lock = threading.Lock()
+        self._funds = {}     # name -> fund
+        self._order = []     # sorted (-score, position, name); position in the current table keeps ties in scraped order
+        self._entries = {}   # name -> its tuple in _order
+        self._source = None  # the rate table last applied, to skip no-op updates
+
+    def update(self, funds):
+        # Returns the number of funds whose position had to change
+        with self._lock:
+            return self._update(funds)
+
+    def top(self, k=5):
+        with self._lock:
+            return self._top(k)
+
+    def update_and_top(self, funds, k=5):
+        # update() then top() under one lock, so a concurrent caller ranking a
+        # different table can't slip in between and hand back its funds
+        with self._lock:
+            self._update(funds)
+            return self._top(k)
+
+    def __len__(self):
+        return len(self._funds)
+
+    def _update(self, funds):
+        # Called with the lock held
+        if funds is self._source:
+            return 0
+        self._source = funds
+
+        seen = set()
+        changed = 0
+        for position, fund in enumerate(funds):
+            name = fund.name
+            seen.add(name)
+            self._funds[name] = fund
+            # Ties are broken on the position in this table, so a fund that moved
+            # in the table is re-placed even if its score didn't change
+            entry = (-self.score(fund), position, name)
+            current = self._entries.get(name)
+            if current == entry:
+                continue  # e.g. only the fee changed under a rate ranking
+            if current is not None:
+                self._remove(name)
+            self._entries[name] = entry
+            insort(self._order, entry)
+            changed += 1
+
+        for name in [n for n in self._funds if n not in seen]:
+            self._remove(name)
+            del self._funds[name]
+            changed += 1
+        return changed
+
+    def _top(self, k):
+        return [self._funds[name] for _, _, name in self._order[:k]]
+
+    def _remove(self, name):
+        entry = self._entries.pop(name)
+        del self._order[bisect_left(self._order, entry)]
@@ -0,0 +1,240 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+# History of every MMF rate table we fetch, so trends can be shown without
+# re-scraping. Stored column-wise in a directory:
+#   funds.txt    - fund names, one per line; a fund's ID is its line number
+#   records.bin  - fixed-size records (timestamp, fund ID, rate), appended in
+#                  fetch order
+# Reads memory-map records.bin and slice it with searchsorted, so a range
+# query costs the records in the range, not the whole file. Both files are
+# only ever appended to (single O_APPEND writes), which keeps concurrent
+# writers from different processes from corrupting each other. Two processes
+# can still append their tables out of fetch order; reads then sort a copy.
+#
+#   python rate_history.py "Cytonn Money Market Fund" --days 90
+
+DEFAULT_HISTORY_DIR = os.environ.get(
+    "SMG_RATE_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "rate_history")
+)
+
+RECORD_DTYPE = np.dtype([("ts", "<i8"), ("fund", "<u4"), ("rate", "<f4")])
+
+SECONDS_PER_DAY = 86400
+
+
+class RateHistory:
+    """Append-only columnar history of (fetched_at, fund, rate)."""
+
+    def __init__(self, path=DEFAULT_HISTORY_DIR):
+        self.path = path
+        self.funds_path = os.path.join(path, "funds.txt")
+        self.records_path = os.path.join(path, "records.bin")
+        self._lock = threading.Lock()
+        self._names = []     # fund ID -> name
+        self._ids = {}       # name -> every ID it has (a race between writers can intern a name twice)
+        self._funds_size = 0
+        self._records = None
+        self._records_size = 0
+        self._last_appended = None
+
+    # --- writing ---
+
+    def append(self, rates, fetched_at=None):
+        """Record one fetched rate table (anything with .name and .rate, in percent).
+
+        A table identical to one already recorded the same day is skipped.
+        Returns the number of records written.
+        """
+        fetched_at = int(fetched_at if fetched_at is not None else time.time())
+        table = {_fund_name(rate.name): float(rate.rate) for rate in rates}
+        table.pop("", None)
+        day = fetched_at // SECONDS_PER_DAY
+        with self._lock:
+            if not table or (day, table) == self._last_appended:
+                return 0
+            os.makedirs(self.path, exist_ok=True)
+            self._refresh_funds()
+            new_names = [name for name in table if name not in self._ids]
+            if new_names:
+                _append_bytes(self.funds_path, "".join(f"{name}\n" for name in new_names).encode("utf-8"))
+                self._refresh_funds()
+
+            records = np.empty(len(table), dtype=RECORD_DTYPE)
+            records["ts"] = fetched_at
+            records["fund"] = [self._ids[name][0] for name in table]
+            records["rate"] = list(table.values())
+            _append_bytes(self.records_path, records.tobytes())
+            self._last_appended = (day, table)
+            return len(records)
+
+    # --- reading ---
+
+    def fund_names(self):
+        with self._lock:
+            self._refresh_funds()
+            return list(self._ids)
+
+    def __len__(self):
+        return len(self._load_records())
+
+    def fund_range(self, name, start=None, end=None):
+        """Every recorded rate of one fund between two times (epoch seconds or datetimes).
+
+        Returns (timestamps as datetime64[s], rates in percent), oldest first.
+        """
+        records = self._slice(start, end)
+        ids = self._ids_for(name)
+        if not ids:
+            return np.array([], dtype="datetime64[s]"), np.array([], dtype=np.float64)
+        mask = np.isin(records["fund"], ids) if len(ids) > 1 else records["fund"] == ids[0]
+        selected = records[mask]
+        return selected["ts"].astype("datetime64[s]"), selected["rate"].astype(np.float64)
+
+    def daily(self, name, start=None, end=None):
+        # One rate per day (the last one fetched that day), as (dates, rates)
+        timestamps, rates = self.fund_range(name, start, end)
+        if len(rates) == 0:
+            return timestamps.astype("datetime64[D]"), rates
+        days = timestamps.astype("datetime64[D]")
+        last_of_day = np.flatnonzero(np.append(days[1:] != days[:-1], True))
+        return days[last_of_day], rates[last_of_day]
+
+    def rolling_mean(self, name, window=7, start=None, end=None):
+        """Mean of each day's rate and the `window - 1` recorded days before it.
+
+        Returns (dates, means) for the days that have a full window behind them.
+        """
+        days, rates = self.daily(name, start, end)
+        if len(rates) < window:
+            return days[:0], rates[:0]
+        sums = np.cumsum(np.insert(rates, 0, 0.0))
+        return days[window - 1:], (sums[window:] - sums[:-window]) / window
+
+    def volatility(self, name, start=None, end=None):
+        # Standard deviation of the day-to-day rate change, in percentage points; None with under 3 days
+        _, rates = self.daily(name, start, end)
+        if len(rates) < 3:
+            return None
+        return float(np.std(np.diff(rates), ddof=1))
+
+    def trends(self, days=90, now=None):
+        """Change over the last `days` days for every fund: name -> (first, latest, change, volatility).
+
+        Rates are in percent and the change in percentage points. Funds with
+        fewer than two days of history in the period are left out.
+        """
+        now = now if now is not None else time.time()
+        start = now - days * SECONDS_PER_DAY
+        result = {}
+        for name in self.fund_names():
+            _, rates = self.daily(name, start, now)
+            if len(rates) >= 2:
+                result[name] = (float(rates[0]), float(rates[-1]), float(rates[-1] - rates[0]), self.volatility(name, start, now))
+        return result
+
+    # --- internals ---
+
+    def _ids_for(self, name):
+        with self._lock:
+            self._refresh_funds()
+            return self._ids.get(_fund_name(name), [])
+
+    def _refresh_funds(self):
+        # Picks up funds interned since the last read (by this or another process). Lock held.
+        try:
+            size = os.path.getsize(self.funds_path)
+        except OSError:
+            return
+        if size == self._funds_size:
+            return
+        with open(self.funds_path, 'rb') as f:
+            f.seek(self._funds_size)
+            chunk = f.read(size - self._funds_size)
+        complete = chunk[:chunk.rfind(b"\n") + 1]  # a concurrent write may still be in flight
+        for line in complete.decode("utf-8").splitlines():
+            self._ids.setdefault(line, []).append(len(self._names))
+            self._names.append(line)
+        self._funds_size += len(complete)
+
+    def _load_records(self):
+        # Memory-maps records.bin, remapping only when it has grown
+        try:
+            size = os.path.getsize(self.records_path)
+        except OSError:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        size -= size % RECORD_DTYPE.itemsize
+        with self._lock:
+            if self._records is None or size != self._records_size:
+                records = np.memmap(self.records_path, dtype=RECORD_DTYPE, mode='r',
+                                    shape=(size // RECORD_DTYPE.itemsize,)) if size else np.empty(0, dtype=RECORD_DTYPE)
+                timestamps = records["ts"]
+                if len(records) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+                    # Appended out of order by concurrent writers; _slice needs them sorted
+                    records = records[np.argsort(timestamps, kind="stable")]
+                self._records = records
+                self._records_size = size
+            return self._records
+
+    def _slice(self, start=None, end=None):
+        records = self._load_records()
+        timestamps = records["ts"]
+        lo = np.searchsorted(timestamps, _epoch(start), side="left") if start is not None else 0
+        hi = np.searchsorted(timestamps, _epoch(end), side="right") if end is not None else len(records)
+        return records[lo:hi]
+
+
+def _epoch(value):
+    # Epoch seconds from a number, a datetime or a numpy datetime64
+    if isinstance(value, np.datetime64):
+        return int(value.astype("datetime64[s]").astype(np.int64))
+    if hasattr(value, "timestamp"):
+        return int(value.timestamp())
+    return int(value)
+
+
+def _fund_name(name):
+    # One line of funds.txt: whitespace (line breaks included) collapsed to single spaces
+    return " ".join(str(name).split())
+
+
+def _append_bytes(path, data):
+    # One write() on an O_APPEND descriptor, so concurrent appenders never interleave
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show how a fund's recorded yield has moved")
+    parser.add_argument("fund", nargs="?", help="fund name (omit to list every fund's trend)")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--window", type=int, default=7, help="days in the rolling average")
+    parser.add_argument("--dir", default=DEFAULT_HISTORY_DIR)
+    args = parser.parse_args()
+
+    history = RateHistory(args.dir)
+    if not args.fund:
+        for name, (first, latest, change, vol) in sorted(history.trends(args.days).items()):
+            print(f"{name}: {first:.2f}% -> {latest:.2f}% ({change:+.2f} pp)")
+    else:
+        start = time.time() - args.days * SECONDS_PER_DAY
+        days, rates = history.daily(args.fund, start)
+        if len(rates) == 0:
+            print(f"No history for {args.fund} in the last {args.days} days.")
+        else:
+            _, means = history.rolling_mean(args.fund, args.window, start)
+            vol = history.volatility(args.fund, start)
+            print(f"{args.fund}: {rates[0]:.2f}% on {days[0]} -> {rates[-1]:.2f}% on {days[-1]} ({rates[-1] - rates[0]:+.2f} pp)")
+            if len(means):
+                print(f"{args.window}-day average: {means[-1]:.2f}%")
+            if vol is not None:
+                print(f"Daily volatility: {vol:.3f} pp")
@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# How long a fetched rate table is considered fresh (seconds).
+DEFAULT_TTL_SECONDS = 15 * 60
+
+# Last good rate table is persisted here so a fresh process can serve rates
+# straight away instead of waiting on money.ke.
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mmf_rates_cache.json")
+
+# `stale` is True when the rates are past their TTL or the last refresh failed
+RateSnapshot = namedtuple("RateSnapshot", ["rates", "fetched_at", "stale"])
+
+
+class RateProvider:
+    """In-process TTL cache over a rate fetch function, backed by a JSON snapshot on disk.
+
+    Fresh rates are returned from memory. Once the TTL expires callers still get
+    the stale rates immediately while a single background thread refreshes them.
+    Only a cold start (no memory copy and no snapshot) fetches inline. When a
+    refresh fails the last good rates keep being served, marked as stale.
+
+    `fetch_rates(validators)` is given the validators (ETag / Last-Modified)
+    stored with the current rates and returns `(rates, validators)`. It returns
+    `rates=None` when the upstream says nothing changed, which just renews the
+    current rates without re-parsing anything.
+
+    Processes sharing a snapshot file share fetches too: before fetching, a
+    refresh picks up fresh rates another process has saved there.
+
+    Rates are namedtuples of `record_type`; the snapshot stores them as JSON objects.
+    `on_refresh(rates, fetched_at)`, if given, is called after every fetch that
+    returned a new table (not after a 304), e.g. to record rate history.
+    Failures are reported on stderr, so they can't end up in a caller's output.
+    `label` names the rates in messages ("MMF rates", "T-bill, bond and deposit rates").
+    """
+
+    def __init__(self, fetch_rates, record_type, ttl_seconds=DEFAULT_TTL_SECONDS, snapshot_path=DEFAULT_SNAPSHOT_PATH,
+                 on_refresh=None, label="MMF rates"):
+        self.fetch_rates = fetch_rates
+        self.record_type = record_type
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_path = snapshot_path
+        self.on_refresh = on_refresh
+        self.label = label
+
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._rates = None
+        self._fetched_at = 0.0
+        self._snapshot_checked = False
+        self._last_refresh_failed = False
+        self._validators = {}
+        self._snapshot_mtime = 0.0  # of the snapshot file as we last wrote or read it
+
+    def get_rates(self):
+        return self.get_snapshot().rates
+
+    def get_snapshot(self):
+        with self._lock:
+            if self._rates is None and not self._snapshot_checked:
+                self._load_snapshot()
+            rates = self._rates
+
+        if rates is None:
+            # Nothing cached anywhere yet, so this caller has to wait for the network
+            self.refresh()
+        elif time.time() - self._fetched_at >= self.ttl_seconds:
+            self._refresh_in_background()
+
+        with self._lock:
+            expired = time.time() - self._fetched_at >= self.ttl_seconds
+            return RateSnapshot(self._rates, self._fetched_at, expired or self._last_refresh_failed)
+
+    def refresh(self):
+        # Fetch now and update both caches. Keeps the previous rates on failure.
+        if self._adopt_newer_snapshot():
+            return self._rates
+        with self._lock:
+            validators = dict(self._validators) if self._rates is not None else {}
+        try:
+            rates, validators = self.fetch_rates(validators)
+        except Exception as e:
+            print(f"Could not refresh {self.label}: {e}", file=sys.stderr)
+            rates = validators = None
+
+        changed = bool(rates)
+        with self._lock:
+            if rates is None and validators is not None and self._rates is not None:
+                # 304 Not Modified: the cached rates are still current, just renew them
+                rates = self._rates
+                validators = validators or self._validators
+            elif not rates:
+                # An empty table means the page layout changed or the scrape failed; don't cache it
+                self._last_refresh_failed = True
+                return self._rates
+
+            fetched_at = time.time()
+            self._rates = rates
+            self._fetched_at = fetched_at
+            self._last_refresh_failed = False
+            self._validators = validators or {}
+
+        self._save_snapshot(rates, fetched_at, validators)
+        if changed and self.on_refresh is not None:
+            try:
+                self.on_refresh(rates, fetched_at)
+            except Exception as e:
+                print(f"Error recording refreshed {self.label}: {e}", file=sys.stderr)
+        return rates
+
+    def peek(self):
+        # The cached rates as a RateSnapshot (rates None if there are none), without fetching anything
+        with self._lock:
+            if self._rates is None and not self._snapshot_checked:
+                self._load_snapshot()
+            expired = time.time() - self._fetched_at >= self.ttl_seconds
+            return RateSnapshot(self._rates, self._fetched_at, expired or self._last_refresh_failed)
+
+    def wait_for_refresh(self, timeout=None):
+        # Blocks until a background refresh (if one is running) has finished
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return  # a refresh is already running
+            self._refresh_thread = threading.Thread(target=self.refresh, name=f"{self.label} refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def _adopt_newer_snapshot(self):
+        # Several processes (service.py workers) can share one snapshot file. If
+        # another one has saved rates newer than ours and still fresh, use those
+        # instead of fetching again.
+        if not self.snapshot_path:
+            return False
+        try:
+            modified = os.path.getmtime(self.snapshot_path)
+        except OSError:
+            return False
+        if self._rates is None or modified <= self._snapshot_mtime:
+            return False
+        snapshot = self._read_snapshot()
+        with self._lock:
+            self._snapshot_mtime = modified
+            if not snapshot or snapshot[1] <= self._fetched_at or time.time() - snapshot[1] >= self.ttl_seconds:
+                return False
+            self._rates, self._fetched_at, self._validators = snapshot
+            self._last_refresh_failed = False
+            return True
+
+    def _load_snapshot(self):
+        # Called with the lock held
+        self._snapshot_checked = True
+        try:
+            self._snapshot_mtime = os.path.getmtime(self.snapshot_path)
+        except (OSError, TypeError):
+            pass
+        snapshot = self._read_snapshot()
+        if snapshot:
+            self._rates, self._fetched_at, self._validators = snapshot
+
+    def _read_snapshot(self):
+        # (rates, fetched_at, validators) from the snapshot file, or None
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            rates = [self.record_type(**row) for row in snapshot["rates"]]
+            return rates, float(snapshot["fetched_at"]), snapshot.get("validators") or {}
+        except (IOError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable {self.label} snapshot {self.snapshot_path}: {e}", file=sys.stderr)
+            return None
+
+    def _save_snapshot(self, rates, fetched_at, validators=None):
+        if not self.snapshot_path:
+            return
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                rows = [rate._asdict() for rate in rates]
+                json.dump({"fetched_at": fetched_at, "validators": validators or {}, "rates": rows}, f)
+            os.replace(tmp_path, self.snapshot_path)  # atomic, readers never see a half-written file
+            self._snapshot_mtime = os.path.getmtime(self.snapshot_path)
+        except (IOError, OSError) as e:
+            print(f"Error saving {self.label} snapshot: {e}", file=sys.stderr)
@@ -0,0 +1,264 @@
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+import metrics
+from mmf_parser import MMFRate
+from rate_provider import RateSnapshot
+
+# One background refresher for every process on the host. Without it each
+# Streamlit server process (and service.py worker) scrapes money.ke itself once
+# its copy of the rates expires. Instead a single refresher scrapes on a
+# schedule and publishes the parsed table to a small binary file; the workers
+# memory-map it, so they all read the same page-cache pages and never wait on
+# the network in a request.
+#
+#   python rate_refresher.py --interval 300            # sidecar next to the workers
+#   SMG_SHARED_RATES=mmf_rates.bin streamlit run gui.py
+#
+# With SMG_SHARED_RATES set, investment.get_rate_snapshot reads the published
+# table instead of fetching. A table is published by writing a new file and
+# os.replace-ing it over the old one, so readers see either the old version
+# or the new one, never a mix. Each version carries a generation number.
+# Only one refresher publishes to a path at a time (an flock on PATH.lock);
+# any others started stand by and take over if it exits.
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mmf_rates.bin")
+
+# Scrape this often; readers treat the table as stale once it is older than the provider's TTL
+DEFAULT_INTERVAL_SECONDS = 5 * 60
+
+MAGIC = b"SMGR"
+FORMAT_VERSION = 1
+
+# magic, format version, generation, fetched_at, ttl_seconds, flags, row count
+HEADER = struct.Struct("<4sIQddII")
+# rate, fee, min_deposit (NaN for None), name offset and length in the names block
+ROW = struct.Struct("<dddII")
+
+# Set when the rates were already stale at publishing, e.g. the last scrape failed
+FLAG_STALE = 1
+
+
+def _optional(value):
+    return math.nan if value is None else float(value)
+
+
+def _from_optional(value):
+    return None if math.isnan(value) else value
+
+
+def encode_table(rates, fetched_at, ttl_seconds, generation, stale=False):
+    # Header, then one fixed-size row per fund, then the UTF-8 names
+    names = [rate.name.encode("utf-8") for rate in rates]
+    rows = bytearray()
+    offset = 0
+    for rate, name in zip(rates, names):
+        rows += ROW.pack(float(rate.rate), _optional(rate.fee), _optional(rate.min_deposit), offset, len(name))
+        offset += len(name)
+    flags = FLAG_STALE if stale else 0
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, generation, fetched_at, ttl_seconds, flags, len(rates))
+    return header + bytes(rows) + b"".join(names)
+
+
+def decode_table(buffer):
+    # (generation, RateSnapshot, ttl_seconds) from an encoded table; raises ValueError if it isn't one
+    if len(buffer) < HEADER.size:
+        raise ValueError("truncated header")
+    magic, version, generation, fetched_at, ttl_seconds, flags, count = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"not a version {FORMAT_VERSION} rate table")
+    names_start = HEADER.size + count * ROW.size
+    if len(buffer) < names_start:
+        raise ValueError("truncated rows")
+    rates = []
+    for rate, fee, min_deposit, offset, length in ROW.iter_unpack(buffer[HEADER.size:names_start]):
+        name = bytes(buffer[names_start + offset:names_start + offset + length]).decode("utf-8")
+        rates.append(MMFRate(name, rate, _from_optional(fee), _from_optional(min_deposit)))
+    stale = bool(flags & FLAG_STALE) or time.time() - fetched_at >= ttl_seconds
+    return generation, RateSnapshot(rates, fetched_at, stale), ttl_seconds
+
+
+def publish(path, snapshot, ttl_seconds, generation):
+    # Atomically replaces the table at `path`: readers see the old version or the new one
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_table(snapshot.rates, snapshot.fetched_at, ttl_seconds, generation, snapshot.stale))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SharedRateTable:
+    """Reader for a table published by RateRefresher. Never touches the network.
+
+    get_snapshot() stats the file on each call and maps and decodes it again only
+    when a new version has been swapped in. Before the first table is published
+    it returns an empty, stale snapshot.
+    """
+
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        self.path = path
+        self.generation = None
+        self._lock = threading.Lock()
+        self._file_key = None
+        self._snapshot = RateSnapshot([], 0.0, True)
+        self._ttl_seconds = 0.0
+
+    def get_snapshot(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return RateSnapshot([], 0.0, True)
+        file_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if file_key != self._file_key:
+                self._load(file_key)
+            rates, fetched_at, stale = self._snapshot
+            if not stale and time.time() - fetched_at >= self._ttl_seconds:
+                stale = True  # the refresher has stopped publishing
+            return RateSnapshot(rates, fetched_at, stale)
+
+    def _load(self, file_key):
+        # Called with the lock held. A table that can't be read keeps the previous one.
+        try:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    generation, snapshot, ttl_seconds = decode_table(view)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ignoring unreadable shared rate table {self.path}: {e}", file=sys.stderr)
+            return
+        self._file_key = file_key
+        if generation != self.generation:
+            self.generation = generation
+            self._snapshot = snapshot
+            self._ttl_seconds = ttl_seconds
+            metrics.inc("smg_rate_table_loads_total")
+
+
+class RateRefresher:
+    """Scrapes MMF rates every `interval` seconds and publishes them to `path`.
+
+    `provider` is a rate_provider.RateProvider; by default the one in
+    investment.py, so the refresher sends money.ke the stored ETag /
+    Last-Modified, keeps the JSON snapshot and records rate history. run()
+    blocks (a sidecar process); start() runs it in a daemon thread.
+    """
+
+    def __init__(self, path=DEFAULT_TABLE_PATH, interval=DEFAULT_INTERVAL_SECONDS, provider=None):
+        if provider is None:
+            from investment import rate_provider as provider
+        self.path = path
+        self.interval = interval
+        self.provider = provider
+        self.generation = None  # of the last table published; read from `path` on first use
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        # One scrape (a 304 just renews the current rates) and one publish; returns the snapshot published
+        self.provider.refresh()
+        snapshot = self.provider.peek()
+        if not snapshot.rates:
+            return None  # nothing to publish yet; readers keep whatever table they have
+        self._publish(snapshot)
+        metrics.inc("smg_rate_table_publishes_total", result="stale" if snapshot.stale else "ok")
+        return snapshot
+
+    def run(self):
+        with self._publisher_lock():
+            if self._stop.is_set():
+                return
+            # Publish the last good rates from the JSON snapshot straight away, then scrape
+            cached = self.provider.peek()
+            if cached.rates:
+                self._publish(RateSnapshot(cached.rates, cached.fetched_at, True))
+            while not self._stop.is_set():
+                started = time.monotonic()
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"Could not publish MMF rates to {self.path}: {e}")
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="mmf-rate-refresher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _publish(self, snapshot):
+        if self.generation is None:
+            # Carry on from the generation already on disk, so a restarted refresher still counts up
+            table = SharedRateTable(self.path)
+            table.get_snapshot()
+            self.generation = table.generation or 0
+        self.generation += 1
+        publish(self.path, snapshot, self.provider.ttl_seconds, self.generation)
+
+    def _publisher_lock(self):
+        # Exclusive flock on PATH.lock, held while publishing. Waits (in standby) while another
+        # refresher holds it. Without fcntl (Windows) there is no lock and every refresher publishes.
+        import contextlib
+        try:
+            import fcntl
+        except ImportError:
+            return contextlib.nullcontext()
+
+        @contextlib.contextmanager
+        def held():
+            with open(f"{self.path}.lock", "a") as lock_file:
+                announced = False
+                while True:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if not announced:
+                            print(f"Another refresher is publishing to {self.path}; standing by.")
+                            announced = True
+                        if self._stop.wait(1.0):
+                            yield
+                            return
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return held()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape MMF rates on a schedule and publish them for every worker process")
+    parser.add_argument("--path", default=os.environ.get("SMG_SHARED_RATES", DEFAULT_TABLE_PATH),
+                        help="table to publish (what the workers' SMG_SHARED_RATES points at)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SECONDS, help="seconds between scrapes")
+    parser.add_argument("--once", action="store_true", help="scrape and publish once, then exit")
+    args = parser.parse_args(argv)
+
+    refresher = RateRefresher(os.path.abspath(args.path), args.interval)
+    if args.once:
+        snapshot = refresher.run_once()
+        if snapshot is None:
+            print("No MMF rates to publish.")
+            return 1
+        print(f"Published {len(snapshot.rates)} MMF rates to {refresher.path}.")
+        return 0
+    print(f"Publishing MMF rates to {refresher.path} every {args.interval:g}s", flush=True)
+    try:
+        refresher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
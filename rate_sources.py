@@ -0,0 +1,193 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from mmf_parser import parse_mmf_rates, parse_rate, parse_rate_table
+from recommendations import ASSET_CLASS_LABELS
+
+# Rates for every asset class we can suggest, fetched concurrently. Each source
+# is a URL plus a parser; they are all fetched at once on worker threads with
+# their own deadline, so a full refresh takes as long as the slowest source
+# instead of the sum of all of them, and a source that hangs or fails only
+# drops its own quotes. Every source's URL can be pointed at stub_server.py
+# (SMG_*_URL) to exercise it against a local fixture.
+
+# One investable rate. `rate` and `fee` are annual percentages like MMFRate's,
+# `min_deposit` is in KES and `term_months` is the lock-in (None for MMFs).
+RateQuote = namedtuple(
+    "RateQuote",
+    ["asset_class", "name", "rate", "source", "fee", "min_deposit", "term_months"],
+    defaults=(None, None, None)
+)
+
+# asset_class -> display label
+ASSET_CLASSES = ASSET_CLASS_LABELS
+
+DEFAULT_SOURCE_DEADLINE = 8.0  # seconds per source, retries included
+
+SOURCE_URLS = {
+    "mmf": os.environ.get("SMG_MMF_URL", "https://money.ke/mmf-rates/"),
+    "tbill": os.environ.get("SMG_TBILL_URL", "https://money.ke/t-bills/"),
+    "bond": os.environ.get("SMG_BOND_URL", "https://money.ke/bonds/"),
+    "bank_deposit": os.environ.get("SMG_DEPOSIT_URL", "https://money.ke/fixed-deposits/"),
+}
+
+# (quotes, fetched_at, errors); `errors` maps a source name to why it has no quotes
+QuoteTable = namedtuple("QuoteTable", ["quotes", "fetched_at", "errors"])
+
+
+def parse_amount(text):
+    # "KES 100,000" -> 100000.0; None if there is no number
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", text)
+    return float(match.group().replace(",", "")) if match else None
+
+
+def parse_term_months(text):
+    # "91-Day" -> 3, "6 Months" -> 6, "10 Years" -> 120
+    amount = parse_amount(text)
+    if amount is None:
+        return None
+    lowered = text.lower()
+    if "day" in lowered:
+        return max(1, round(amount / 30.4))
+    if "year" in lowered:
+        return round(amount * 12)
+    return round(amount)
+
+
+def parse_mmf_quotes(html):
+    return [RateQuote("mmf", fund.name, fund.rate, "money.ke", fund.fee, fund.min_deposit) for fund in parse_mmf_rates(html)]
+
+
+def _tbill_row(cells):
+    # Tenor | Interest Rate | Previous Rate | Change
+    if len(cells) < 2 or parse_rate(cells[1]) is None:
+        return None
+    return RateQuote("tbill", f"{cells[0]} T-Bill", parse_rate(cells[1]), "money.ke", term_months=parse_term_months(cells[0]))
+
+
+def _bond_row(cells):
+    # Issue No. | Tenor | Coupon Rate | Average Yield; a bond held to maturity earns its yield
+    if len(cells) < 3:
+        return None
+    rate = parse_rate(cells[3]) if len(cells) > 3 else None
+    if rate is None:
+        rate = parse_rate(cells[2])
+    if not cells[0] or rate is None:
+        return None
+    return RateQuote("bond", f"{cells[0]} ({cells[1]})", rate, "money.ke", term_months=parse_term_months(cells[1]))
+
+
+def _deposit_row(cells):
+    # Bank | Interest Rate | Minimum Deposit | Term
+    if len(cells) < 2 or not cells[0] or parse_rate(cells[1]) is None:
+        return None
+    min_deposit = parse_amount(cells[2]) if len(cells) > 2 else None
+    term_months = parse_term_months(cells[3]) if len(cells) > 3 else None
+    return RateQuote("bank_deposit", f"{cells[0]} Fixed Deposit", parse_rate(cells[1]), "money.ke",
+                     min_deposit=min_deposit, term_months=term_months)
+
+
+def parse_tbill_quotes(html):
+    return parse_rate_table(html, _tbill_row)
+
+
+def parse_bond_quotes(html):
+    return parse_rate_table(html, _bond_row)
+
+
+def parse_deposit_quotes(html):
+    return parse_rate_table(html, _deposit_row)
+
+
+class RateSource:
+    """One place rates come from: a URL, a parser for its page and a deadline.
+
+    Each source gets its own Fetcher, so its retries and circuit breaker are
+    independent of the others. Subclass and override `fetch` for sources that
+    aren't a single page.
+    """
+
+    def __init__(self, name, url, parse, deadline=DEFAULT_SOURCE_DEADLINE, fetcher=None):
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.deadline = deadline
+        self._fetcher = fetcher
+
+    @property
+    def fetcher(self):
+        if self._fetcher is None:
+            from fetch import Fetcher
+            self._fetcher = Fetcher(deadline=self.deadline)
+        return self._fetcher
+
+    def fetch(self):
+        # Blocking; returns a list of RateQuote or raises
+        return self.parse(self.fetcher.get(self.url))
+
+    def __repr__(self):
+        return f"RateSource({self.name!r}, {self.url!r})"
+
+
+def default_sources(include_mmf=True, deadline=DEFAULT_SOURCE_DEADLINE):
+    sources = [
+        RateSource("tbill", SOURCE_URLS["tbill"], parse_tbill_quotes, deadline),
+        RateSource("bond", SOURCE_URLS["bond"], parse_bond_quotes, deadline),
+        RateSource("bank_deposit", SOURCE_URLS["bank_deposit"], parse_deposit_quotes, deadline),
+    ]
+    if include_mmf:
+        sources.insert(0, RateSource("mmf", SOURCE_URLS["mmf"], parse_mmf_quotes, deadline))
+    return sources
+
+
+async def _fetch_source(source, executor):
+    # The fetch runs on a worker thread; wait_for stops waiting at the deadline
+    # even if the thread itself is still blocked on the network
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(executor, source.fetch), source.deadline)
+
+
+async def gather_quotes(sources):
+    """Fetch every source concurrently and merge their quotes into one QuoteTable."""
+    # A pool of our own, so a source stuck past its deadline isn't waited for on the way out
+    executor = ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix="rate-source")
+    try:
+        with metrics.span("fetch_quotes"):
+            results = await asyncio.gather(*(_fetch_source(source, executor) for source in sources), return_exceptions=True)
+    finally:
+        executor.shutdown(wait=False)
+    quotes = []
+    errors = {}
+    for source, result in zip(sources, results):
+        if isinstance(result, asyncio.TimeoutError):
+            errors[source.name] = f"no answer within {source.deadline}s"
+            metrics.inc("smg_rate_fetches_total", source=source.name, result="timeout")
+        elif isinstance(result, BaseException):
+            errors[source.name] = str(result) or type(result).__name__
+            metrics.inc("smg_rate_fetches_total", source=source.name, result="error")
+        else:
+            quotes.extend(result)
+            metrics.inc("smg_rate_fetches_total", source=source.name, result="ok")
+    return QuoteTable(quotes, time.time(), errors)
+
+
+def fetch_quotes(sources=None):
+    # Blocking entry point. Runs its own event loop on a helper thread when the
+    # caller is already inside one (asyncio.run can't nest).
+    sources = default_sources() if sources is None else sources
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(gather_quotes(sources))
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(asyncio.run(gather_quotes(sources))))
+    thread.start()
+    thread.join()
+    return result[0]
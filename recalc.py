@@ -0,0 +1,152 @@
+import metrics
+
+# Incremental recalculation. A Graph holds input values and derived nodes
+# (a function of other nodes); get() recomputes a node only when one of its
+# dependencies actually changed since it was last computed, and a node whose
+# recomputed value equals the old one doesn't invalidate what depends on it.
+# So editing an expense row re-adds the expenses and rebuilds the breakdown
+# and suggestion list, but leaves the tax, ranking and fund projections alone.
+#
+#   plan = financial_plan()
+#   plan.update(gross_salary=150000, fixed_expenses={"Rent": 30000}, ...)
+#   plan.get("breakdown"), plan.get("suggestions")
+
+_UNSET = object()
+
+
+class _Node:
+    __slots__ = ("name", "deps", "fn", "phase", "value", "changed_at", "verified_at")
+
+    def __init__(self, name, deps=(), fn=None, phase=None, value=_UNSET):
+        self.name = name
+        self.deps = tuple(deps)
+        self.fn = fn  # None for inputs
+        self.phase = phase
+        self.value = value
+        self.changed_at = 0   # revision in which the value last changed
+        self.verified_at = -1  # revision in which the value was last known to be current
+
+
+def _same(a, b):
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+class Graph:
+    """Inputs and derived nodes, recomputed lazily and only when their inputs change."""
+
+    def __init__(self):
+        self._nodes = {}
+        self._revision = 0
+        self.recomputed = {}  # node name -> how many times it has been computed
+
+    def input(self, name, value=_UNSET):
+        self._nodes[name] = _Node(name, value=value)
+
+    def node(self, name, deps, fn, phase=None):
+        # `fn` is called with the values of `deps`, in order; `phase` times it as a metrics span
+        for dep in deps:
+            if dep not in self._nodes:
+                raise KeyError(f"Node {name!r} depends on unknown node {dep!r}")
+        self._nodes[name] = _Node(name, deps, fn, phase)
+
+    def set(self, name, value):
+        node = self._nodes[name]
+        if node.fn is not None:
+            raise ValueError(f"{name!r} is computed, not an input")
+        if node.value is not _UNSET and _same(node.value, value):
+            return False
+        self._revision += 1
+        node.value = value
+        node.changed_at = self._revision
+        return True
+
+    def update(self, **values):
+        # Sets several inputs; returns the names that actually changed
+        return [name for name, value in values.items() if self.set(name, value)]
+
+    def get(self, name):
+        node = self._nodes[name]
+        if node.fn is None:
+            if node.value is _UNSET:
+                raise ValueError(f"Input {name!r} has not been set")
+            return node.value
+        if node.verified_at == self._revision:
+            return node.value
+
+        args = [self.get(dep) for dep in node.deps]
+        if node.value is _UNSET or any(self._nodes[dep].changed_at > node.verified_at for dep in node.deps):
+            if node.phase:
+                with metrics.span(node.phase):
+                    value = node.fn(*args)
+            else:
+                value = node.fn(*args)
+            self.recomputed[name] = self.recomputed.get(name, 0) + 1
+            metrics.inc("smg_recalc_nodes_total", node=name)
+            if node.value is _UNSET or not _same(node.value, value):
+                node.value = value
+                node.changed_at = self._revision
+        node.verified_at = self._revision
+        return node.value
+
+    def dirty(self):
+        # Derived nodes that the next get() would have to recompute
+        return [name for name, node in self._nodes.items() if node.fn is not None and self._stale(node)]
+
+    def _stale(self, node):
+        if node.fn is None:
+            return False
+        if node.value is _UNSET:
+            return True
+        return any(
+            self._nodes[dep].changed_at > node.verified_at or self._stale(self._nodes[dep])
+            for dep in node.deps
+        )
+
+
+def financial_plan(as_of=None):
+    """The tax and investment pipeline of main.py and gui.py as a Graph.
+
+    Inputs: gross_salary, fixed_expenses (dict), savings_goal_amount,
+    savings_goal_timeframe_months, rates (a RateSnapshot), other_quotes
+    (RateQuotes or None), ranking_key and top_n. Outputs: "breakdown", the
+    tax.calculate_net_income result, and "suggestions", the
+    investment.suggest_investments result.
+    """
+    from investment import (assemble_suggestions, goal_monthly_deposit, goal_progress, project_mmfs,
+                            rank_across_assets, rank_mmfs)
+    from records import WarningNotice
+    from tax import calculate_kra_paye, net_income_breakdown
+
+    plan = Graph()
+    for name in ("gross_salary", "fixed_expenses", "savings_goal_amount", "savings_goal_timeframe_months", "rates"):
+        plan.input(name)
+    plan.input("other_quotes", None)
+    plan.input("ranking_key", "rate")
+    plan.input("top_n", 5)
+
+    # salary -> statutory deductions; expenses -> totals
+    plan.node("statutory", ["gross_salary"], lambda gross: calculate_kra_paye(gross, as_of), phase="tax")
+    plan.node("total_expenses", ["fixed_expenses"], lambda expenses: sum(expenses.values()))
+    plan.node("breakdown", ["gross_salary", "statutory", "total_expenses"], net_income_breakdown)
+    plan.node("remaining", ["breakdown"], lambda breakdown: breakdown.remaining_for_savings_investment)
+
+    # goal -> deposit -> projections; rates -> ranking
+    plan.node("monthly_deposit", ["savings_goal_amount", "savings_goal_timeframe_months"], goal_monthly_deposit)
+    plan.node("progress", ["remaining", "savings_goal_amount", "savings_goal_timeframe_months", "monthly_deposit"], goal_progress)
+    plan.node("ranking", ["rates", "ranking_key", "top_n"], lambda rates, key, k: rank_mmfs(rates.rates, k, key))
+    plan.node("projections", ["ranking", "monthly_deposit", "savings_goal_amount", "savings_goal_timeframe_months"], project_mmfs)
+    plan.node("cross_asset", ["rates", "other_quotes", "monthly_deposit", "savings_goal_timeframe_months", "top_n", "ranking_key"],
+              lambda rates, quotes, deposit, months, k, key: rank_across_assets(rates.rates, quotes, deposit, months, k, key) if quotes else None)
+
+    def suggestions(remaining, progress, rates, projections, cross_asset):
+        if remaining <= 0:
+            return [WarningNotice("No funds available for investment after expenses.")]
+        return assemble_suggestions(progress, rates, projections, cross_asset)
+
+    plan.node("suggestions", ["remaining", "progress", "rates", "projections", "cross_asset"], suggestions, phase="recommend")
+    return plan
@@ -0,0 +1,68 @@
+# Formatting of investment recommendations. Kept free of any UI imports so the
+# CLI, batch jobs and the Streamlit app can all use it.
+from functools import singledispatch
+
+from records import ErrorNotice, FundSuggestion, Header, Highlight, InfoNotice, QuoteSuggestion, WarningNotice
+
+# Display labels for RateQuote.asset_class (rate_sources.py)
+ASSET_CLASS_LABELS = {
+    "mmf": "Money Market Fund",
+    "tbill": "Treasury Bill",
+    "bond": "Treasury Bond",
+    "bank_deposit": "Fixed Deposit",
+}
+
+def suggest_best_mmf(top_mmfs):
+    # Highlight for the first of investment.project_mmfs' FundSuggestions
+    if not top_mmfs:
+        return ErrorNotice("No MMF data available to make a recommendation.")
+    best = top_mmfs[0]
+    message = (
+        f"✅ **Top Recommendation:** {best.name} "
+        f"with an annual rate of **{best.rate:.2f}%**.\n\n"
+        f"You'll earn approximately **KES {best.interest_earned:,.2f}** "
+        f"in interest over your savings period, bringing your total to "
+        f"**KES {best.projected_return:,.2f}**."
+    )
+    if best.required_deposit is not None:
+        message += (
+            f"\n\nWith the interest included, depositing **KES {best.required_deposit:,.2f}** "
+            f"a month is enough to reach your goal in this fund."
+        )
+    return Highlight(message)
+
+@singledispatch
+def format_suggestion_text(suggestion):
+    # Plain-text line for a suggestion, as used in reports and exports
+    return None
+
+@format_suggestion_text.register
+def _(suggestion: Header):
+    return f"== {suggestion.message} =="
+
+@format_suggestion_text.register
+def _(suggestion: InfoNotice):
+    return f"[INFO] {suggestion.message}"
+
+@format_suggestion_text.register
+def _(suggestion: WarningNotice):
+    return f"[WARNING] {suggestion.message}"
+
+@format_suggestion_text.register
+def _(suggestion: ErrorNotice):
+    return f"[ERROR] {suggestion.message}"
+
+@format_suggestion_text.register
+def _(suggestion: FundSuggestion):
+    return f"{suggestion.name} - Rate: {suggestion.rate:.2f}%, Projected Return: KES {suggestion.projected_return:,.2f}"
+
+@format_suggestion_text.register
+def _(suggestion: QuoteSuggestion):
+    return (
+        f"{suggestion.name} ({ASSET_CLASS_LABELS.get(suggestion.asset_class, suggestion.asset_class)}) - "
+        f"Rate: {suggestion.rate:.2f}%, Projected Return: KES {suggestion.projected_return:,.2f}"
+    )
+
+@format_suggestion_text.register
+def _(suggestion: Highlight):
+    return f"💡 {suggestion.message}"
@@ -0,0 +1,142 @@
+from collections import namedtuple
+
+# Records passed between the tax, investment and presentation layers. They are
+# namedtuples, like MMFRate and RateQuote: no per-instance dict, so a
+# breakdown takes about a third of the memory of the dict it replaces.
+# Suggestions are one record type per kind of suggestion, so presentation
+# code dispatches on the type (functools.singledispatch) rather than
+# comparing "type" strings. as_dict() gives the JSON shape the
+# batch runner and HTTP service have always written, "type" key included.
+
+# tax.calculate_kra_paye
+Deductions = namedtuple("Deductions", ["paye_tax", "sha", "nssf", "total_statutory_deductions"])
+
+# tax.calculate_net_income
+Breakdown = namedtuple("Breakdown", [
+    "gross_salary",
+    "paye_tax",
+    "sha_deduction",
+    "nssf_deduction",
+    "total_statutory_deductions",
+    "net_salary_after_tax",
+    "total_fixed_expenses",
+    "remaining_for_savings_investment",
+])
+
+
+# --- suggestions (investment.suggest_investments) ---
+
+class InfoNotice(namedtuple("InfoNotice", ["message"])):
+    __slots__ = ()
+    type = "info"
+
+
+class WarningNotice(namedtuple("WarningNotice", ["message"])):
+    __slots__ = ()
+    type = "warning"
+
+
+class ErrorNotice(namedtuple("ErrorNotice", ["message"])):
+    __slots__ = ()
+    type = "error"
+
+
+class Header(namedtuple("Header", ["message"])):
+    __slots__ = ()
+    type = "header"
+
+
+class Highlight(namedtuple("Highlight", ["message"])):
+    # The top recommendation, as a sentence
+    __slots__ = ()
+    type = "highlight"
+
+
+class FundSuggestion(namedtuple("FundSuggestion", [
+        "name", "rate", "total_deposits", "interest_earned", "projected_return", "required_deposit"])):
+    # One MMF projected over the savings period. `rate` is in percent;
+    # `required_deposit` is the monthly deposit that reaches the goal in this fund, if there is a goal.
+    __slots__ = ()
+    type = "mmf"
+
+
+class QuoteSuggestion(namedtuple("QuoteSuggestion", [
+        "asset_class", "name", "rate", "term_months", "total_deposits", "interest_earned", "projected_return"])):
+    # Any asset class (rate_sources.RateQuote) projected like an MMF; `rate` is in percent
+    __slots__ = ()
+    type = "quote"
+
+
+SUGGESTION_TYPES = {cls.type: cls for cls in (
+    InfoNotice, WarningNotice, ErrorNotice, Header, Highlight, FundSuggestion, QuoteSuggestion)}
+
+
+def as_dict(record):
+    # Plain dict of a record, with the "type" key for suggestions
+    kind = getattr(type(record), "type", None)
+    if not kind:
+        return dict(zip(record._fields, record))
+    result = {"type": kind}
+    result.update(zip(record._fields, record))
+    return result
+
+
+def suggestion_from_dict(data):
+    # Inverse of as_dict for suggestions; missing optional fields default to None
+    cls = SUGGESTION_TYPES[data["type"]]
+    return cls(*(data.get(field) for field in cls._fields))
+
+
+# --- columnar containers for batches (payroll.py) ---
+
+class DeductionColumns(namedtuple("DeductionColumns", Deductions._fields)):
+    # Deductions with one float64 array per field
+    __slots__ = ()
+
+    def row(self, i):
+        return Deductions(*(float(column[i]) for column in self))
+
+
+class BreakdownColumns(namedtuple("BreakdownColumns", Breakdown._fields)):
+    # Breakdown with one float64 array per field
+    __slots__ = ()
+
+    @property
+    def size(self):
+        return len(self.gross_salary)
+
+    def row(self, i):
+        return Breakdown(*(float(column[i]) for column in self))
+
+    def rows(self):
+        for values in zip(*(column.tolist() for column in self)):
+            yield Breakdown(*values)
+
+
+# annual_payroll.calculate_annual_payroll: one (employees, 12) float64 array per field
+class PayrollMonths(namedtuple("PayrollMonths", [
+        "gross_pay", "paye_tax", "sha", "nssf", "total_statutory_deductions", "net_pay"])):
+    __slots__ = ()
+
+    @property
+    def size(self):
+        return len(self.gross_pay)
+
+    def summary(self):
+        # Year totals per employee, as an AnnualSummary of 1-D arrays
+        return AnnualSummary(*(column.sum(axis=1) for column in self))
+
+
+# Year-end totals (P9) per employee
+AnnualSummary = namedtuple("AnnualSummary", PayrollMonths._fields)
+
+
+# whatif.SalaryCurve.evaluate: one float64 array per field, one entry per salary
+WhatIfColumns = namedtuple("WhatIfColumns", [
+    "gross_salary",
+    "net_salary_after_tax",
+    "total_statutory_deductions",
+    "remaining_for_savings_investment",
+    "marginal_rate",
+    "effective_rate",
+])
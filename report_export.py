@@ -0,0 +1,291 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from recommendations import format_suggestion_text
+from records import FundSuggestion
+
+# Report export without pandas: rows are generated lazily and streamed straight
+# into the writer, so memory stays flat however long the expense list or the
+# projection is. Excel files written to disk use xlsxwriter's constant_memory
+# mode. export_batch fans a whole payroll of profiles out across processes.
+
+FORMATS = ("xlsx", "csv", "parquet")
+
+BREAKDOWN_SHEET = "Financial Breakdown"
+SUGGESTIONS_SHEET = "Investment Suggestions"
+PROJECTION_SHEET = "Monthly Projection"
+
+# Columns of the flat (CSV / Parquet) layout
+FLAT_COLUMNS = ["section", "item", "month", "amount_kes"]
+
+
+def breakdown_rows(financial_breakdown, user_data):
+    # (category, amount) in report order, fixed expenses listed before their total
+    yield "Gross Salary", financial_breakdown.gross_salary
+    yield "PAYE Tax", financial_breakdown.paye_tax
+    yield "SHA Deduction", financial_breakdown.sha_deduction
+    yield "NSSF Deduction", financial_breakdown.nssf_deduction
+    yield "Total Statutory Deductions", financial_breakdown.total_statutory_deductions
+    yield "Net Salary (After Tax & Deductions)", financial_breakdown.net_salary_after_tax
+    for category, amount in user_data.get("fixed_monthly_expenses", {}).items():
+        yield f"  - {category} (Fixed Expense)", amount
+    yield "Total Fixed Expenses", financial_breakdown.total_fixed_expenses
+    yield "Remaining for Savings & Investment", financial_breakdown.remaining_for_savings_investment
+
+
+def suggestion_lines(investment_suggestions):
+    for suggestion in investment_suggestions:
+        text = format_suggestion_text(suggestion)
+        if text is not None:
+            yield text
+
+
+def projection_table(investment_suggestions, user_data):
+    # (headers, rows) for the month-by-month balance of each suggested fund, or None
+    mmfs = [s for s in investment_suggestions if isinstance(s, FundSuggestion)]
+    savings_goals = user_data.get("savings_goals", {})
+    months = int(savings_goals.get("timeframe_months", 0) or 0)
+    if not mmfs or months < 1:
+        return None
+
+    from projection import project_schedules
+    schedule = project_schedules([m.rate / 100 for m in mmfs], savings_goals.get("target_amount", 0) / months, months)
+    headers = ["Month", "Total Deposits (KES)"] + [f"{m.name} (KES)" for m in mmfs]
+    balance = schedule["balance"]
+
+    def rows():
+        for t in range(months):
+            yield [t + 1, float(schedule["total_deposits"][t])] + [float(v) for v in balance[:, t]]
+
+    return headers, rows()
+
+
+def write_xlsx(target, financial_breakdown, investment_suggestions, user_data):
+    """Write the report workbook to a path or a binary file object.
+
+    Paths are written in constant_memory mode (rows are flushed as they are
+    written); file objects, e.g. a BytesIO for a download, are built in memory.
+    """
+    import xlsxwriter
+
+    options = {"constant_memory": True} if isinstance(target, (str, os.PathLike)) else {"in_memory": True}
+    workbook = xlsxwriter.Workbook(target, options)
+    try:
+        bold = workbook.add_format({"bold": True})
+        money = workbook.add_format({"num_format": "#,##0.00"})
+
+        sheet = workbook.add_worksheet(BREAKDOWN_SHEET)
+        sheet.set_column(0, 0, 40)
+        sheet.set_column(1, 1, 16)
+        row = 0
+        if user_data.get("name"):
+            sheet.write_string(0, 0, f"Report for: {user_data['name']}")
+            row = 2
+        sheet.write_row(row, 0, ["Category", "Amount (KES)"], bold)
+        for category, amount in breakdown_rows(financial_breakdown, user_data):
+            row += 1
+            sheet.write_string(row, 0, category)
+            sheet.write_number(row, 1, amount, money)
+
+        sheet = workbook.add_worksheet(SUGGESTIONS_SHEET)
+        sheet.set_column(0, 0, 100)
+        sheet.write_string(0, 0, "Investment Suggestions", bold)
+        for row, text in enumerate(suggestion_lines(investment_suggestions), start=1):
+            sheet.write_string(row, 0, text)
+
+        table = projection_table(investment_suggestions, user_data)
+        if table is not None:
+            headers, rows = table
+            sheet = workbook.add_worksheet(PROJECTION_SHEET)
+            sheet.set_column(1, len(headers) - 1, 20, money)
+            sheet.write_row(0, 0, headers, bold)
+            for row, values in enumerate(rows, start=1):
+                sheet.write_row(row, 0, values)
+    finally:
+        workbook.close()
+
+
+def flat_rows(financial_breakdown, investment_suggestions, user_data):
+    # The whole report as (section, item, month, amount_kes) rows
+    if user_data.get("name"):
+        yield "report", f"Report for: {user_data['name']}", None, None
+    for category, amount in breakdown_rows(financial_breakdown, user_data):
+        yield "breakdown", category.removeprefix("  - "), None, amount
+    for text in suggestion_lines(investment_suggestions):
+        yield "suggestion", text, None, None
+    table = projection_table(investment_suggestions, user_data)
+    if table is not None:
+        headers, rows = table
+        for values in rows:
+            for header, amount in zip(headers[1:], values[1:]):
+                yield "projection", header, values[0], amount
+
+
+def write_csv(target, financial_breakdown, investment_suggestions, user_data):
+    # `target` is a path or a text file object
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'w', newline='', encoding='utf-8') as f:
+            return write_csv(f, financial_breakdown, investment_suggestions, user_data)
+    writer = csv.writer(target)
+    writer.writerow(FLAT_COLUMNS)
+    writer.writerows(flat_rows(financial_breakdown, investment_suggestions, user_data))
+
+
+def write_parquet(target, financial_breakdown, investment_suggestions, user_data, batch_size=10000):
+    # Needs pyarrow; rows are written in record batches of `batch_size`
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from None
+
+    schema = pa.schema([("section", pa.string()), ("item", pa.string()), ("month", pa.int32()), ("amount_kes", pa.float64())])
+
+    def record_batch(rows):
+        columns = zip(*rows)
+        return pa.RecordBatch.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+    with pq.ParquetWriter(target, schema) as writer:
+        batch = []
+        for row in flat_rows(financial_breakdown, investment_suggestions, user_data):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_batch(record_batch(batch))
+                batch = []
+        if batch:
+            writer.write_batch(record_batch(batch))
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+
+def build_report(user_data, rates=None):
+    # Financial breakdown and suggestions for one profile; `rates` is a shared RateSnapshot
+    from investment import suggest_investments
+    from tax import calculate_net_income
+
+    financial_breakdown = calculate_net_income(user_data.get("monthly_gross_salary", 0), user_data.get("fixed_monthly_expenses", {}))
+    savings_goals = user_data.get("savings_goals", {})
+    investment_suggestions = suggest_investments(
+        remaining_funds=financial_breakdown.remaining_for_savings_investment,
+        savings_goal_amount=savings_goals.get("target_amount", 0),
+        savings_goal_timeframe_months=savings_goals.get("timeframe_months", 1),
+        rates=rates
+    )
+    return financial_breakdown, investment_suggestions
+
+
+def export_report(user_data, path, fmt="xlsx", rates=None):
+    financial_breakdown, investment_suggestions = build_report(user_data, rates)
+    WRITERS[fmt](path, financial_breakdown, investment_suggestions, user_data)
+    return path
+
+
+def report_filename(index, user_data, fmt):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", str(user_data.get("name", ""))).strip("_")[:40] or "report"
+    return f"{index:06d}_{slug}.{fmt}"
+
+
+# Rates shared by every report a worker process writes, set once per worker
+_worker_rates = None
+
+
+def _init_worker(rates):
+    global _worker_rates
+    _worker_rates = rates
+
+
+def _export_one(index, user_data, out_dir, fmt):
+    return export_report(user_data, os.path.join(out_dir, report_filename(index, user_data, fmt)), fmt, _worker_rates)
+
+
+def export_batch(profiles, out_dir=None, fmt="xlsx", workers=None, zip_path=None, rates=None):
+    """Write one report per profile, in parallel, and return the output paths.
+
+    `profiles` may be any iterable (a generator over a huge file is fine): at
+    most a few reports per worker are in flight at once. Rates are fetched
+    once here and shared with every worker. With `zip_path` the reports are
+    also bundled into one ZIP and that path is returned instead; without an
+    `out_dir` they are then written to a temp directory that is removed once
+    the ZIP is written.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown report format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if rates is None:
+        from investment import get_rate_snapshot
+        rates = get_rate_snapshot()
+
+    if zip_path and out_dir is None:
+        with tempfile.TemporaryDirectory(prefix="smart_money_reports_") as tmp_dir:
+            _zip_reports(_write_reports(profiles, tmp_dir, fmt, workers, rates), zip_path)
+        return zip_path
+
+    if out_dir is None:
+        out_dir = tempfile.mkdtemp(prefix="smart_money_reports_")
+    paths = _write_reports(profiles, out_dir, fmt, workers, rates)
+    if zip_path:
+        _zip_reports(paths, zip_path)
+        return zip_path
+    return paths
+
+
+def _write_reports(profiles, out_dir, fmt, workers, rates):
+    # The report paths, sorted
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rates,)) as pool:
+        pending = set()
+        for index, user_data in enumerate(profiles):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                paths.extend(future.result() for future in done)
+            pending.add(pool.submit(_export_one, index, user_data, out_dir, fmt))
+        done, _ = wait(pending)
+        paths.extend(future.result() for future in done)
+    paths.sort()
+    return paths
+
+
+def _zip_reports(paths, zip_path):
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for path in paths:
+            bundle.write(path, arcname=os.path.basename(path))
+
+
+def read_profiles(file):
+    # Profiles shaped like user_data.json: a JSON list, or one JSON object per line
+    first = file.read(1)
+    while first and first.isspace():
+        first = file.read(1)
+    if first == "[":
+        yield from json.loads(first + file.read())
+        return
+    line = first + file.readline()
+    while line:
+        if line.strip():
+            yield json.loads(line)
+        line = file.readline()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a financial report for every profile in a file")
+    parser.add_argument("profiles", help="JSON list or JSON Lines file of profiles ('-' for stdin)")
+    parser.add_argument("--out", help="directory for the reports (default: a new temp directory, removed after --zip)")
+    parser.add_argument("--format", choices=FORMATS, default="xlsx")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--zip", dest="zip_path", help="also bundle every report into this ZIP file")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.profiles == "-" else open(args.profiles, 'r', encoding='utf-8')
+    with source:
+        result = export_batch(read_profiles(source), args.out, args.format, args.workers, args.zip_path)
+    print(result if args.zip_path else f"Wrote {len(result)} reports to {os.path.dirname(result[0]) if result else args.out}")
@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+# Versioned PAYE, SHA and NSSF tables keyed by the date they took effect.
+# Each version is compiled once into bound / cumulative-tax lists, so working
+# out a deduction is a single bisect instead of an if/elif chain that
+# re-derives the bracket sums on every salary.
+
+SCHEDULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "statutory_schedules.json")
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+class CompiledSchedule:
+    """One effective-dated set of statutory tables, ready for lookups."""
+
+    def __init__(self, effective_from, paye_bands, personal_relief, sha_bands, nssf_rate,
+                 nssf_upper_earnings_limit, note=""):
+        self.effective_from = effective_from
+        self.note = note
+        self.personal_relief = personal_relief
+        self.nssf_rate = nssf_rate
+        self.nssf_upper_earnings_limit = nssf_upper_earnings_limit
+        self.nssf_cap = nssf_upper_earnings_limit * nssf_rate
+
+        self.paye_upper, self.paye_rates = _split_bands(paye_bands, "PAYE", effective_from)
+        self.sha_upper, self.sha_amounts = _split_bands(sha_bands, "SHA", effective_from)
+
+        # Tax already due at the bottom of each bracket. Terms are added in
+        # bracket order, the same order the old hand-written sums used, so the
+        # floating-point results don't change.
+        self.paye_lower = [0] + self.paye_upper
+        self.paye_cumulative = [0.0]
+        for i in range(1, len(self.paye_rates)):
+            width = self.paye_lower[i] - self.paye_lower[i - 1]
+            self.paye_cumulative.append(self.paye_cumulative[-1] + width * self.paye_rates[i - 1])
+
+        self._arrays = None
+
+    def paye(self, gross_salary):
+        # bisect_left puts a salary equal to a bound into the lower bracket, like `<=` does
+        i = bisect_left(self.paye_upper, gross_salary)
+        tax_payable = self.paye_cumulative[i] + (gross_salary - self.paye_lower[i]) * self.paye_rates[i]
+        return max(0, tax_payable - self.personal_relief)  # Ensure tax doesn't go negative
+
+    def sha(self, gross_salary):
+        return self.sha_amounts[bisect_left(self.sha_upper, gross_salary)]
+
+    def nssf(self, gross_salary):
+        return min(gross_salary * self.nssf_rate, self.nssf_cap)
+
+    def arrays(self):
+        # NumPy copies of the tables for the batch payroll code, built on first use
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = {
+                "paye_upper": np.array(self.paye_upper, dtype=np.float64),
+                "paye_lower": np.array(self.paye_lower, dtype=np.float64),
+                "paye_cumulative": np.array(self.paye_cumulative, dtype=np.float64),
+                "paye_rates": np.array(self.paye_rates, dtype=np.float64),
+                "sha_upper": np.array(self.sha_upper, dtype=np.float64),
+                "sha_amounts": np.array(self.sha_amounts, dtype=np.float64),
+            }
+        return self._arrays
+
+    @classmethod
+    def from_dict(cls, data):
+        try:
+            return cls(
+                effective_from=_parse_date(data["effective_from"]),
+                paye_bands=data["paye"]["bands"],
+                personal_relief=data["paye"]["personal_relief"],
+                sha_bands=data["sha"]["bands"],
+                nssf_rate=data["nssf"]["rate"],
+                nssf_upper_earnings_limit=data["nssf"]["upper_earnings_limit"],
+                note=data.get("note", ""),
+            )
+        except (KeyError, TypeError) as e:
+            raise ScheduleError(f"Malformed statutory schedule {data.get('effective_from', '?')}: missing {e}") from None
+
+
+class ScheduleRegistry:
+    """All known schedule versions, looked up by the date a payroll month falls in."""
+
+    def __init__(self, schedules):
+        if not schedules:
+            raise ScheduleError("At least one statutory schedule is required.")
+        self.schedules = sorted(schedules, key=lambda s: s.effective_from)
+        self._dates = [s.effective_from for s in self.schedules]
+        if len(set(self._dates)) != len(self._dates):
+            raise ScheduleError("Two statutory schedules have the same effective date.")
+        # Today's schedule and when to look again (next local midnight), so the
+        # default as_of=None lookup on the hot path is one clock read
+        self._current = (0.0, None)
+
+    def schedule_for(self, as_of=None):
+        # The schedule in force on `as_of` (a date or "YYYY-MM-DD"); today by default
+        if as_of is None:
+            valid_until, schedule = self._current
+            if time.time() >= valid_until:
+                today = date.today()
+                schedule = self._lookup(today)
+                midnight = datetime.combine(today, datetime.min.time()).timestamp() + 24 * 60 * 60
+                self._current = (midnight, schedule)
+            return schedule
+        return self._lookup(_parse_date(as_of))
+
+    def _lookup(self, as_of):
+        i = bisect_right(self._dates, as_of) - 1
+        if i < 0:
+            raise ScheduleError(f"No statutory schedule in force on {as_of}; the earliest starts {self._dates[0]}.")
+        return self.schedules[i]
+
+    @classmethod
+    def from_file(cls, path=SCHEDULES_PATH):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls([CompiledSchedule.from_dict(item) for item in data["schedules"]])
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    # Loaded and compiled once per process
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ScheduleRegistry.from_file()
+    return _registry
+
+
+def schedule_for(as_of=None):
+    return (_registry or get_registry()).schedule_for(as_of)
+
+
+def _split_bands(bands, label, effective_from):
+    # [[upper, value], ..., [null, value]] -> ([upper, ...], [value, ...])
+    upper = [band[0] for band in bands[:-1]]
+    values = [band[1] for band in bands]
+    if not bands or bands[-1][0] is not None:
+        raise ScheduleError(f"{label} bands for {effective_from} must end with an open-ended (null) band.")
+    if any(b is None for b in upper) or any(a >= b for a, b in zip(upper, upper[1:])):
+        raise ScheduleError(f"{label} band limits for {effective_from} must be increasing numbers.")
+    return upper, values
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ScheduleError(f"Invalid date {value!r}; expected YYYY-MM-DD.") from None
@@ -0,0 +1,341 @@
+import argparse
+import json
+import math
+import os
+import signal
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+from batch import process_chunk, process_profile
+from investment import get_rate_snapshot, rate_provider, suggest_investments
+from ranking import RANKING_KEYS
+from records import as_dict
+from tax import calculate_net_income
+
+# HTTP/JSON service over the compute core, for payroll and HR systems.
+#
+#   POST /v1/net-income    {"monthly_gross_salary": 150000, "fixed_monthly_expenses": {"Rent": 30000}}
+#   POST /v1/suggestions   {"remaining_funds": 80000, "savings_goal_amount": 500000,
+#                           "savings_goal_timeframe_months": 12, "ranking_key": "rate", "top_n": 5}
+#   POST /v1/profile       one profile shaped like user_data.json
+#   POST /v1/batch         {"profiles": [profile, ...]}, or one profile per line
+#                          with Content-Type: application/x-ndjson
+#   GET  /v1/rates         the MMF rates every answer is computed against
+#   GET  /healthz, /metrics
+#
+# Profile and batch results are the ones batch.py writes: {"id", "name",
+# "financial_breakdown", "investment_suggestions"}, or {"line", "error"} for a
+# batch entry that couldn't be processed. Every request in a process shares
+# investment.rate_provider; a batch uses one rate snapshot for all its profiles.
+# With SMG_SHARED_RATES set the workers read the table rate_refresher.py
+# publishes instead, and none of them scrapes money.ke.
+#
+#   python service.py --port 8080 --workers 4
+#
+# With --workers > 1 the listening socket is opened once and that many worker
+# processes are forked to serve it (Unix only). The rates are fetched before
+# forking, so every worker starts from the same table, and the workers share
+# the rate snapshot file after that. /metrics reports the worker that answered.
+
+DEFAULT_PORT = 8080
+
+# Bodies larger than this are refused with 413
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_BATCH_PROFILES = 100_000
+
+# Most funds a /suggestions request can ask for (money.ke lists about 40)
+MAX_TOP_N = 50
+
+BATCH_CHUNK_SIZE = 1000
+
+
+class BadRequest(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(body, key, default=0, kind=float):
+    value = body.get(key, default)
+    try:
+        number = kind(value)
+    except (TypeError, ValueError, OverflowError):
+        raise BadRequest(f"{key} must be a number, got {value!r}")
+    # json.loads accepts NaN and Infinity, which json.dumps would write back as invalid JSON
+    if not math.isfinite(number):
+        raise BadRequest(f"{key} must be a finite number, got {value!r}")
+    return number
+
+
+def _expenses(body):
+    expenses = body.get("fixed_monthly_expenses") or {}
+    if not isinstance(expenses, dict):
+        raise BadRequest("fixed_monthly_expenses must be an object of category -> amount")
+    try:
+        expenses = {str(k): float(v) for k, v in expenses.items()}
+    except (TypeError, ValueError):
+        raise BadRequest("fixed_monthly_expenses amounts must be numbers")
+    if not all(map(math.isfinite, expenses.values())):
+        raise BadRequest("fixed_monthly_expenses amounts must be finite numbers")
+    return expenses
+
+
+def handle_net_income(body):
+    gross_salary, expenses = _number(body, "monthly_gross_salary"), _expenses(body)
+    with metrics.span("tax"):
+        breakdown = calculate_net_income(gross_salary, expenses)
+    return breakdown._asdict()
+
+
+def handle_suggestions(body):
+    months = _number(body, "savings_goal_timeframe_months", 1, int)
+    if months < 1:
+        raise BadRequest("savings_goal_timeframe_months must be at least 1")
+    ranking_key = body.get("ranking_key", "rate")
+    if ranking_key not in RANKING_KEYS:
+        raise BadRequest(f"ranking_key must be one of {', '.join(RANKING_KEYS)}")
+    top_n = _number(body, "top_n", 5, int)
+    if not 1 <= top_n <= MAX_TOP_N:
+        raise BadRequest(f"top_n must be between 1 and {MAX_TOP_N}")
+    suggestions = suggest_investments(
+        remaining_funds=_number(body, "remaining_funds"),
+        savings_goal_amount=_number(body, "savings_goal_amount"),
+        savings_goal_timeframe_months=months,
+        ranking_key=ranking_key,
+        top_n=top_n,
+        rates=get_rate_snapshot()
+    )
+    return [as_dict(s) for s in suggestions]
+
+
+def handle_profile(body):
+    goals = body.get("savings_goals") or {}
+    if not isinstance(goals, dict):
+        raise BadRequest("savings_goals must be an object")
+    profile = dict(
+        body,
+        monthly_gross_salary=_number(body, "monthly_gross_salary"),
+        fixed_monthly_expenses=_expenses(body),
+        savings_goals={
+            "target_amount": _number(goals, "target_amount"),
+            "timeframe_months": _number(goals, "timeframe_months", 1, int),
+        }
+    )
+    return process_profile(profile, get_rate_snapshot())
+
+
+def batch_entries(raw, content_type):
+    # (line_number, profile, error) tuples, as batch.process_chunk takes them
+    if content_type == "application/x-ndjson":
+        entries = []
+        for line_number, line in enumerate(raw.decode("utf-8").splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                entries.append((line_number, json.loads(line), None))
+            except ValueError as e:
+                entries.append((line_number, None, f"Invalid JSON: {e}"))
+    else:
+        body = _parse_json(raw)
+        profiles = body.get("profiles") if isinstance(body, dict) else None
+        if not isinstance(profiles, list):
+            raise BadRequest('Expected {"profiles": [...]}')
+        entries = [(i, profile, None if isinstance(profile, dict) else "Expected a profile object")
+                   for i, profile in enumerate(profiles, start=1)]
+    if len(entries) > MAX_BATCH_PROFILES:
+        raise BadRequest(f"At most {MAX_BATCH_PROFILES} profiles per request", 413)
+    return entries
+
+
+def handle_batch(raw, content_type):
+    # Returns the response body already serialised: process_chunk hands back
+    # one JSON string per profile, which is spliced in rather than re-encoded
+    entries = batch_entries(raw, content_type)
+    rates = get_rate_snapshot()
+    lines = []
+    errors = 0
+    for start in range(0, len(entries), BATCH_CHUNK_SIZE):
+        chunk_lines, chunk_errors = process_chunk(entries[start:start + BATCH_CHUNK_SIZE], rates)
+        lines.extend(chunk_lines)
+        errors += chunk_errors
+    metrics.inc("smg_batch_profiles_total", len(entries))
+    return f'{{"count": {len(lines)}, "errors": {errors}, "results": [{",".join(lines)}]}}'.encode("utf-8")
+
+
+def handle_rates():
+    snapshot = get_rate_snapshot()
+    return {
+        "fetched_at": snapshot.fetched_at,
+        "stale": snapshot.stale,
+        "rates": [rate._asdict() for rate in snapshot.rates],
+    }
+
+
+def _parse_json(raw):
+    try:
+        return json.loads(raw or b"{}")
+    except ValueError as e:
+        raise BadRequest(f"Invalid JSON: {e}")
+
+
+POST_ROUTES = {
+    "/v1/net-income": handle_net_income,
+    "/v1/suggestions": handle_suggestions,
+    "/v1/profile": handle_profile,
+}
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    server_version = "SmartMoneyGuide"
+    # Headers and body go out in separate writes; without TCP_NODELAY the body
+    # waits on the client's delayed ACK (~40 ms per keep-alive request)
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client went away
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            return self._timed(path, lambda: (200, metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"))
+        if path == "/healthz":
+            return self._timed(path, lambda: (200, b'{"status": "ok"}', "application/json"))
+        if path == "/v1/rates":
+            return self._timed(path, lambda: (200, json.dumps(handle_rates()).encode("utf-8"), "application/json"))
+        self._send(404, b'{"error": "Not found"}')
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path != "/v1/batch" and path not in POST_ROUTES:
+            return self._send(404, b'{"error": "Not found"}', close=True)
+
+        def respond():
+            raw = self._read_body()
+            if path == "/v1/batch":
+                content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+                return 200, handle_batch(raw, content_type), "application/json"
+            body = _parse_json(raw)
+            if not isinstance(body, dict):
+                raise BadRequest("Expected a JSON object")
+            return 200, json.dumps(POST_ROUTES[path](body)).encode("utf-8"), "application/json"
+
+        self._timed(path, respond)
+
+    def _timed(self, endpoint, respond):
+        started = time.perf_counter()
+        try:
+            status, body, content_type = respond()
+        except BadRequest as e:
+            status, body, content_type = e.status, json.dumps({"error": str(e)}).encode("utf-8"), "application/json"
+        except Exception as e:
+            status, body, content_type = 500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode("utf-8"), "application/json"
+        self._send(status, body, content_type, close=status >= 400 and self._unread_body)
+        metrics.observe("smg_http_request_seconds", time.perf_counter() - started, endpoint=endpoint)
+        metrics.inc("smg_http_requests_total", endpoint=endpoint, status=str(status))
+
+    _unread_body = False
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise BadRequest("Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            self._unread_body = True  # don't read it; drop the connection after answering
+            raise BadRequest(f"Request body over {MAX_BODY_BYTES} bytes", 413)
+        return self.rfile.read(length)
+
+    def _send(self, status, body, content_type="application/json", close=False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # request counts and latencies are in /metrics
+
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=1):
+    server = make_server(host, port)
+    bound_host, bound_port = server.server_address[:2]
+
+    # Warm the rate cache before forking so every worker starts with the same
+    # table, and let any refresh finish: a thread running at fork time could
+    # leave a lock held in the children
+    snapshot = get_rate_snapshot()
+    rate_provider.wait_for_refresh()
+    print(f"Loaded {len(snapshot.rates)} MMF rates{' (stale)' if snapshot.stale else ''}.")
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        if workers > 1:
+            print("Worker processes need os.fork; serving from this process only.")
+        print(f"Serving on http://{bound_host}:{bound_port}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: serve the inherited socket until the parent stops us
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+    server.server_close()  # the workers hold their own copies of the socket
+    print(f"Serving on http://{bound_host}:{bound_port} with {workers} worker processes", flush=True)
+
+    def stop(*_):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, lambda *_: stop())
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        stop()
+        for pid in children:
+            os.waitpid(pid, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Smart Money Guide over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes; 0 uses every core")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers or os.cpu_count() or 1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Monte Carlo version of investment.calculate_mmf_return. Instead of one fixed
+# annual rate for the whole horizon, each path gets its own month-by-month rate
+# path, and deposits compound along it (deposit at the end of each month,
+# interest at annual_rate / 12, as in calculate_mmf_return). Paths are
+# simulated in chunks of `chunk_size`, each from its own child of one seed, so
+# memory stays at a few chunk-sized vectors and the result is the same whether
+# the chunks run in this process or on a process pool.
+#
+# Rate models:
+#   "mean_reverting" - Ornstein-Uhlenbeck around `long_run_rate`, sampled exactly
+#                      at monthly steps, floored at 0
+#   "bootstrap"      - month-to-month changes resampled from a rate history
+
+DEFAULT_PATHS = 100_000
+DEFAULT_CHUNK_SIZE = 25_000
+
+DEFAULT_REVERSION = 0.8     # per year; a deviation halves in about ten months
+DEFAULT_VOLATILITY = 0.015  # annualised, as a rate fraction (1.5 percentage points)
+
+MODELS = ("mean_reverting", "bootstrap")
+
+
+def simulate_goal(monthly_deposit, months, goal_amount, annual_rate, n_paths=DEFAULT_PATHS,
+                  model="mean_reverting", long_run_rate=None, reversion=DEFAULT_REVERSION,
+                  volatility=DEFAULT_VOLATILITY, history=None, seed=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """Chance of reaching `goal_amount` when the rate drifts, plus the spread of outcomes.
+
+    Rates are fractions (0.1225 for 12.25%). `annual_rate` is today's rate;
+    the mean-reverting model drifts towards `long_run_rate` (default: today's).
+    The bootstrap model needs `history`, past rates of the fund one month
+    apart. `workers` > 1 runs chunks on that many processes.
+
+    Returns a dict: probability (of the final balance reaching the goal),
+    p10 / p50 / p90 / mean final balance, total_deposits and n_paths.
+    """
+    months = int(months)
+    if months < 1:
+        raise ValueError("The savings period must be at least one month.")
+    if model not in MODELS:
+        raise ValueError(f"Unknown rate model {model!r}; expected one of {', '.join(MODELS)}")
+
+    params = {
+        "monthly_deposit": float(monthly_deposit),
+        "months": months,
+        "annual_rate": float(annual_rate),
+        "model": model,
+        "long_run_rate": float(annual_rate if long_run_rate is None else long_run_rate),
+        "reversion": float(reversion),
+        "volatility": float(volatility),
+        "changes": _monthly_changes(history) if model == "bootstrap" else None,
+    }
+
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers and workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            finals = list(pool.map(_simulate_chunk, sizes, seeds, [params] * len(sizes)))
+    else:
+        finals = [_simulate_chunk(size, child, params) for size, child in zip(sizes, seeds)]
+    final = np.concatenate(finals)
+
+    p10, p50, p90 = np.percentile(final, [10, 50, 90])
+    return {
+        "probability": float(np.mean(final >= goal_amount)),
+        "p10": float(p10),
+        "p50": float(p50),
+        "p90": float(p90),
+        "mean": float(final.mean()),
+        "total_deposits": monthly_deposit * months,
+        "n_paths": int(final.size),
+    }
+
+
+def _simulate_chunk(size, seed_sequence, params):
+    # Final balances of `size` paths. Only the current rate and balance of every
+    # path are kept, never the whole size x months matrix.
+    rng = np.random.default_rng(seed_sequence)
+    deposit = params["monthly_deposit"]
+    rate = np.full(size, params["annual_rate"])
+    balance = np.zeros(size)
+
+    if params["model"] == "mean_reverting":
+        # Exact OU transition over one month
+        dt = 1 / 12
+        decay = math.exp(-params["reversion"] * dt)
+        if params["reversion"] > 0:
+            step_sd = params["volatility"] * math.sqrt((1 - decay ** 2) / (2 * params["reversion"]))
+        else:
+            step_sd = params["volatility"] * math.sqrt(dt)
+        theta = params["long_run_rate"]
+
+    for month in range(params["months"]):
+        # Interest on last month's balance at this month's rate, then the deposit
+        balance *= 1 + rate / 12
+        balance += deposit
+        if params["model"] == "mean_reverting":
+            rate = theta + (rate - theta) * decay + step_sd * rng.standard_normal(size)
+        else:
+            rate = rate + rng.choice(params["changes"], size)
+        np.maximum(rate, 0.0, out=rate)
+    return balance
+
+
+def _monthly_changes(history):
+    rates = np.asarray(history if history is not None else [], dtype=np.float64)
+    if rates.size < 3:
+        raise ValueError("The bootstrap model needs a rate history of at least three months.")
+    return np.diff(rates)
+
+
+def history_volatility(daily_volatility_pp):
+    # Annualised volatility (a rate fraction) from RateHistory.volatility (daily, in percentage points)
+    return daily_volatility_pp * math.sqrt(365) / 100
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Simulate the chance of reaching a savings goal with drifting MMF rates")
+    parser.add_argument("--deposit", type=float, default=20000)
+    parser.add_argument("--months", type=int, default=120)
+    parser.add_argument("--goal", type=float, default=4_000_000)
+    parser.add_argument("--rate", type=float, default=12.0, help="today's annual rate in percent")
+    parser.add_argument("--long-run-rate", type=float, help="percent (default: today's rate)")
+    parser.add_argument("--volatility", type=float, default=DEFAULT_VOLATILITY * 100, help="annualised, in percentage points")
+    parser.add_argument("--paths", type=int, default=DEFAULT_PATHS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="processes; 0 uses every core")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = simulate_goal(
+        args.deposit, args.months, args.goal, args.rate / 100, n_paths=args.paths,
+        long_run_rate=args.long_run_rate / 100 if args.long_run_rate is not None else None,
+        volatility=args.volatility / 100, seed=args.seed, workers=args.workers or os.cpu_count()
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{result['n_paths']:,} paths x {args.months} months in {elapsed:.2f}s")
+    print(f"Chance of reaching KES {args.goal:,.2f}: {result['probability']:.1%}")
+    print(f"Final balance P10 / P50 / P90: KES {result['p10']:,.2f} / {result['p50']:,.2f} / {result['p90']:,.2f}")
@@ -0,0 +1,121 @@
+import math
+from bisect import bisect_left
+
+from piecewise import net_segments
+
+# Inverses of the forward calculations: the gross salary that pays a given net
+# (tax.calculate_net_income backwards) and the monthly deposit that reaches a
+# savings target (investment.calculate_mmf_return backwards). Both are closed
+# form, so they are cheap enough to run on every slider move, and each has a
+# batch version for arrays of targets.
+
+# Floating-point slack: the closed-form answer can be a few ulps either side of
+# the exact one, and is stepped onto it
+MAX_ULP_STEPS = 8
+
+
+def gross_for_net(target_net, as_of=None):
+    """Smallest gross salary whose net after PAYE, SHA and NSSF is at least `target_net`.
+
+    Net jumps down at every SHA band limit, so it is not monotonic: a slightly
+    higher gross can pay a slightly lower net. The answer is the first salary,
+    scanning upwards, that reaches the target. To solve for money left after
+    expenses, pass the target plus the total fixed expenses.
+    """
+    from tax import calculate_kra_paye
+
+    segments = net_segments(as_of)
+    if target_net <= segments.net_at_zero:
+        return 0.0
+
+    def reaches(g):
+        return g - calculate_kra_paye(g, as_of).total_statutory_deductions >= target_net
+
+    # The segment formulas can put the net at a limit a few ulps either side of
+    # the exact one, so start a little early and take the first segment whose
+    # top exactly reaches the target
+    k = bisect_left(segments.best_so_far, target_net - MAX_ULP_STEPS * math.ulp(target_net))
+    while segments.upper[k] != math.inf and not reaches(segments.upper[k]):
+        k += 1
+    gross = max((target_net - segments.intercept[k]) / segments.slope[k], math.nextafter(segments.lower[k], math.inf))
+    gross = min(gross, segments.upper[k])
+
+    for _ in range(MAX_ULP_STEPS):
+        if reaches(gross):
+            break
+        gross = math.nextafter(gross, math.inf)
+    for _ in range(MAX_ULP_STEPS):
+        lower = math.nextafter(gross, -math.inf)
+        if lower <= segments.lower[k] or not reaches(lower):
+            break
+        gross = lower
+    return gross
+
+
+def gross_for_net_batch(target_nets, as_of=None):
+    # Array version of gross_for_net; checked against payroll.calculate_kra_paye_batch
+    import numpy as np
+    from payroll import calculate_kra_paye_batch
+
+    segments = net_segments(as_of)
+    tables = segments.arrays()
+    targets = np.asarray(target_nets, dtype=np.float64)
+
+    def reaches(g):
+        return g - calculate_kra_paye_batch(g, as_of).total_statutory_deductions >= targets
+
+    # Starting a little early and moving up, as in gross_for_net
+    k = np.searchsorted(tables["best_so_far"], targets - MAX_ULP_STEPS * np.spacing(np.abs(targets)), side="left")
+    while True:
+        upper = tables["upper"][k]
+        finite = np.isfinite(upper)
+        short = finite & ~reaches(np.where(finite, upper, 0.0))
+        if not short.any():
+            break
+        k[short] += 1
+    gross = (targets - tables["intercept"][k]) / tables["slope"][k]
+    gross = np.minimum(np.maximum(gross, np.nextafter(tables["lower"][k], np.inf)), tables["upper"][k])
+    gross = np.where(targets <= segments.net_at_zero, 0.0, gross)
+
+    for _ in range(MAX_ULP_STEPS):
+        short = ~reaches(gross)
+        if not short.any():
+            break
+        gross[short] = np.nextafter(gross[short], np.inf)
+    for _ in range(MAX_ULP_STEPS):
+        lower = np.nextafter(gross, -np.inf)
+        over = (lower > tables["lower"][k]) & (gross > 0) & reaches(lower)
+        if not over.any():
+            break
+        gross[over] = lower[over]
+    return gross
+
+
+def required_monthly_deposit(target_amount, annual_rate, months):
+    """Deposit at the end of each month that grows to `target_amount` in `months` months.
+
+    `annual_rate` is a fraction (0.1225 for 12.25%), compounded monthly like
+    investment.calculate_mmf_return, which this inverts.
+    """
+    if months < 1:
+        raise ValueError("The savings period must be at least one month.")
+    r = annual_rate / 12
+    if r == 0:
+        return target_amount / months
+    # expm1/log1p keep (1 + r)^n - 1 accurate for small monthly rates
+    return target_amount * r / math.expm1(months * math.log1p(r))
+
+
+def required_monthly_deposit_batch(target_amounts, annual_rates, months):
+    # Array version of required_monthly_deposit; arguments broadcast against each other
+    import numpy as np
+
+    targets = np.asarray(target_amounts, dtype=np.float64)
+    r = np.asarray(annual_rates, dtype=np.float64) / 12
+    n = np.asarray(months, dtype=np.float64)
+    if np.any(n < 1):
+        raise ValueError("The savings period must be at least one month.")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deposit = targets * r / np.expm1(n * np.log1p(r))
+    return np.where(r == 0, targets / n, deposit)
+
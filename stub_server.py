@@ -0,0 +1,160 @@
+import argparse
+import hashlib
+import os
+import socket
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for money.ke, used to exercise the fetch layer without the
+# real site. The behaviour can be switched at runtime:
+#   ok     - serve the fixture page
+#   slow   - wait `delay` seconds before answering
+#   drip   - send the page a few bytes at a time, `delay` seconds apart
+#   error  - answer 503
+#   drop   - close the connection without sending anything
+# In ok mode the page carries an ETag and Last-Modified and conditional
+# requests get 304 Not Modified.
+# Either construct StubServer(mode=...) in-process, or run this file and hit
+# /_mode?mode=slow&delay=5 to change it.
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_FIXTURE = os.path.join(FIXTURES_DIR, "money_ke_mmf_rates.html")
+
+MODES = ("ok", "slow", "drip", "error", "drop")
+
+
+class StubServer:
+
+    def __init__(self, fixture_path=DEFAULT_FIXTURE, host="127.0.0.1", port=0, mode="ok", delay=1.0):
+        with open(fixture_path, 'rb') as f:
+            self.set_body(f.read())
+        self.mode = mode
+        self.delay = delay
+        self.hits = 0
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/mmf-rates/"
+
+    def set_body(self, body):
+        # Swapping the page changes its validators, like a real rate update
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    def set_mode(self, mode, delay=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown stub mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.mode = mode
+        if delay is not None:
+            self.delay = delay
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-money-ke", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _make_handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+        def handle(self):
+            try:
+                super().handle()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up (timeout under test); nothing to report
+
+        def do_GET(self):
+            if self.path.startswith("/_mode"):
+                return self._set_mode()
+
+            server.hits += 1
+            mode = server.mode
+            if mode == "drop":
+                self.connection.shutdown(socket.SHUT_RDWR)
+                self.close_connection = True
+                return
+            if mode == "error":
+                return self._send(503, b"Service Unavailable")
+            if mode == "slow":
+                time.sleep(server.delay)
+            if mode == "drip":
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                for i in range(0, len(server.body), 512):
+                    self.wfile.write(server.body[i:i + 512])
+                    self.wfile.flush()
+                    time.sleep(server.delay)
+                return
+            if self.headers.get("If-None-Match") == server.etag or (
+                    not self.headers.get("If-None-Match")
+                    and self.headers.get("If-Modified-Since") == server.last_modified):
+                self.send_response(304)
+                self.send_header("ETag", server.etag)
+                self.end_headers()
+                return
+            self._send(200, server.body, validators=True)
+
+        def _set_mode(self):
+            from urllib.parse import parse_qs, urlparse
+            query = parse_qs(urlparse(self.path).query)
+            try:
+                delay = float(query["delay"][0]) if "delay" in query else None
+                server.set_mode(query.get("mode", ["ok"])[0], delay)
+            except ValueError as e:
+                return self._send(400, str(e).encode())
+            self._send(200, f"mode={server.mode} delay={server.delay}".encode())
+
+        def _send(self, status, body, content_type="text/html; charset=utf-8", validators=False):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            if validators:
+                self.send_header("ETag", server.etag)
+                self.send_header("Last-Modified", server.last_modified)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep test output quiet
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for money.ke")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=MODES, default="ok")
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    args = parser.parse_args()
+
+    stub = StubServer(args.fixture, port=args.port, mode=args.mode, delay=args.delay)
+    print(f"Serving {args.fixture} at {stub.url} (mode={args.mode}). Point SMG_MMF_URL at it.")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
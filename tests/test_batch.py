@@ -0,0 +1,74 @@
+import io
+import json
+
+import pytest
+
+import batch
+from mmf_parser import MMFRate
+from rate_provider import RateSnapshot
+from tax import calculate_net_income
+
+RATES = RateSnapshot([MMFRate("Fund A", 12.0, 1.0), MMFRate("Fund B", 11.0, 0.5)], 1.7e9, False)
+
+CSV = """id,name,monthly_gross_salary,target_amount,timeframe_months,fixed_monthly_expenses,expense_food
+1,Ann,100000,200000,12,"{""Rent"": 20000}",5000
+2,Extra,100000,200000,12,,5000,oops
+3,List,100000,200000,12,"[1, 2]",
+4,Number,100000,200000,12,7,
+5,Salary,lots,200000,12,,
+6,Bob,50000,0,1,,
+"""
+
+
+def run(text, fmt):
+    out = io.StringIO()
+    count, errors = batch.run_batch(batch.read_profiles(io.StringIO(text), fmt), out, workers=1, rates=RATES)
+    return count, errors, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_csv_bad_rows_become_error_lines():
+    count, errors, results = run(CSV, "csv")
+    assert (count, errors) == (6, 4)
+    assert [r.get("id") for r in results] == ["1", None, None, None, None, "6"]
+
+    by_line = {r["line"]: r["error"] for r in results if "error" in r}
+    assert sorted(by_line) == [3, 4, 5, 6]
+    assert "more field" in by_line[3]
+    assert "JSON object" in by_line[4] and "JSON object" in by_line[5]
+    assert by_line[6].startswith("Invalid row")
+
+
+def test_csv_expenses_from_both_forms():
+    _, _, results = run(CSV, "csv")
+    expected = calculate_net_income(100_000.0, {"Rent": 20_000, "food": 5_000})._asdict()
+    assert results[0]["financial_breakdown"] == expected
+    assert results[0]["investment_suggestions"]
+
+
+def test_jsonl_bad_lines_become_error_lines():
+    lines = [
+        json.dumps({"name": "Ann", "monthly_gross_salary": 100000, "fixed_monthly_expenses": {"Rent": 20000}}),
+        "{not json",
+        "",
+        json.dumps([1, 2, 3]),
+        json.dumps({"name": "Bad", "monthly_gross_salary": 100000, "fixed_monthly_expenses": [1, 2]}),
+        json.dumps({"name": "Bob", "monthly_gross_salary": 50000}),
+    ]
+    count, errors, results = run("\n".join(lines) + "\n", "jsonl")
+    assert (count, errors) == (5, 3)
+    assert [r.get("name") for r in results] == ["Ann", None, None, None, "Bob"]
+    assert [r["line"] for r in results if "error" in r] == [2, 4, 5]
+    assert results[1]["error"].startswith("Invalid JSON")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cli_writes_one_line_per_profile(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(batch, "get_rate_snapshot", lambda: RATES)
+    source = tmp_path / "profiles.csv"
+    source.write_text(CSV)
+    out = tmp_path / "results.jsonl"
+
+    assert batch.main([str(source), "-o", str(out), "--workers", str(workers), "--chunk-size", "2"]) == 1
+    results = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(results) == 6
+    assert sum("error" in r for r in results) == 4
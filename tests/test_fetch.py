@@ -0,0 +1,174 @@
+import time
+
+import pytest
+import requests
+
+from fetch import CircuitBreaker, CircuitOpenError, FetchError, Fetcher
+from investment import scrape_mmf_rates
+from mmf_parser import MMFRate
+from rate_provider import RateProvider
+from stub_server import StubServer
+
+# The fetch layer and the rate provider against stub_server.py in each of its modes
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def make_fetcher(**kwargs):
+    # Short timeouts, no backoff and a session of its own, so tests are quick and independent
+    options = dict(connect_timeout=1.0, read_timeout=1.0, retries=0, backoff=0.0, deadline=3.0,
+                   session=requests.Session())
+    options.update(kwargs)
+    return Fetcher(**options)
+
+
+def make_provider(stub, fetcher, snapshot_path, ttl_seconds=60):
+    def fetch_rates(validators):
+        return scrape_mmf_rates(validators, url=stub.url, fetcher=fetcher)
+    return RateProvider(fetch_rates, MMFRate, ttl_seconds=ttl_seconds, snapshot_path=str(snapshot_path))
+
+
+def test_ok_then_not_modified(stub):
+    fetcher = make_fetcher()
+    first = fetcher.get_conditional(stub.url)
+    assert first.content == stub.body
+    assert first.etag == stub.etag and not first.not_modified
+
+    second = fetcher.get_conditional(stub.url, first.etag, first.last_modified)
+    assert second.not_modified and second.content is None
+    assert second.etag == stub.etag
+
+
+def test_slow_server_hits_read_timeout(stub):
+    stub.set_mode("slow", delay=2.0)
+    fetcher = make_fetcher(read_timeout=0.2)
+    started = time.monotonic()
+    with pytest.raises(FetchError):
+        fetcher.get(stub.url)
+    assert time.monotonic() - started < 1.5
+
+
+def test_drip_is_cut_off_by_deadline(stub):
+    # Each chunk arrives well inside the read timeout; only the overall deadline stops it
+    stub.set_mode("drip", delay=0.1)
+    fetcher = make_fetcher(read_timeout=1.0, deadline=0.5)
+    started = time.monotonic()
+    with pytest.raises(FetchError, match="Deadline"):
+        fetcher.get(stub.url)
+    assert time.monotonic() - started < 1.5
+
+
+def test_server_error_is_retried(stub):
+    stub.set_mode("error")
+    fetcher = make_fetcher(retries=2)
+    with pytest.raises(FetchError, match="503"):
+        fetcher.get(stub.url)
+    assert stub.hits == 3
+
+
+def test_dropped_connection_fails(stub):
+    stub.set_mode("drop")
+    with pytest.raises(FetchError):
+        make_fetcher().get(stub.url)
+
+
+def test_circuit_breaker_opens_and_recovers(stub):
+    stub.set_mode("error")
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=0.2)
+    fetcher = make_fetcher(breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(FetchError):
+            fetcher.get(stub.url)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # While open, requests fail fast without reaching the server
+    hits = stub.hits
+    with pytest.raises(CircuitOpenError):
+        fetcher.get(stub.url)
+    assert stub.hits == hits
+
+    # After the cool-down one trial request goes through; success closes the breaker
+    time.sleep(0.25)
+    stub.set_mode("ok")
+    assert fetcher.get(stub.url) == stub.body
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_failure_reopens(stub):
+    stub.set_mode("error")
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.1)
+    fetcher = make_fetcher(breaker=breaker)
+    with pytest.raises(FetchError):
+        fetcher.get(stub.url)
+    time.sleep(0.15)
+    with pytest.raises(FetchError, match="503"):
+        fetcher.get(stub.url)  # the trial request
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        fetcher.get(stub.url)
+
+
+def test_provider_serves_stale_rates_when_refresh_fails(stub, tmp_path):
+    provider = make_provider(stub, make_fetcher(), tmp_path / "rates.json")
+    snapshot = provider.get_snapshot()
+    assert snapshot.rates and not snapshot.stale
+
+    for mode in ("error", "drop", "slow"):
+        stub.set_mode(mode, delay=2.0)
+        provider.invalidate()
+        provider.refresh()
+        stale = provider.get_snapshot()
+        provider.wait_for_refresh()
+        assert stale.rates == snapshot.rates
+        assert stale.stale
+
+
+def test_provider_recovers_after_failure(stub, tmp_path):
+    provider = make_provider(stub, make_fetcher(), tmp_path / "rates.json")
+    rates = provider.get_rates()
+    stub.set_mode("error")
+    provider.refresh()
+    assert provider.peek().stale
+
+    stub.set_mode("ok")
+    assert provider.refresh() == rates
+    assert not provider.peek().stale
+
+
+def test_provider_revalidates_with_304(stub, tmp_path):
+    provider = make_provider(stub, make_fetcher(), tmp_path / "rates.json")
+    rates = provider.get_rates()
+    provider.invalidate()
+    assert provider.refresh() is rates  # 304: the same table, renewed
+    assert not provider.peek().stale
+
+
+def test_cold_start_falls_back_to_snapshot(stub, tmp_path):
+    snapshot_path = tmp_path / "rates.json"
+    rates = make_provider(stub, make_fetcher(), snapshot_path).get_rates()
+
+    # A new process with money.ke down still has the last good rates from the snapshot
+    stub.set_mode("error")
+    provider = make_provider(stub, make_fetcher(), snapshot_path, ttl_seconds=0)
+    snapshot = provider.get_snapshot()
+    provider.wait_for_refresh()
+    assert snapshot.rates == rates
+    assert snapshot.stale
+    assert provider.get_snapshot().rates == rates
+
+
+def test_cold_start_without_snapshot_has_no_rates(stub, tmp_path):
+    stub.set_mode("error")
+    provider = make_provider(stub, make_fetcher(), tmp_path / "rates.json")
+    snapshot = provider.get_snapshot()
+    assert snapshot.rates is None and snapshot.stale
+
+
+def test_stalled_body_hits_read_timeout(stub):
+    stub.set_mode("drip", delay=1.0)
+    with pytest.raises(FetchError, match="timed out"):
+        make_fetcher(read_timeout=0.2).get(stub.url)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from payroll import calculate_net_income_batch
+from schedules import get_registry
+from tax import calculate_net_income
+
+# calculate_net_income_batch must match calculate_net_income exactly, including
+# at the band and cap limits where `<=` vs `<` mistakes would show up.
+
+EXPENSES = {"rent": 15_000, "food": 8_000}
+
+
+def boundary_salaries(schedule):
+    # 0, then every PAYE band, SHA band and NSSF cap limit, and the salary where
+    # PAYE reaches the personal relief, each +-1 KES and +-1 cent
+    limits = list(schedule.paye_upper) + list(schedule.sha_upper) + [schedule.nssf_upper_earnings_limit]
+    limits.append(schedule.personal_relief / schedule.paye_rates[0])
+    salaries = {0.0}
+    for limit in limits:
+        salaries.update(limit + offset for offset in (-1, -0.01, 0, 0.01, 1))
+    return sorted(salaries)
+
+
+@pytest.mark.parametrize("schedule", get_registry().schedules, ids=lambda s: str(s.effective_from))
+def test_batch_matches_scalar_at_boundaries(schedule):
+    salaries = boundary_salaries(schedule)
+    as_of = schedule.effective_from
+    batch = calculate_net_income_batch(np.array(salaries), sum(EXPENSES.values()), as_of)
+
+    for i, gross in enumerate(salaries):
+        expected = calculate_net_income(gross, EXPENSES, as_of)
+        for field, value in expected._asdict().items():
+            assert getattr(batch, field)[i] == value, f"{field} at {gross} KES"
+
+
+def test_series_keeps_index():
+    pd = pytest.importorskip("pandas")
+    salaries = pd.Series([0.0, 24_000.0, 100_000.0], index=["a", "b", "c"])
+    frame = calculate_net_income_batch(salaries, 10_000)
+    assert list(frame.index) == ["a", "b", "c"]
+    assert frame.loc["c", "net_salary_after_tax"] == calculate_net_income(100_000.0, {"x": 10_000}).net_salary_after_tax
@@ -0,0 +1,68 @@
+import pytest
+
+import data
+from profile_store import ProfileConflictError, ProfileStore, user_id_for
+
+
+def profile(name, salary):
+    return {"name": name, "monthly_gross_salary": salary, "fixed_monthly_expenses": {}, "savings_goals": {}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    yield store
+    store.close()
+
+
+def test_stale_version_is_refused(store):
+    assert store.save(profile("Ann", 100)) == 1
+    _, version = store.get_with_version("ann")
+
+    # Another session saves in between; the first one's save must not clobber it
+    assert store.save(profile("Ann", 200), "ann", expected_version=version) == 2
+    with pytest.raises(ProfileConflictError):
+        store.save(profile("Ann", 300), "ann", expected_version=version)
+    assert store.get_with_version("ann") == (profile("Ann", 200), 2)
+
+
+def test_version_zero_refuses_an_existing_profile(store):
+    # What the GUI sends for a profile it didn't load: save only if nobody has yet
+    assert store.save(profile("Ann", 100), "ann", expected_version=0) == 1
+    with pytest.raises(ProfileConflictError):
+        store.save(profile("ANN ", 999), user_id_for({"name": "ANN "}), expected_version=0)
+    assert store.get("ann") == profile("Ann", 100)
+
+
+def test_history_keeps_every_replaced_version(store):
+    for salary in (100, 200, 300):
+        store.save(profile("Ann", salary))
+    store.save(profile("Bob", 50))
+
+    assert store.get("ann") == profile("Ann", 300)
+    history = store.history("ann")
+    assert [(version, p["monthly_gross_salary"]) for version, _, p in history] == [(2, 200), (1, 100)]
+    assert history[0][1] >= history[1][1]
+    assert [version for version, _, _ in store.history("ann", limit=1)] == [2]
+    assert store.history("bob") == []
+
+    assert store.delete("ann")
+    assert store.history("ann") == [] and "ann" not in store
+
+
+def test_cli_offers_only_this_users_profile(store, monkeypatch, capsys):
+    monkeypatch.setattr(data, "_store", store)
+    store.save(profile("Ann", 100))
+    store.save(profile("Bob", 200))  # saved last
+
+    answers = iter(["Ann", "load"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    assert data.collect_user_data() == profile("Ann", 100)
+
+    # A new user isn't offered someone else's profile, however recently it was saved
+    capsys.readouterr()
+    answers = iter(["Cat", "300", "done", "0", "1"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    assert data.collect_user_data()["monthly_gross_salary"] == 300
+    assert "Existing data found" not in capsys.readouterr().out
+    assert store.get("cat")["name"] == "Cat"
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from investment import calculate_mmf_return
+from projection import project_schedules
+
+
+def test_final_balance_matches_closed_form():
+    schedules = project_schedules([0.12, 0.0], 10_000, 24)
+    for i, rate in enumerate([0.12, 0.0]):
+        expected = calculate_mmf_return(10_000, rate, 24)["future_value"]
+        assert schedules["balance"][i, -1] == pytest.approx(expected)
+    assert np.all(schedules["monthly_interest"][:, 0] == 0.0)
+
+
+@pytest.mark.parametrize("months", [0, -3])
+def test_rejects_empty_horizon(months):
+    with pytest.raises(ValueError, match="at least one month"):
+        project_schedules([0.12], 10_000, months)
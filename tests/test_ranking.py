@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from mmf_parser import MMFRate
+from ranking import RANKING_KEYS, LiveRanking, top_k
+
+
+def names(funds):
+    return [fund.name for fund in funds]
+
+
+def test_ties_follow_the_current_table():
+    # The same table must rank the same whatever the ranking saw before
+    older = [MMFRate("A", 10.0), MMFRate("B", 10.0)]
+    current = [MMFRate("B", 10.0), MMFRate("A", 10.0)]
+
+    fresh = LiveRanking("rate")
+    fresh.update(current)
+    seasoned = LiveRanking("rate")
+    seasoned.update(older)
+    seasoned.update(current)
+
+    assert names(fresh.top(1)) == names(seasoned.top(1)) == names(top_k(current, 1)) == ["B"]
+
+
+def test_only_the_fee_changed_keeps_the_order():
+    ranking = LiveRanking("rate")
+    ranking.update([MMFRate("A", 12.0, 1.0), MMFRate("B", 11.0, 1.0)])
+    assert ranking.update([MMFRate("A", 12.0, 2.0), MMFRate("B", 11.0, 1.0)]) == 0
+    assert ranking.top(1)[0].fee == 2.0
+
+
+@pytest.mark.parametrize("key", sorted(RANKING_KEYS))
+def test_matches_top_k_over_successive_tables(key):
+    rng = random.Random(7)
+    pool = [f"Fund {i}" for i in range(12)]
+    ranking = LiveRanking(key)
+    for _ in range(500):
+        # Few distinct rates and fees, so ties are common; funds come and go and reorder
+        chosen = rng.sample(pool, rng.randint(0, len(pool)))
+        table = [MMFRate(name, rng.choice([9.5, 10.0, 10.5]), rng.choice([None, 0.5, 1.0])) for name in chosen]
+        k = rng.randint(1, 8)
+        assert names(ranking.update_and_top(table, k)) == names(top_k(table, k, key))
+        assert len(ranking) == len(table)
@@ -0,0 +1,32 @@
+from mmf_parser import MMFRate, parse_mmf_rates
+from rate_history import SECONDS_PER_DAY, RateHistory
+
+DAY = 20_000 * SECONDS_PER_DAY
+
+
+def test_parser_collapses_whitespace_in_names():
+    html = b"<table><tr><td>Cytonn\n  Money Market\tFund</td><td>1%</td><td>15.2%</td></tr></table>"
+    assert parse_mmf_rates(html)[0].name == "Cytonn Money Market Fund"
+
+
+def test_name_with_line_break_is_one_fund(tmp_path):
+    history = RateHistory(str(tmp_path))
+    assert history.append([MMFRate("Foo\nBar Fund", 12.0), MMFRate("Baz Fund", 10.0)], DAY) == 2
+    assert history.append([MMFRate("Foo\nBar Fund", 12.5), MMFRate("Baz Fund", 10.0)], DAY + SECONDS_PER_DAY) == 2
+
+    assert (tmp_path / "funds.txt").read_text().splitlines() == ["Foo Bar Fund", "Baz Fund"]
+    _, rates = history.fund_range("Foo\nBar Fund")
+    assert rates.tolist() == [12.0, 12.5]
+
+
+def test_out_of_order_appends_are_sorted_on_read(tmp_path):
+    # Two processes can append their tables in the opposite order to their fetches
+    RateHistory(str(tmp_path)).append([MMFRate("Baz Fund", 10.0)], DAY + 2 * SECONDS_PER_DAY)
+    RateHistory(str(tmp_path)).append([MMFRate("Baz Fund", 9.0)], DAY)
+    RateHistory(str(tmp_path)).append([MMFRate("Baz Fund", 9.5)], DAY + SECONDS_PER_DAY)
+
+    history = RateHistory(str(tmp_path))
+    _, rates = history.fund_range("Baz Fund")
+    assert rates.tolist() == [9.0, 9.5, 10.0]
+    _, rates = history.fund_range("Baz Fund", DAY + 1, DAY + 2 * SECONDS_PER_DAY - 1)
+    assert rates.tolist() == [9.5]
@@ -0,0 +1,86 @@
+from investment import suggest_investments
+from mmf_parser import MMFRate
+from rate_provider import RateSnapshot
+from recalc import Graph, financial_plan
+from tax import calculate_net_income
+
+RATES = RateSnapshot([MMFRate("Fund A", 12.0, 1.0), MMFRate("Fund B", 11.0, 0.5), MMFRate("Fund C", 10.0)], 1.7e9, False)
+
+PROFILE = dict(gross_salary=150_000.0, fixed_expenses={"Rent": 30_000.0}, savings_goal_amount=500_000.0,
+               savings_goal_timeframe_months=12, rates=RATES)
+
+
+def counting_graph():
+    #  a -> double \
+    #                total
+    #  b -> square /
+    graph = Graph()
+    graph.input("a", 1)
+    graph.input("b", 2)
+    graph.node("double", ["a"], lambda a: 2 * a)
+    graph.node("square", ["b"], lambda b: b * b)
+    graph.node("parity", ["a"], lambda a: a % 2)
+    graph.node("total", ["double", "square"], lambda x, y: x + y)
+    graph.node("odd", ["parity"], lambda p: p == 1)
+    return graph
+
+
+def recompute(graph, *names):
+    # Which nodes a get() of `names` recomputed
+    before = dict(graph.recomputed)
+    values = [graph.get(name) for name in names]
+    return {name for name, count in graph.recomputed.items() if count != before.get(name, 0)}, values
+
+
+def test_only_dependents_are_recomputed():
+    graph = counting_graph()
+    assert recompute(graph, "total", "odd") == ({"double", "square", "total", "parity", "odd"}, [6, True])
+    assert recompute(graph, "total", "odd") == (set(), [6, True])
+
+    graph.set("b", 3)
+    assert sorted(graph.dirty()) == ["square", "total"]
+    assert recompute(graph, "total", "odd") == ({"square", "total"}, [11, True])
+
+
+def test_unchanged_value_stops_the_recalculation():
+    graph = counting_graph()
+    graph.get("odd")
+    # parity is recomputed and comes out the same, so odd keeps its value
+    graph.set("a", 3)
+    assert recompute(graph, "odd") == ({"parity"}, [True])
+    assert graph.set("a", 3) is False
+    assert recompute(graph, "odd") == (set(), [True])
+
+
+def test_expense_edit_leaves_tax_and_funds_alone():
+    plan = financial_plan()
+    plan.update(**PROFILE)
+    plan.get("suggestions")
+    cached = {name: plan.get(name) for name in ("statutory", "ranking", "projections", "monthly_deposit", "cross_asset")}
+
+    plan.update(fixed_expenses={"Rent": 30_000.0, "Food": 10_000.0})
+    changed, (breakdown, suggestions) = recompute(plan, "breakdown", "suggestions")
+    assert changed == {"total_expenses", "breakdown", "remaining", "progress", "suggestions"}
+    for name, value in cached.items():
+        assert plan.get(name) is value, name
+
+    assert breakdown == calculate_net_income(150_000.0, {"Rent": 30_000.0, "Food": 10_000.0})
+    assert suggestions == suggest_investments(
+        remaining_funds=breakdown.remaining_for_savings_investment, savings_goal_amount=500_000.0,
+        savings_goal_timeframe_months=12, rates=RATES)
+
+
+def test_rate_change_leaves_tax_alone():
+    plan = financial_plan()
+    plan.update(**PROFILE)
+    plan.get("suggestions")
+    statutory = plan.get("statutory")
+
+    rates = RateSnapshot([MMFRate("Fund A", 9.0, 1.0), MMFRate("Fund B", 11.0, 0.5)], 1.8e9, False)
+    plan.update(rates=rates)
+    changed, (suggestions,) = recompute(plan, "suggestions")
+    assert changed == {"ranking", "projections", "cross_asset", "suggestions"}
+    assert plan.get("statutory") is statutory
+    assert suggestions == suggest_investments(
+        remaining_funds=plan.get("remaining"), savings_goal_amount=500_000.0,
+        savings_goal_timeframe_months=12, rates=rates)
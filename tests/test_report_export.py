@@ -0,0 +1,37 @@
+import glob
+import os
+import tempfile
+import zipfile
+
+from mmf_parser import MMFRate
+from rate_provider import RateSnapshot
+from report_export import export_batch
+
+RATES = RateSnapshot([MMFRate("Fund A", 12.0, 1.0), MMFRate("Fund B", 11.0, 0.5)], 1.7e9, False)
+
+PROFILES = [
+    {"name": f"User {i}", "monthly_gross_salary": 80_000 + 10_000 * i, "fixed_monthly_expenses": {"Rent": 20_000},
+     "savings_goals": {"target_amount": 200_000, "timeframe_months": 12}}
+    for i in range(3)
+]
+
+
+def test_zip_without_out_dir_leaves_no_reports_behind(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "tmp"))
+    os.makedirs(tempfile.tempdir)
+    zip_path = str(tmp_path / "reports.zip")
+
+    assert export_batch(PROFILES, fmt="csv", workers=1, zip_path=zip_path, rates=RATES) == zip_path
+    with zipfile.ZipFile(zip_path) as bundle:
+        assert len(bundle.namelist()) == len(PROFILES)
+        assert all(name.endswith(".csv") for name in bundle.namelist())
+    assert glob.glob(os.path.join(tempfile.tempdir, "*")) == []
+
+
+def test_zip_with_out_dir_keeps_the_reports(tmp_path):
+    out_dir = tmp_path / "reports"
+    zip_path = str(tmp_path / "reports.zip")
+    export_batch(PROFILES, str(out_dir), fmt="csv", workers=1, zip_path=zip_path, rates=RATES)
+    assert len(os.listdir(out_dir)) == len(PROFILES)
+    with zipfile.ZipFile(zip_path) as bundle:
+        assert sorted(bundle.namelist()) == sorted(os.listdir(out_dir))
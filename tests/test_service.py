@@ -0,0 +1,98 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import service
+from mmf_parser import MMFRate
+from rate_provider import RateSnapshot
+
+RATES = RateSnapshot([MMFRate("Fund A", 12.0, 1.0), MMFRate("Fund B", 11.0, 0.5)], 1.7e9, False)
+
+
+@pytest.fixture(autouse=True)
+def rates(monkeypatch):
+    monkeypatch.setattr(service, "get_rate_snapshot", lambda: RATES)
+
+
+@pytest.fixture
+def server():
+    server = service.make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, path, raw):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    try:
+        connection.request("POST", path, raw, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+SUGGESTIONS = {"remaining_funds": 80000, "savings_goal_amount": 500000, "savings_goal_timeframe_months": 12}
+
+
+@pytest.mark.parametrize("handler, body", [
+    (service.handle_net_income, {"monthly_gross_salary": "NaN"}),
+    (service.handle_net_income, {"monthly_gross_salary": float("inf")}),
+    (service.handle_net_income, {"monthly_gross_salary": "lots"}),
+    (service.handle_net_income, {"monthly_gross_salary": 100000, "fixed_monthly_expenses": {"Rent": float("nan")}}),
+    (service.handle_net_income, {"monthly_gross_salary": 100000, "fixed_monthly_expenses": {"Rent": "-Infinity"}}),
+    (service.handle_net_income, {"monthly_gross_salary": 100000, "fixed_monthly_expenses": [1, 2]}),
+    (service.handle_suggestions, dict(SUGGESTIONS, top_n=1e400)),
+    (service.handle_suggestions, dict(SUGGESTIONS, top_n=0)),
+    (service.handle_suggestions, dict(SUGGESTIONS, top_n=service.MAX_TOP_N + 1)),
+    (service.handle_suggestions, dict(SUGGESTIONS, top_n="five")),
+    (service.handle_suggestions, dict(SUGGESTIONS, savings_goal_timeframe_months=float("inf"))),
+    (service.handle_suggestions, dict(SUGGESTIONS, savings_goal_timeframe_months=0)),
+    (service.handle_suggestions, dict(SUGGESTIONS, remaining_funds=float("nan"))),
+    (service.handle_suggestions, dict(SUGGESTIONS, ranking_key="name")),
+    (service.handle_profile, {"monthly_gross_salary": 100000, "savings_goals": {"timeframe_months": float("inf")}}),
+    (service.handle_profile, {"monthly_gross_salary": 100000, "savings_goals": [500000, 12]}),
+])
+def test_bad_input_is_a_400(handler, body):
+    with pytest.raises(service.BadRequest) as raised:
+        handler(body)
+    assert raised.value.status == 400
+
+
+def test_valid_input_is_answered():
+    assert service.handle_net_income({"monthly_gross_salary": "100000"})["gross_salary"] == 100000.0
+    suggestions = service.handle_suggestions(dict(SUGGESTIONS, top_n=1.0))
+    assert [s["name"] for s in suggestions if s["type"] == "mmf"] == ["Fund A"]
+
+
+@pytest.mark.parametrize("path, raw", [
+    ("/v1/suggestions", b'{"remaining_funds": 80000, "top_n": 1e400}'),
+    ("/v1/suggestions", b'{"remaining_funds": 80000, "savings_goal_timeframe_months": Infinity}'),
+    ("/v1/net-income", b'{"monthly_gross_salary": "NaN"}'),
+    ("/v1/net-income", b'{"monthly_gross_salary": NaN}'),
+    ("/v1/net-income", b'{"monthly_gross_salary": 1, "fixed_monthly_expenses": {"Rent": -Infinity}}'),
+    ("/v1/profile", b'{"monthly_gross_salary": 1, "savings_goals": {"target_amount": Infinity}}'),
+    ("/v1/net-income", b'[1, 2]'),
+    ("/v1/net-income", b'{not json'),
+])
+def test_bad_request_over_http(server, path, raw):
+    status, body = post(server, path, raw)
+    assert status == 400
+    assert body["error"]
+
+
+def test_batch_reports_non_finite_profiles_per_entry(server):
+    profiles = [
+        {"name": "Ann", "monthly_gross_salary": 100000},
+        {"name": "Bad", "monthly_gross_salary": "NaN"},
+        {"name": "Worse", "monthly_gross_salary": 100000, "fixed_monthly_expenses": {"Rent": 1e400}},
+    ]
+    status, body = post(server, "/v1/batch", json.dumps({"profiles": profiles}).encode("utf-8"))
+    assert status == 200
+    assert (body["count"], body["errors"]) == (3, 2)
+    assert body["results"][0]["name"] == "Ann"
+    assert [r["line"] for r in body["results"][1:]] == [2, 3]
@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+import pytest
+
+from payroll import calculate_kra_paye_batch
+from piecewise import net_segments
+from schedules import get_registry
+from solvers import gross_for_net, gross_for_net_batch
+from tax import calculate_kra_paye
+
+SCHEDULES = get_registry().schedules
+
+
+def net(gross, as_of):
+    return gross - calculate_kra_paye(gross, as_of).total_statutory_deductions
+
+
+def boundary_targets(as_of):
+    # The net at every breakpoint (PAYE, SHA and NSSF limits and the relief
+    # point), a cent either side of it, and the best net reachable so far
+    segments = net_segments(as_of)
+    targets = {0.0, -5.0, segments.net_at_zero}
+    for limit in segments.breakpoints:
+        value = net(limit, as_of)
+        targets.update((value - 0.01, value, value + 0.01))
+    targets.update(b for b in segments.best_so_far if b != math.inf)
+    return sorted(targets)
+
+
+def targets_for(as_of):
+    rng = np.random.default_rng(16)
+    return boundary_targets(as_of) + sorted(rng.uniform(0, 1_000_000, 200).tolist())
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: str(s.effective_from))
+def test_batch_matches_scalar(schedule):
+    as_of = schedule.effective_from
+    targets = targets_for(as_of)
+    batch = gross_for_net_batch(np.array(targets), as_of)
+    for i, target in enumerate(targets):
+        assert batch[i] == gross_for_net(target, as_of), f"target {target}"
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: str(s.effective_from))
+def test_smallest_gross_that_reaches_the_target(schedule):
+    as_of = schedule.effective_from
+    segments = net_segments(as_of)
+    for target in targets_for(as_of):
+        gross = gross_for_net(target, as_of)
+        assert net(gross, as_of) >= target, f"target {target}"
+        if gross == 0:
+            continue
+        # Net rises along each segment, so every lower salary falls short if
+        # the one just below the answer and every earlier segment's top do
+        assert net(math.nextafter(gross, -math.inf), as_of) < target, f"target {target}"
+        assert all(net(limit, as_of) < target for limit in segments.breakpoints if limit < gross), f"target {target}"
+        # and, independently of the segments, on a grid of lower salaries
+        below = np.linspace(0, gross, 2001)[:-1]
+        assert (below - calculate_kra_paye_batch(below, as_of).total_statutory_deductions < target).all()
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: str(s.effective_from))
+def test_target_on_a_band_limit(schedule):
+    # The net at a limit where net is continuous (not an SHA step) is first reached at the limit itself
+    as_of = schedule.effective_from
+    segments = net_segments(as_of)
+    checked = 0
+    for limit in segments.breakpoints:
+        target = net(limit, as_of)
+        if any(net(other, as_of) >= target for other in segments.breakpoints if other < limit):
+            continue  # an earlier SHA peak already pays this much
+        gross = gross_for_net(target, as_of)
+        assert gross == pytest.approx(limit, abs=1e-6)
+        assert gross_for_net(target + 0.01, as_of) > limit
+        checked += 1
+    assert checked
@@ -0,0 +1,105 @@
+import numpy as np
+
+from piecewise import net_segments
+from records import WhatIfColumns
+
+# Salary what-if curves. PAYE, SHA and NSSF are piecewise linear (SHA is a step
+# function), so over any range of gross salaries net pay is a handful of
+# straight segments (piecewise.NetSegments). A SalaryCurve is those segments
+# cut to the range: exact formulas for net salary, total deductions, money left
+# after expenses, and the marginal and effective tax rates, with no sampling.
+# evaluate() applies them to any array of salaries in one vectorised pass, so a
+# chart over thousands of salaries costs what a few dozen calculate_net_income
+# calls would.
+#
+#   curve = salary_curve(50_000, 500_000, total_fixed_expenses=40_000)
+#   curve.points()                          # exact polyline for charts
+#   curve.evaluate([120_000, 150_000])      # records.WhatIfColumns
+
+
+class SalaryCurve:
+    """Net pay and deductions between `low` and `high` gross, segment by segment.
+
+    Segment k covers gross salaries in (lower[k], upper[k]]; inside it
+
+        net salary        = net_slope[k] * gross + net_intercept[k]
+        total deductions  = (1 - net_slope[k]) * gross - net_intercept[k]
+        marginal rate     = marginal_rate[k]  (= 1 - net_slope[k])
+        effective rate    = marginal_rate[k] - net_intercept[k] / gross
+
+    and money left is net minus `total_fixed_expenses`. The marginal rate is
+    what each extra shilling costs inside a segment; at an SHA band limit net
+    drops by a fixed amount instead (see steps()).
+    """
+
+    def __init__(self, segments, low, high, total_fixed_expenses=0.0):
+        if not 0 <= low <= high:
+            raise ValueError(f"Expected 0 <= low <= high, got {low} and {high}")
+        self.segments = segments
+        self.low = float(low)
+        self.high = float(high)
+        self.total_fixed_expenses = float(total_fixed_expenses)
+
+        first, last = segments.segment_index(self.low), segments.segment_index(self.high)
+        self.lower = np.array(segments.lower[first:last + 1], dtype=np.float64)
+        self.upper = np.array(segments.upper[first:last + 1], dtype=np.float64)
+        self.lower[0] = self.low
+        self.upper[-1] = self.high
+        self.net_slope = np.array(segments.slope[first:last + 1], dtype=np.float64)
+        self.net_intercept = np.array(segments.intercept[first:last + 1], dtype=np.float64)
+        self.marginal_rate = 1.0 - self.net_slope
+
+    @property
+    def breakpoints(self):
+        # Salaries inside the range where the formulas change
+        return self.upper[:-1]
+
+    def steps(self):
+        # (gross, change in net just above it) for every breakpoint where net jumps (SHA band limits)
+        below = self.net_slope[:-1] * self.breakpoints + self.net_intercept[:-1]
+        above = self.net_slope[1:] * self.breakpoints + self.net_intercept[1:]
+        jumps = above - below
+        return [(gross, jump) for gross, jump in zip(self.breakpoints.tolist(), jumps.tolist()) if abs(jump) > 1e-9]
+
+    def points(self):
+        """The linear quantities as an exact polyline: both ends of every segment.
+
+        Returns a dict of arrays (gross_salary, net_salary_after_tax,
+        total_statutory_deductions, remaining_for_savings_investment,
+        marginal_rate). A breakpoint appears twice, once per side, so a chart
+        draws SHA drops as vertical lines and the marginal rate as steps.
+        """
+        gross = np.column_stack([self.lower, self.upper]).ravel()
+        slope = np.repeat(self.net_slope, 2)
+        net = slope * gross + np.repeat(self.net_intercept, 2)
+        return {
+            "gross_salary": gross,
+            "net_salary_after_tax": net,
+            "total_statutory_deductions": gross - net,
+            "remaining_for_savings_investment": net - self.total_fixed_expenses,
+            "marginal_rate": 1.0 - slope,
+        }
+
+    def evaluate(self, salaries):
+        """The curve at any array of gross salaries (inside the range or not), as records.WhatIfColumns."""
+        gross = np.asarray(salaries, dtype=np.float64)
+        tables = self.segments.arrays()
+        k = np.searchsorted(tables["upper"], gross, side="left")
+        slope = tables["slope"][k]
+        net = slope * gross + tables["intercept"][k]
+        deductions = gross - net
+        with np.errstate(divide="ignore", invalid="ignore"):
+            effective = np.where(gross > 0, deductions / gross, 0.0)
+        return WhatIfColumns(gross, net, deductions, net - self.total_fixed_expenses, 1.0 - slope, effective)
+
+    def sample(self, count=200):
+        # evaluate() on `count` evenly spaced salaries plus both sides of every
+        # breakpoint, so a line chart through them shows every jump and step
+        edges = np.concatenate([self.breakpoints, np.nextafter(self.breakpoints, np.inf)])
+        gross = np.union1d(np.linspace(self.low, self.high, count), edges[edges <= self.high])
+        return self.evaluate(gross)
+
+
+def salary_curve(low, high, total_fixed_expenses=0.0, as_of=None):
+    # SalaryCurve under the schedule in force on `as_of` (default today)
+    return SalaryCurve(net_segments(as_of), low, high, total_fixed_expenses)